@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from request_scheduler import PriorityScheduler
+
+
+class AdaptiveLimiter:
+    """AIMD control of a scheduler's concurrency limit.
+
+    Every completed backend call is reported with its latency. While calls
+    succeed at normal latency and the current limit is actually in use, the
+    limit grows by about one per limit's worth of calls (additive increase).
+    Throttling (429/503) or latency above latency_tolerance times the
+    baseline for that priority class cuts it by backoff (multiplicative
+    decrease), at most once per cooldown (by default one baseline round
+    trip) so one burst of 429s counts as one congestion event. Baselines
+    are slow moving averages kept per priority class, because bulk packs
+    are naturally slower than interactive calls. The scheduler's bulk share
+    follows the limit, so bulk work shrinks with it under congestion.
+    """
+
+    def __init__(self, scheduler: PriorityScheduler, min_limit: int = 1, max_limit: int = 64,
+                 backoff: float = 0.7, latency_tolerance: float = 2.0, min_inflation: float = 0.05,
+                 alpha: float = 0.05,
+                 cooldown: Optional[float] = None):
+        self.scheduler = scheduler
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_inflation = min_inflation
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.limit = float(min(max(scheduler.limit, min_limit), max_limit))
+        self.throttled = 0
+        self.decreases = {"throttled": 0, "latency": 0}
+        self._baseline: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        scheduler.set_limit(int(self.limit))
+
+    def record(self, priority: str, latency: Optional[float], throttled: bool = False):
+        """Report one backend call: its latency, or that it was throttled"""
+        with self._lock:
+            if throttled:
+                self.throttled += 1
+                self._decrease("throttled")
+            elif latency is not None:
+                baseline = self._baseline.get(priority, latency)
+                # Jitter on very fast calls is not congestion, hence min_inflation seconds
+                if latency > max(baseline * self.latency_tolerance, baseline + self.min_inflation):
+                    self._decrease("latency")
+                elif self.scheduler.in_flight() >= self.limit / 2:
+                    # Only grow a limit that is being used, or it drifts up while idle
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._baseline[priority] = baseline + self.alpha * (latency - baseline)
+            self.scheduler.set_limit(int(self.limit))
+
+    def _decrease(self, reason: str):
+        # Like TCP, back off at most once per round trip unless a cooldown is set
+        cooldown = self.cooldown if self.cooldown is not None else max(self._baseline.values(), default=0.0)
+        now = time.monotonic()
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.decreases[reason] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "throttled": self.throttled,
+                "decreases": dict(self.decreases),
+                "baseline_latency_ms": {
+                    priority: round(baseline * 1000, 1) for priority, baseline in self._baseline.items()
+                },
+            }
@@ -0,0 +1,108 @@
+"""
+Flask API payload benchmark.
+
+Posts /translate requests of several sizes to the app in-process, using the
+mock backend. Each text is translated once before timing, so the timed
+requests measure the API path rather than a backend: the request-size guard,
+JSON parsing, cache lookup and response serialization. Reports throughput
+(request and response bytes per second) and CPU time per request. It runs
+once for each codec, and with and without the echoed original_text. It also
+times rejecting a body over TRANSLATION_MAX_CONTENT_LENGTH.
+
+Usage:
+    python api_benchmark.py
+    python api_benchmark.py --sizes 1000,100000,800000 --requests 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict
+
+# Sample text mixes ASCII and Japanese, like the app's traffic
+SAMPLE = "Hello world, this is a benchmark sentence. こんにちは、世界。これはベンチマークの文です。"
+
+
+def _text(size: int) -> str:
+    """About size bytes of UTF-8 text"""
+    chunk = SAMPLE.encode("utf-8")
+    return (SAMPLE * (size // len(chunk) + 1)).encode("utf-8")[:size].decode("utf-8", "ignore")
+
+
+def measure(client, body: bytes, requests: int) -> Dict:
+    """Send body requests times; returns wall and CPU time per request and bytes moved"""
+    headers = {"Content-Type": "application/json"}
+    response_bytes = 0
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        response = client.post("/translate", data=body, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"/translate returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        response_bytes += len(response.get_data())
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    return {
+        "wall_ms": wall * 1000 / requests,
+        "cpu_ms": cpu * 1000 / requests,
+        "mb_per_s": (len(body) * requests + response_bytes) / wall / 1e6,
+        "response_bytes": response_bytes // requests,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure /translate throughput and CPU per request for large payloads")
+    parser.add_argument("--sizes", default="1000,100000,800000", help="Comma-separated text sizes in bytes")
+    parser.add_argument("--requests", type=int, default=30, help="Timed requests per case")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    # The app reads its configuration at import
+    os.environ.setdefault("TRANSLATION_BACKEND", "mock")
+    os.environ.setdefault("TRANSLATION_MOCK_LATENCY", "0")
+    # Client quotas would throttle the benchmark long before the API path is saturated
+    os.environ.setdefault("API_CLIENT_CHARS_PER_MINUTE", str(10 ** 12))
+    os.environ.setdefault("TRANSLATION_JOB_DB", os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import flask_app
+    from flask.json.provider import DefaultJSONProvider
+    from json_codec import FastJSONProvider
+
+    app = flask_app.app
+    client = app.test_client()
+    providers = [("json", DefaultJSONProvider(app))]
+    fast = FastJSONProvider(app)
+    if fast.codec != "json":
+        providers.append((fast.codec, fast))
+    else:
+        print("orjson is not installed; only the standard library codec is measured")
+
+    print(f"{'size':>9}  {'codec':>6}  {'echo':>4}  {'ms/req':>8}  {'cpu ms/req':>10}  {'MB/s':>8}  {'response':>9}")
+    for size in sizes:
+        text = _text(size)
+        for echo in (True, False):
+            body = json.dumps({
+                "text": text, "source_language": "en", "target_language": "ja", "include_original_text": echo
+            }, ensure_ascii=False).encode("utf-8")
+            if len(body) > flask_app.MAX_CONTENT_LENGTH:
+                print(f"{size:>9}  skipped: body is over TRANSLATION_MAX_CONTENT_LENGTH ({flask_app.MAX_CONTENT_LENGTH})")
+                break
+            for name, provider in providers:
+                app.json = provider
+                measure(client, body, 1)
+                result = measure(client, body, args.requests)
+                print(f"{size:>9}  {name:>6}  {'yes' if echo else 'no':>4}  {result['wall_ms']:>8.2f}  "
+                      f"{result['cpu_ms']:>10.2f}  {result['mb_per_s']:>8.1f}  {result['response_bytes']:>9}")
+
+    # An oversized body is refused from its Content-Length, before it is read
+    body = b"x" * (flask_app.MAX_CONTENT_LENGTH + 1)
+    started = time.perf_counter()
+    response = client.post("/translate", data=body, headers={"Content-Type": "application/json"})
+    print(f"Oversized body ({len(body)} bytes): {response.status_code} in {(time.perf_counter() - started) * 1000:.2f} ms")
+    return 0 if response.status_code == 413 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import contextvars
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from request_scheduler import BULK
+
+# OCI Language limits for BatchLanguageTranslationDetails
+MAX_BATCH_DOCUMENTS = 100
+MAX_BATCH_CHARACTERS = 20000
+
+# How much text to sample when auto-detecting the language of a batch
+DETECTION_SAMPLE_CHARACTERS = 2000
+
+# Texts are truncated to this many characters for per-item detection
+DETECTION_TEXT_CHARACTERS = 500
+
+
+def pack_texts(texts: Iterable[str], max_documents: int = MAX_BATCH_DOCUMENTS,
+               max_characters: Union[int, Callable[[], int]] = MAX_BATCH_CHARACTERS,
+               size: Callable[[str], int] = len) -> Iterator[List[str]]:
+    """Group texts into packs that fit in one batch translation request.
+
+    max_characters may be a callable (e.g. PackingTuner.target), which is
+    asked again for every pack. A text longer than the limit is sent in a
+    pack of its own.
+    """
+    limit = max_characters() if callable(max_characters) else max_characters
+    pack = []
+    pack_characters = 0
+    for text in texts:
+        text_size = size(text)
+        if pack and (len(pack) >= max_documents or pack_characters + text_size > limit):
+            yield pack
+            pack = []
+            pack_characters = 0
+            limit = max_characters() if callable(max_characters) else max_characters
+        pack.append(text)
+        pack_characters += text_size
+    if pack:
+        yield pack
+
+
+class PackingTuner:
+    """Chooses characters per batch request from observed latency.
+
+    Candidate pack sizes double from min_characters up to max_characters.
+    For each language pair and size, the tuner keeps moving averages of
+    latency and characters sent. The target is the size with the best
+    characters per second whose latency stays within latency_slo. A share of
+    packs (explore) tries a neighbouring size so the curve keeps up with the
+    service.
+    """
+
+    def __init__(self, max_characters: int = MAX_BATCH_CHARACTERS, min_characters: int = 1000,
+                 latency_slo: float = 5.0, alpha: float = 0.3, explore: float = 0.1):
+        self.sizes = []
+        size = min(min_characters, max_characters)
+        while size < max_characters:
+            self.sizes.append(size)
+            size *= 2
+        self.sizes.append(max_characters)
+        self.latency_slo = latency_slo
+        self.alpha = alpha
+        self.explore = explore
+        # (source, target) -> size -> [latency, characters, samples]
+        self._curves: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _best(self, curve: Dict[int, List[float]]) -> int:
+        within_slo = [
+            (characters / latency if latency else 0.0, size)
+            for size, (latency, characters, _) in curve.items()
+            if latency <= self.latency_slo
+        ]
+        if within_slo:
+            return max(within_slo)[1]
+        if curve:
+            # Everything measured is too slow: go smaller than the smallest tried
+            return self.sizes[max(0, self.sizes.index(min(curve)) - 1)]
+        return self.sizes[len(self.sizes) // 2]
+
+    def target(self, source_language: str, target_language: str) -> int:
+        """Characters to put in the next pack for this language pair"""
+        with self._lock:
+            best = self._best(self._curves.get((source_language, target_language), {}))
+        if random.random() < self.explore:
+            index = self.sizes.index(best) + random.choice((-1, 1))
+            return self.sizes[min(max(index, 0), len(self.sizes) - 1)]
+        return best
+
+    def record(self, source_language: str, target_language: str, characters: int, latency: float):
+        """Report one successful batch call"""
+        if characters <= 0:
+            return
+        size = min(self.sizes, key=lambda s: abs(math.log(s / characters)))
+        with self._lock:
+            curve = self._curves.setdefault((source_language, target_language), {})
+            point = curve.get(size)
+            if point is None:
+                curve[size] = [latency, characters, 1]
+            else:
+                point[0] += self.alpha * (latency - point[0])
+                point[1] += self.alpha * (characters - point[1])
+                point[2] += 1
+
+    def stats(self) -> Dict:
+        """Chosen size and observed throughput curve per language pair"""
+        with self._lock:
+            return {
+                f"{source}->{target}": {
+                    "target_characters": self._best(curve),
+                    "curve": [
+                        {
+                            "size": size,
+                            "latency_ms": round(latency * 1000, 1),
+                            "characters_per_second": round(characters / latency) if latency else None,
+                            "samples": samples,
+                        }
+                        for size, (latency, characters, samples) in sorted(curve.items())
+                    ],
+                }
+                for (source, target), curve in self._curves.items()
+            }
+
+
+def tuner_from_env(max_characters: int = MAX_BATCH_CHARACTERS) -> PackingTuner:
+    """PackingTuner with the latency SLO from BATCH_LATENCY_SLO (seconds)"""
+    return PackingTuner(max_characters=max_characters, latency_slo=float(os.getenv("BATCH_LATENCY_SLO", "5")))
+
+
+def dedupe_by_frequency(texts: Iterable[str]) -> Tuple[List[str], Dict]:
+    """Distinct texts, most frequent first (ties keep first-seen order), and dedup stats.
+
+    Stats report how many texts came in, how many were unique, the dedup ratio
+    and how many characters no longer need to be sent upstream.
+    """
+    counts = Counter(texts)
+    unique = [text for text, _ in counts.most_common()]
+    total = sum(counts.values())
+    stats = {
+        "texts": total,
+        "unique_texts": len(unique),
+        "dedup_ratio": 1 - len(unique) / total if total else 0.0,
+        "characters_saved": sum((count - 1) * len(text) for text, count in counts.items()),
+    }
+    return unique, stats
+
+
+def detect_batch_language(translator, texts: List[str]) -> str:
+    """Detect the source language of a batch from a sample of its text"""
+    sample = ""
+    for text in texts:
+        if len(sample) >= DETECTION_SAMPLE_CHARACTERS:
+            break
+        sample += text + "\n"
+    detected = translator.detect_language(sample[:DETECTION_SAMPLE_CHARACTERS])
+    return detected if detected != "unknown" else "en"
+
+
+def detect_languages(translator, texts: List[str], priority: str = BULK,
+                     max_workers: int = 4) -> List[Tuple[str, float]]:
+    """(language code, confidence) for each text, using as few backend calls as possible.
+
+    Each text is cut to DETECTION_TEXT_CHARACTERS, which is plenty to detect
+    a language. Duplicates are detected once, and the rest are packed into
+    batch requests that run on up to max_workers threads. The scheduler
+    still caps how many of them reach the backend at once. Errors are raised.
+    """
+    if not translator.router:
+        raise RuntimeError("OCI client not initialized. Please check your configuration.")
+    samples = [text[:DETECTION_TEXT_CHARACTERS] for text in texts]
+    unique = [sample for sample in dict.fromkeys(samples) if sample.strip()]
+    packs = list(pack_texts(unique))
+
+    detected = {}
+    if packs:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(packs))) as executor:
+            # Each pack runs in a copy of the caller's context, so a request deadline applies to it
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    lambda pack=pack: translator.router.detect_languages(pack, priority=priority)
+                )
+                for pack in packs
+            ]
+            for pack, future in zip(packs, futures):
+                detected.update(zip(pack, future.result()))
+    return [detected.get(sample, ("unknown", 0.0)) for sample in samples]
+
+
+def translate_batch(translator, texts: List[str], target_language: str,
+                    source_language: str, tuner: Optional[PackingTuner] = None) -> List[str]:
+    """Translate a pack of texts with a single backend call.
+
+    source_language must be a concrete language code. Unlike translate_text,
+    errors are raised so callers can retry or checkpoint. The call's latency
+    is reported to tuner, if given.
+    """
+    if not translator.router:
+        raise RuntimeError("OCI client not initialized. Please check your configuration.")
+    started = time.perf_counter()
+    # Batch work runs in the bulk class so it never crowds out interactive requests
+    results = translator.router.translate(texts, target_language, source_language, priority=BULK)
+    if tuner is not None:
+        tuner.record(source_language, target_language, sum(len(text) for text in texts),
+                     time.perf_counter() - started)
+    return results
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Check whether an OCI error means we should back off and retry"""
+    status = getattr(error, "status", None)
+    return status in (429, 503) or "TooManyRequests" in str(error)
+
+
+def translate_batch_with_retry(translator, texts: List[str], target_language: str,
+                               source_language: str, max_attempts: int = 5,
+                               initial_backoff: float = 1.0,
+                               tuner: Optional[PackingTuner] = None) -> List[str]:
+    """translate_batch with exponential backoff on throttling"""
+    backoff = initial_backoff
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return translate_batch(translator, texts, target_language, source_language, tuner)
+        except Exception as e:
+            if attempt == max_attempts or not is_throttling_error(e):
+                raise
+            time.sleep(backoff)
+            backoff *= 2
+
@@ -0,0 +1,159 @@
+import streamlit as st
+import io
+import math
+import time
+
+from structured_formats import SUPPORTED_EXTENSIONS, format_for_filename, unique_strings
+from translation_jobs import JOB_DONE, JOB_FAILED
+
+RESULTS_PAGE_SIZE = 500
+TABLE_PAGE_SIZE = 50
+
+
+def _wait_for_job(job_queue, job_id):
+    """Show job progress until it finishes; reruns interrupt this without stopping the job"""
+    job = job_queue.status(job_id)
+    progress_bar = st.progress(job["progress"])
+    while job["status"] not in (JOB_DONE, JOB_FAILED):
+        time.sleep(0.5)
+        job = job_queue.status(job_id)
+        progress_bar.progress(job["progress"])
+    return job
+
+
+def _show_dedup_stats(lines, unique, characters_saved):
+    if lines:
+        st.caption(
+            f"♻️ {unique:,} unique of {lines:,} ({1 - unique / lines:.0%} duplicates) · "
+            f"{characters_saved:,} characters not sent to OCI"
+        )
+
+
+def _show_line_results(job_queue, job):
+    """One page of results as a table; render cost does not grow with batch size"""
+    st.subheader("📋 Batch Translation Results:")
+    pages = max(1, math.ceil(job["total"] / TABLE_PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"batch_page_{job['id']}")
+    items = job_queue.results(job["id"], (page - 1) * TABLE_PAGE_SIZE, TABLE_PAGE_SIZE)
+    st.dataframe(
+        [{"Line": item["position"] + 1, "Source": item["text"], "Translation": item["translation"]} for item in items],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"Page {page} of {pages} · {job['total']:,} lines")
+
+    col_format, col_button = st.columns([1, 1])
+    with col_format:
+        export_format = st.radio("Download format", ["CSV", "TSV"], horizontal=True, key=f"batch_format_{job['id']}")
+    with col_button:
+        if st.button("📦 Prepare download", key=f"batch_prepare_{job['id']}"):
+            st.session_state.batch_export = (job["id"], export_format, _export_results(job_queue, job["id"], export_format))
+
+    export = st.session_state.get('batch_export')
+    if export and export[0] == job["id"] and export[1] == export_format:
+        st.download_button(
+            f"⬇️ Download {export_format}",
+            data=export[2],
+            file_name=f"translations.{export_format.lower()}",
+            mime="text/csv" if export_format == "CSV" else "text/tab-separated-values",
+            on_click=_release_export
+        )
+
+
+def _export_results(job_queue, job_id, export_format):
+    """Job results as CSV or TSV bytes; download_button needs the whole file, the API streams it"""
+    delimiter = "," if export_format == "CSV" else "\t"
+    return b"".join(job_queue.export(job_id, delimiter, RESULTS_PAGE_SIZE))
+
+
+def _release_export():
+    # Drop the prepared file once it has been handed to the browser
+    st.session_state.pop('batch_export', None)
+
+
+def _show_structured_download(job_queue, job, uploaded_file, fmt):
+    # Rewrite the file once per job, not on every rerun; download_button only accepts bytes or buffers
+    export = st.session_state.get('batch_export')
+    if not export or export[0] != job["id"]:
+        translations = {item["text"]: item["translation"] for item in job_queue.iter_results(job["id"], RESULTS_PAGE_SIZE)}
+        output = io.BytesIO()
+        uploaded_file.seek(0)
+        fmt.write(uploaded_file, output, translations)
+        export = (job["id"], fmt, output.getvalue())
+        st.session_state.batch_export = export
+
+    name, _, extension = uploaded_file.name.rpartition(".")
+    st.success(f"✅ Translated {job['unique_texts']:,} unique strings")
+    st.download_button(
+        "⬇️ Download translated file",
+        data=export[2],
+        file_name=f"{name}.{job['target_language']}.{extension}",
+        mime="application/octet-stream"
+    )
+
+
+def _iter_upload_lines(uploaded_file):
+    uploaded_file.seek(0)
+    reader = io.TextIOWrapper(uploaded_file, encoding="utf-8")
+    try:
+        for line in reader:
+            yield line.rstrip("\r\n")
+    finally:
+        # Leave the uploaded file open for later reruns
+        reader.detach()
+
+
+@st.fragment
+def show_batch_translation(job_queue, target_lang, source_lang):
+    """Batch translation panel: plain text line by line, or structured localization files.
+
+    A fragment, so uploads, paging and downloads rerun only this panel.
+    """
+    with st.expander("📚 Batch Translation"):
+        st.write("Upload a text file or enter multiple lines for batch translation:")
+        st.caption(f"Structured files ({', '.join(SUPPORTED_EXTENSIONS)}) are translated in place, keeping their keys and layout")
+
+        uploaded_file = st.file_uploader(
+            "Choose a text file",
+            type=['txt'] + [ext.lstrip('.') for ext in SUPPORTED_EXTENSIONS]
+        )
+        if uploaded_file is None:
+            return
+
+        fmt = format_for_filename(uploaded_file.name, target_lang)
+        if fmt is None:
+            # Count lines once per uploaded file; they are streamed into the job store on submit
+            line_count = st.session_state.get('batch_line_count')
+            if not line_count or line_count[0] != uploaded_file.file_id:
+                line_count = (uploaded_file.file_id, sum(1 for _ in _iter_upload_lines(uploaded_file)))
+                st.session_state.batch_line_count = line_count
+            lines = _iter_upload_lines(uploaded_file)
+            st.write(f"Found {line_count[1]} lines to translate:")
+        else:
+            # Extract once per uploaded file rather than on every rerun
+            cached = st.session_state.get('batch_strings')
+            if not cached or cached[0] != uploaded_file.file_id:
+                uploaded_file.seek(0)
+                cached = (uploaded_file.file_id, *unique_strings(fmt, uploaded_file))
+                st.session_state.batch_strings = cached
+            _, lines, stats = cached
+            st.write(f"Found {len(lines)} unique strings to translate:")
+            _show_dedup_stats(stats["texts"], stats["unique_texts"], stats["characters_saved"])
+
+        if st.button("🚀 Translate All"):
+            # Runs on the background job queue; this script only polls its progress
+            st.session_state.batch_job = (uploaded_file.file_id, job_queue.submit(lines, target_lang, source_lang))
+
+        file_id, job_id = st.session_state.get('batch_job', (None, None))
+        if not job_id or file_id != uploaded_file.file_id:
+            return
+
+        job = _wait_for_job(job_queue, job_id)
+        if fmt is None:
+            _show_dedup_stats(job["translatable_lines"], job["unique_texts"], job["characters_saved"])
+        if job["status"] == JOB_FAILED:
+            st.error(f"❌ {job['error']}")
+        elif fmt is None:
+            _show_line_results(job_queue, job)
+        else:
+            _show_structured_download(job_queue, job, uploaded_file, fmt)
@@ -0,0 +1,191 @@
+"""
+Compact on-disk snapshots of the translation cache.
+
+A snapshot is a header, a fixed-width index sorted by key and a blob of
+UTF-8 text. Opening one only maps the file; lookups binary-search the index
+in place, so a freshly started instance can serve cached translations
+without parsing or copying the snapshot into memory first. Each index entry
+carries the time its translation was written, so cache TTLs keep counting
+from the original translation rather than from the restart.
+
+Usage:
+    TRANSLATION_ADMIN_KEY=... python cache_snapshot.py export --url http://localhost:5000 -o translation_cache.snap
+    python cache_snapshot.py info translation_cache.snap
+"""
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import sys
+import urllib.request
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_SNAPSHOT_PATH = os.getenv("TRANSLATION_CACHE_SNAPSHOT", "translation_cache.snap")
+
+MAGIC = b"TCSNAP02"
+_HEADER = struct.Struct("<8sQ")      # magic, entry count
+_INDEX_ENTRY = struct.Struct("<QIQId")  # key offset, key length, value offset, value length, written at
+
+# (text, source_language, target_language), the key used by SentenceCache
+CacheKey = Tuple[str, str, str]
+# Key, translation and when it was written (Unix time)
+CacheEntry = Tuple[CacheKey, str, float]
+
+
+def encode_key(key: CacheKey) -> bytes:
+    text, source_language, target_language = key
+    return f"{source_language}\0{target_language}\0{text}".encode("utf-8")
+
+
+def decode_key(data: bytes) -> CacheKey:
+    source_language, target_language, text = data.decode("utf-8").split("\0", 2)
+    return text, source_language, target_language
+
+
+def write_snapshot(output: BinaryIO, entries: Iterable[CacheEntry]) -> int:
+    """Write cache entries as a snapshot, keeping the newest of duplicate keys; returns the number of entries"""
+    newest = {}
+    for key, value, written_at in entries:
+        encoded = encode_key(key)
+        if encoded not in newest or newest[encoded][1] <= written_at:
+            newest[encoded] = (value.encode("utf-8"), written_at)
+    keys = sorted(newest)
+
+    data_start = _HEADER.size + _INDEX_ENTRY.size * len(keys)
+    output.write(_HEADER.pack(MAGIC, len(keys)))
+    offset = data_start
+    for key in keys:
+        value, written_at = newest[key]
+        output.write(_INDEX_ENTRY.pack(offset, len(key), offset + len(key), len(value), written_at))
+        offset += len(key) + len(value)
+    for key in keys:
+        output.write(key)
+        output.write(newest[key][0])
+    return len(keys)
+
+
+def save_snapshot(path: str, entries: Iterable[CacheEntry]) -> int:
+    """Write a snapshot file atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        count = write_snapshot(f, entries)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+class CacheSnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a translation cache snapshot")
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int, float]:
+        return _INDEX_ENTRY.unpack_from(self._map, _HEADER.size + i * _INDEX_ENTRY.size)
+
+    def get_entry(self, key: CacheKey) -> Optional[Tuple[str, float]]:
+        """Translation for key and when it was written, or None"""
+        target = encode_key(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length, written_at = self._entry(middle)
+            probe = self._map[key_offset:key_offset + key_length]
+            if probe < target:
+                low = middle + 1
+            elif probe > target:
+                high = middle
+            else:
+                return self._map[value_offset:value_offset + value_length].decode("utf-8"), written_at
+        return None
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def entries(self) -> Iterator[CacheEntry]:
+        for i in range(self._count):
+            key_offset, key_length, value_offset, value_length, written_at = self._entry(i)
+            yield (
+                decode_key(self._map[key_offset:key_offset + key_length]),
+                self._map[value_offset:value_offset + value_length].decode("utf-8"),
+                written_at
+            )
+
+    def items(self) -> Iterator[Tuple[CacheKey, str]]:
+        for key, value, _ in self.entries():
+            yield key, value
+
+    def close(self):
+        self._map.close()
+
+
+def open_snapshot(path: Optional[str] = DEFAULT_SNAPSHOT_PATH) -> Optional[CacheSnapshot]:
+    """Open a snapshot if one exists; a missing or unreadable file means a cold cache"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return CacheSnapshot(path)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring translation cache snapshot {path}: {str(e)}")
+        return None
+
+
+def cache_entries(cache) -> Iterator[CacheEntry]:
+    """Everything a cache can serve: the snapshot it was loaded from, then its live entries"""
+    if cache.snapshot is not None:
+        valid_after = cache.valid_after()
+        yield from (entry for entry in cache.snapshot.entries() if entry[2] >= valid_after)
+    yield from cache.entries()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or inspect translation cache snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Download a snapshot from a running Flask instance")
+    export.add_argument("--url", default="http://localhost:5000", help="Base URL of the instance")
+    export.add_argument("-o", "--output", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot file to write")
+    export.add_argument("--admin-key", default=os.getenv("TRANSLATION_ADMIN_KEY"),
+                        help="The instance's TRANSLATION_ADMIN_KEY (default: from the environment)")
+    info = commands.add_parser("info", help="Show what a snapshot contains")
+    info.add_argument("path", help="Snapshot file")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        tmp_path = args.output + ".tmp"
+        snapshot_request = urllib.request.Request(
+            args.url.rstrip("/") + "/cache/snapshot", headers={"X-Admin-Key": args.admin_key or ""}
+        )
+        with urllib.request.urlopen(snapshot_request) as response, open(tmp_path, "wb") as f:
+            shutil.copyfileobj(response, f)
+        snapshot = CacheSnapshot(tmp_path)
+        count = len(snapshot)
+        snapshot.close()
+        os.replace(tmp_path, args.output)
+        print(f"Wrote {count} cached translations to {args.output}")
+    else:
+        snapshot = CacheSnapshot(args.path)
+        pairs = {}
+        for (_, source_language, target_language), _ in snapshot.items():
+            pair = f"{source_language} → {target_language}"
+            pairs[pair] = pairs.get(pair, 0) + 1
+        print(f"{args.path}: {len(snapshot)} entries, {os.path.getsize(args.path)} bytes")
+        for pair, count in sorted(pairs.items(), key=lambda item: -item[1]):
+            print(f"  {pair}: {count}")
+        snapshot.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
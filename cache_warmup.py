@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from batch_translation import pack_texts, translate_batch_with_retry
+
+# Popular phrases translated on start-up when no phrase file is configured
+DEFAULT_WARMUP_PHRASES = [
+    "Dear Mr. Tanaka, I hope this email finds you well. I would like to schedule a meeting to discuss our upcoming project collaboration.",
+    "This API endpoint accepts POST requests with JSON payload containing user authentication credentials and returns a JWT token.",
+    "Hello! How are you doing today? The weather is really nice, isn't it?",
+    "Thank you for your message.",
+    "Hello",
+    "Thank you",
+]
+
+DEFAULT_WARMUP_TARGETS = ["ja", "es", "fr", "de", "zh", "ko"]
+
+
+def load_phrases(path: Optional[str]) -> List[str]:
+    """Phrases from a file, one per line, or the built-in list"""
+    if not path:
+        return list(DEFAULT_WARMUP_PHRASES)
+    with open(path, 'r', encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_languages(value: Optional[str], default: List[str]) -> List[str]:
+    if not value:
+        return list(default)
+    return [code.strip() for code in value.split(",") if code.strip()]
+
+
+class CacheWarmup:
+    """Pre-translates a phrase list into the cache in the background.
+
+    Phrases already in the cache (or its snapshot) are skipped, the rest are
+    sent in packed batches per target language. The instance counts as ready
+    once warm-up has finished, whether or not it succeeded, so a broken OCI
+    configuration cannot hold a deploy back forever.
+    """
+
+    def __init__(self, translator, cache, phrases: List[str], target_languages: List[str],
+                 source_language: str = "en"):
+        self.translator = translator
+        self.cache = cache
+        self.phrases = phrases
+        self.target_languages = [code for code in target_languages if code != source_language]
+        self.source_language = source_language
+        self.translated = 0
+        self.error = None
+        self.seconds = None
+        self._done = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def start(self):
+        """Start warming up once; later calls do nothing"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self.run, name="cache-warmup", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def run(self):
+        started = time.time()
+        try:
+            if self.translator.router:
+                for target_language in self.target_languages:
+                    self._warm(target_language)
+        except Exception as e:
+            self.error = f"Translation error: {str(e)}"
+        finally:
+            self.seconds = round(time.time() - started, 3)
+            self._done.set()
+
+    def _warm(self, target_language: str):
+        missing = [
+            phrase for phrase in dict.fromkeys(self.phrases)
+            if self.cache.get((phrase, self.source_language, target_language)) is None
+        ]
+        for pack in pack_texts(missing):
+            started = self.cache.start()
+            translations = translate_batch_with_retry(
+                self.translator, pack, target_language, self.source_language
+            )
+            for phrase, translation in zip(pack, translations):
+                self.cache.put((phrase, self.source_language, target_language), translation, started)
+            self.translated += len(pack)
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "phrases": len(self.phrases),
+            "target_languages": self.target_languages,
+            "translated": self.translated,
+            "seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+def warmup_from_env(translator, cache) -> CacheWarmup:
+    """Warm-up configured by TRANSLATION_WARMUP_PHRASES, _SOURCE and _TARGETS"""
+    return CacheWarmup(
+        translator,
+        cache,
+        load_phrases(os.getenv("TRANSLATION_WARMUP_PHRASES")),
+        parse_languages(os.getenv("TRANSLATION_WARMUP_TARGETS"), DEFAULT_WARMUP_TARGETS),
+        source_language=os.getenv("TRANSLATION_WARMUP_SOURCE", "en"),
+    )
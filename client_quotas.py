@@ -0,0 +1,278 @@
+"""
+API-key identification, per-client quotas and fair queuing for the Flask API.
+
+Callers identify themselves with an X-API-Key header (or a bearer token).
+Each client has a character-rate token bucket and a concurrency cap, and
+synchronous requests wait in per-client queues that are served by deficit
+round robin, so one client sending large texts cannot starve the rest.
+Admission (rate and queue-length checks) is O(1) per request.
+
+Keys are configured with TRANSLATION_API_KEYS ("key=name,key2=name2") or a
+JSON file named by TRANSLATION_API_KEYS_FILE:
+
+    {"key": {"name": "acme", "max_concurrency": 8, "chars_per_minute": 200000}}
+
+Without keys the API stays open and each remote address is its own client.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class QuotaExceeded(Exception):
+    """A request was refused by a client quota; retry_after is in seconds"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ClientQuota:
+    def __init__(self, name: str, max_concurrency: int = 4, chars_per_minute: int = 50000,
+                 max_queued: Optional[int] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.chars_per_minute = chars_per_minute
+        self.max_queued = max_queued if max_queued is not None else max_concurrency * 4
+
+
+class TokenBucket:
+    """Character budget refilled continuously at chars_per_minute"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Charge cost if the bucket allows it; returns 0, or seconds until it would.
+
+        A request larger than the whole bucket is admitted once the bucket is
+        full and leaves it in debt, so big requests are slowed, not refused.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        needed = min(cost, self.capacity)
+        if self.tokens < needed:
+            return (needed - self.tokens) / self.refill_per_second
+        self.tokens -= cost
+        return 0.0
+
+    def full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.refill_per_second >= self.capacity
+
+
+class _Client:
+    __slots__ = ("quota", "bucket", "queue", "running", "deficit", "active")
+
+    def __init__(self, quota: ClientQuota):
+        self.quota = quota
+        self.bucket = TokenBucket(quota.chars_per_minute, quota.chars_per_minute / 60.0)
+        self.queue = deque()
+        self.running = 0
+        self.deficit = 0
+        self.active = False
+
+    def idle(self, now: float) -> bool:
+        """Nothing queued or running and a full bucket: the same as a new client"""
+        return not self.queue and not self.running and not self.active and self.bucket.full(now)
+
+
+class _Ticket:
+    __slots__ = ("cost", "granted")
+
+    def __init__(self, cost: int):
+        self.cost = cost
+        self.granted = threading.Event()
+
+
+class FairQueue:
+    """Deficit round robin over per-client queues, in front of the translator.
+
+    Each turn a client with waiting requests gains quantum characters of
+    credit and runs requests while its credit covers them, then the next
+    client takes its turn. Over time every busy client gets the same share
+    of characters however large its requests are. At most limit requests
+    run at once, and a client never runs more than its max_concurrency.
+
+    Idle clients are forgotten every sweep_interval seconds, so one state
+    object per remote address does not accumulate for the process lifetime.
+    """
+
+    def __init__(self, limit: int = 16, quantum: int = 2000, default_quota: Optional[ClientQuota] = None,
+                 quotas: Optional[Dict[str, ClientQuota]] = None, require_key: bool = False,
+                 wait_timeout: float = 30.0, sweep_interval: float = 60.0):
+        self.limit = limit
+        self.quantum = quantum
+        self.default_quota = default_quota or ClientQuota("anonymous")
+        self.quotas = quotas or {}
+        self.require_key = require_key
+        self.wait_timeout = wait_timeout
+        self.sweep_interval = sweep_interval
+        self.in_flight = 0
+        self._clients: Dict[str, _Client] = {}
+        self._active = deque()
+        # Whether the client at the head of _active got its quantum this turn
+        self._head_credited = False
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def identify(self, api_key: Optional[str], remote_addr: Optional[str]) -> Optional[str]:
+        """Client ID for a request, or None if the API key is missing or unknown"""
+        if api_key:
+            return f"key:{api_key}" if api_key in self.quotas else None
+        if self.require_key:
+            return None
+        return f"addr:{remote_addr or 'unknown'}"
+
+    def _client(self, client_id: str) -> _Client:
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+        client = self._clients.get(client_id)
+        if client is None:
+            quota = self.quotas.get(client_id[len("key:"):]) if client_id.startswith("key:") else None
+            client = self._clients[client_id] = _Client(quota or self.default_quota)
+        return client
+
+    def _sweep(self, now: float):
+        """Drop idle clients; caller holds the lock"""
+        self._last_sweep = now
+        for client_id in [client_id for client_id, client in self._clients.items() if client.idle(now)]:
+            del self._clients[client_id]
+
+    @staticmethod
+    def _take(client: _Client, cost: int):
+        retry_after = client.bucket.take(cost)
+        if retry_after:
+            raise QuotaExceeded(
+                f"Character quota exceeded for {client.quota.name}: "
+                f"{client.quota.chars_per_minute} characters per minute",
+                retry_after
+            )
+
+    def charge(self, client_id: str, cost: int):
+        """Charge characters against the client's rate without taking a slot"""
+        with self._lock:
+            self._take(self._client(client_id), cost)
+
+    @contextmanager
+    def slot(self, client_id: str, cost: int, timeout: Optional[float] = None):
+        """Charge the client's rate, then wait for a fair turn to run, at most timeout seconds"""
+        ticket = _Ticket(max(1, cost))
+        with self._lock:
+            client = self._client(client_id)
+            if len(client.queue) >= client.quota.max_queued:
+                raise QuotaExceeded(f"Too many queued requests for {client.quota.name}")
+            self._take(client, cost)
+            client.queue.append(ticket)
+            if not client.active:
+                client.active = True
+                client.deficit = 0
+                self._active.append(client)
+            self._dispatch()
+
+        wait = self.wait_timeout if timeout is None else max(0.0, min(timeout, self.wait_timeout))
+        if not ticket.granted.wait(wait):
+            with self._lock:
+                if ticket in client.queue:
+                    client.queue.remove(ticket)
+                    raise QuotaExceeded("Timed out waiting for a translation slot", 1.0)
+            # Granted between the timeout and taking the lock
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                client.running -= 1
+                self.in_flight -= 1
+                self._dispatch()
+
+    def _dispatch(self):
+        """Grant waiting tickets in DRR order while slots are free; caller holds the lock"""
+        blocked = 0
+        while self.in_flight < self.limit and self._active and blocked < len(self._active):
+            client = self._active[0]
+            if not client.queue:
+                client.active = False
+                client.deficit = 0
+                self._active.popleft()
+                self._head_credited = False
+                continue
+            if client.running >= client.quota.max_concurrency:
+                # Skip this turn; the client keeps its credit
+                blocked += 1
+                self._next_client()
+                continue
+            if not self._head_credited:
+                client.deficit += self.quantum
+                self._head_credited = True
+            head = client.queue[0]
+            if client.deficit < head.cost:
+                blocked = 0
+                self._next_client()
+                continue
+            client.deficit -= head.cost
+            client.queue.popleft()
+            client.running += 1
+            self.in_flight += 1
+            head.granted.set()
+            blocked = 0
+
+    def _next_client(self):
+        self._active.rotate(-1)
+        self._head_credited = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "clients": len(self._clients),
+                "waiting": sum(len(client.queue) for client in self._active),
+            }
+
+
+def _load_quotas(default: ClientQuota) -> Dict[str, ClientQuota]:
+    quotas = {}
+    for entry in os.getenv("TRANSLATION_API_KEYS", "").split(","):
+        key, _, name = entry.strip().partition("=")
+        if key:
+            quotas[key] = ClientQuota(name or key[:6], default.max_concurrency, default.chars_per_minute)
+    path = os.getenv("TRANSLATION_API_KEYS_FILE")
+    if path:
+        with open(path, 'r') as f:
+            for key, settings in json.load(f).items():
+                quotas[key] = ClientQuota(
+                    settings.get("name", key[:6]),
+                    settings.get("max_concurrency", default.max_concurrency),
+                    settings.get("chars_per_minute", default.chars_per_minute),
+                    settings.get("max_queued")
+                )
+    return quotas
+
+
+def fair_queue_from_env() -> FairQueue:
+    """FairQueue configured by TRANSLATION_API_KEYS[_FILE] and the API_* quota variables"""
+    default = ClientQuota(
+        "anonymous",
+        max_concurrency=int(os.getenv("API_CLIENT_MAX_CONCURRENCY", "4")),
+        chars_per_minute=int(os.getenv("API_CLIENT_CHARS_PER_MINUTE", "50000"))
+    )
+    return FairQueue(
+        limit=int(os.getenv("API_MAX_CONCURRENCY", "16")),
+        default_quota=default,
+        quotas=_load_quotas(default),
+        require_key=os.getenv("TRANSLATION_REQUIRE_API_KEY", "false").lower() == "true"
+    )
+
+
+def retry_after_header(error: QuotaExceeded) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
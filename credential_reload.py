@@ -0,0 +1,184 @@
+"""
+Hot reload of OCI credentials.
+
+Rotating an API key should not need a restart. CredentialReloader builds
+new AI Language clients (and with them the request signers) on a
+background thread, then swaps them into the router's OCI backends in one
+step. Calls already running finish on the old client, and new calls use the
+new one. Until the new clients are ready, requests keep going to the old
+ones, so a rotation costs no cold start.
+
+The Flask app polls the mtimes of its credential files (OCI_CONFIG_FILE,
+the key_file it names, and OCI_PRIVATE_KEY_PATH) with CredentialWatcher.
+The Streamlit apps re-read secrets.toml and private_key_path on every
+rerun and pass the result to the reloader.
+"""
+import configparser
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from translation_backends import BackendRouter
+
+
+def read_key_file(path: str) -> str:
+    with open(os.path.expanduser(path), 'r') as f:
+        return f.read()
+
+
+def read_oci_config(path: str, profile: str = "DEFAULT") -> Dict:
+    """Credentials from an OCI CLI config file; key_file is read into key_content"""
+    parser = configparser.ConfigParser()
+    with open(os.path.expanduser(path), 'r') as f:
+        parser.read_file(f)
+    if profile != "DEFAULT" and not parser.has_section(profile):
+        raise ValueError(f"Profile {profile} not found in {path}")
+    section = parser[profile]
+    # A file caught half-written during a rotation must not be mixed with other sources
+    missing = [key for key in ("user", "fingerprint", "tenancy", "region", "key_file") if not section.get(key)]
+    if missing:
+        raise ValueError(f"Missing fields in {path}: {missing}")
+    config = {key: section[key] for key in ("user", "fingerprint", "tenancy", "region")}
+    config["key_content"] = read_key_file(section["key_file"])
+    return config
+
+
+def oci_config_key_file(path: str, profile: str = "DEFAULT") -> Optional[str]:
+    """The key_file named by an OCI CLI config file, so it can be watched too"""
+    parser = configparser.ConfigParser()
+    try:
+        with open(os.path.expanduser(path), 'r') as f:
+            parser.read_file(f)
+        key_file = parser[profile].get("key_file")
+    except (OSError, KeyError, configparser.Error):
+        return None
+    return os.path.expanduser(key_file) if key_file else None
+
+
+class CredentialReloader:
+    """Swaps new credentials into a router's OCI backends once their clients are built"""
+
+    def __init__(self, router: BackendRouter):
+        self.router = router
+        self.backends = [backend for backend in router.backends if hasattr(backend, "use_credentials")]
+        self.config = self.backends[0].config if self.backends else None
+        self.reloads = 0
+        self.reloaded_at = None
+        self.error = None
+        self._pending = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def update(self, config: Dict) -> bool:
+        """Start switching to config if it differs from the current credentials; does not block"""
+        if not self.backends or not config or not all(config.values()):
+            return False
+        with self._lock:
+            if config == self.config or config == self._pending:
+                return False
+            self._pending = config
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(
+            target=self._rebuild, args=(config, generation), name="credential-reload", daemon=True
+        ).start()
+        return True
+
+    def _rebuild(self, config: Dict, generation: int):
+        try:
+            clients = [backend.build_client(config) for backend in self.backends]
+        except Exception as e:
+            # Keep the working clients; the next change to the files retries
+            with self._lock:
+                if generation == self._generation:
+                    self._pending = None
+                    self.error = f"Credential reload error: {str(e)}"
+            return
+        with self._lock:
+            # A newer update superseded this one while its clients were being built
+            if generation != self._generation:
+                return
+            for backend, client in zip(self.backends, clients):
+                backend.use_credentials(config, client)
+            self.config = config
+            self._pending = None
+            self.reloads += 1
+            self.reloaded_at = time.time()
+            self.error = None
+
+    def stats(self) -> Dict:
+        return {
+            "reloads": self.reloads,
+            "reloaded_at": self.reloaded_at,
+            "pending": self._pending is not None,
+            "error": self.error,
+        }
+
+
+class CredentialWatcher:
+    """Polls credential files' mtimes and hands changed configuration to a reloader.
+
+    paths is called on every poll, since a config file can point at a
+    different key file after a rotation.
+    """
+
+    def __init__(self, load_config: Callable[[], Dict], paths: Callable[[], Iterable[str]],
+                 reloader: CredentialReloader, interval: float = 5.0):
+        self.load_config = load_config
+        self.paths = paths
+        self.reloader = reloader
+        self.interval = interval
+        self._mtimes = self._stat()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Dict[str, Optional[int]]:
+        mtimes = {}
+        for path in self.paths():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def start(self):
+        """Start polling once; later calls do nothing"""
+        with self._lock:
+            if self._started or not self.reloader.backends:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name="credential-watcher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self) -> bool:
+        """Reload if any credential file changed since the last check"""
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return False
+        self._mtimes = mtimes
+        try:
+            config = self.load_config()
+        except Exception as e:
+            self.reloader.error = f"Credential reload error: {str(e)}"
+            return False
+        return self.reloader.update(config)
+
+
+def credential_paths_from_env() -> List[str]:
+    """Files the Flask app reads credentials from: OCI_CONFIG_FILE, its key_file, OCI_PRIVATE_KEY_PATH"""
+    paths = []
+    config_file = os.getenv("OCI_CONFIG_FILE")
+    if config_file:
+        paths.append(os.path.expanduser(config_file))
+        key_file = oci_config_key_file(config_file, os.getenv("OCI_CONFIG_PROFILE", "DEFAULT"))
+        if key_file:
+            paths.append(key_file)
+    key_path = os.getenv("OCI_PRIVATE_KEY_PATH")
+    if key_path:
+        paths.append(os.path.expanduser(key_path))
+    return paths
@@ -0,0 +1,68 @@
+"""
+Per-request deadlines for backend work.
+
+A request handler sets a deadline with request_deadline(); everything it
+calls on the same thread (or in a copied context) can ask how much budget is
+left. The router waits for a scheduler slot and for the backend call only
+that long, and skips a call entirely once less than MIN_BUDGET remains.
+The client would have given up by then anyway.
+"""
+import contextvars
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Below this many seconds a backend call cannot complete, so it is not started
+MIN_BUDGET = float(os.getenv("TRANSLATION_MIN_BUDGET", "0.05"))
+
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("TRANSLATION_REQUEST_TIMEOUT", "10"))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before its work was done"""
+
+    def __init__(self, message: str = "Deadline exceeded"):
+        super().__init__(message)
+
+
+@contextmanager
+def request_deadline(timeout: Optional[float]):
+    """Run the block with a deadline timeout seconds from now; a nested deadline never extends an outer one"""
+    if timeout is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check(what: str = "request"):
+    """Raise DeadlineExceeded if too little budget is left to start more work"""
+    budget = remaining()
+    if budget is not None and budget < MIN_BUDGET:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def parse_timeout(header: Optional[str], default: float = DEFAULT_REQUEST_TIMEOUT) -> float:
+    """Timeout from a client's X-Request-Timeout header (seconds), capped at the configured default"""
+    try:
+        requested = float(header) if header else default
+    except ValueError:
+        return default
+    if not math.isfinite(requested):
+        return default
+    return min(max(requested, 0.0), default)
@@ -0,0 +1,395 @@
+"""
+Consistent-hash sharded translation cache shared by several app hosts.
+
+Cache nodes are small TCP servers that hold an LRU of translations. Each
+app host runs a consistent-hash ring over the nodes. Every key has an owner
+on the ring and is also written to the next replicas - 1 nodes, so each
+host's cache covers its share of the whole cluster, not a private copy of
+the same hot set. The app's SentenceCache stays in front as a near cache.
+It consults the ring only on a local miss, and writes through to it.
+Adding or removing a node only moves the keys on that node's arcs of the ring.
+
+Wire format, big-endian:
+    request:  op (1 byte), key length (4), value length (4), key, value
+    response: status (1 byte), value length (4), value
+Keys are encoded as in cache snapshots ("src\\0tgt\\0text", UTF-8). Values
+are the time the translation was written (8-byte double, Unix time) followed
+by the UTF-8 translation, so TTLs count from the original write on every host;
+nodes store them as opaque bytes.
+
+With a shared secret (TRANSLATION_CACHE_SECRET), PUT values start with an
+HMAC-SHA256 of the key and the rest of the value. Nodes refuse PUTs without
+a valid one, and hosts check it again on every GET, so only hosts holding
+the secret can place translations in the cache. Reads are not
+authenticated, and the traffic is not encrypted, so keep nodes on a private
+network all the same. Nodes listen on 127.0.0.1 unless --host says otherwise.
+
+Network errors count as misses. A node that fails is skipped for
+retry_after seconds, so a dead node costs one timeout, not one per request.
+
+Usage:
+    python distributed_cache.py serve --port 7070 --max-entries 200000
+    TRANSLATION_CACHE_SECRET=... python distributed_cache.py serve --host 10.0.0.5
+    python distributed_cache.py stats 10.0.0.5:7070
+"""
+import argparse
+import bisect
+import hashlib
+import hmac
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache_snapshot import CacheKey, encode_key
+
+OP_GET = 1
+OP_PUT = 2
+OP_STATS = 3
+
+STATUS_HIT = 0
+STATUS_MISS = 1
+STATUS_STORED = 2
+STATUS_ERROR = 3
+
+_REQUEST = struct.Struct("!BII")
+_RESPONSE = struct.Struct("!BI")
+_WRITTEN_AT = struct.Struct("!d")
+_KEY_LENGTH = struct.Struct("!I")
+_TAG_BYTES = hashlib.sha256().digest_size
+
+# Larger frames are refused so a bad client cannot make a node allocate without bound
+MAX_FRAME_BYTES = 1 << 20
+
+DEFAULT_PORT = 7070
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def _sign(secret: bytes, key: bytes, value: bytes) -> bytes:
+    """HMAC of a key and value; the key's length is included so the two cannot be re-split"""
+    return hmac.new(secret, _KEY_LENGTH.pack(len(key)) + key + value, hashlib.sha256).digest()
+
+
+def _verify(secret: bytes, key: bytes, signed: bytes) -> Optional[bytes]:
+    """The value inside a signed value, or None if its tag does not match"""
+    tag, value = signed[:_TAG_BYTES], signed[_TAG_BYTES:]
+    if len(tag) != _TAG_BYTES or not hmac.compare_digest(tag, _sign(secret, key, value)):
+        return None
+    return value
+
+
+def secret_from_env() -> Optional[bytes]:
+    secret = os.getenv("TRANSLATION_CACHE_SECRET")
+    return secret.encode("utf-8") if secret else None
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes, so keys spread evenly and move little on resize"""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.nodes = list(dict.fromkeys(nodes))
+        points = sorted(
+            (_hash(f"{node}#{i}".encode("utf-8")), node)
+            for node in self.nodes
+            for i in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def nodes_for(self, key: bytes, count: int = 1) -> List[str]:
+        """The key's owner followed by the next distinct nodes clockwise"""
+        if not self._hashes:
+            return []
+        count = min(count, len(self.nodes))
+        start = bisect.bisect(self._hashes, _hash(key))
+        found = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in found:
+                found.append(node)
+                if len(found) == count:
+                    break
+        return found
+
+
+class _NodeStore:
+    """The LRU held by one cache node; keys and values stay encoded"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: bytes):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> bytes:
+        with self._lock:
+            return f"entries={len(self._entries)} hits={self.hits} misses={self.misses}".encode("utf-8")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        store = self.server.store
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Connections are persistent: serve frames until the client hangs up
+        while True:
+            try:
+                op, key_length, value_length = _REQUEST.unpack(_recv_exact(sock, _REQUEST.size))
+                if key_length + value_length > MAX_FRAME_BYTES:
+                    sock.sendall(_RESPONSE.pack(STATUS_ERROR, 0))
+                    return
+                key = _recv_exact(sock, key_length)
+                value = _recv_exact(sock, value_length)
+            except (ConnectionError, OSError):
+                return
+
+            if op == OP_GET:
+                found = store.get(key)
+                response = _RESPONSE.pack(STATUS_MISS, 0) if found is None else (
+                    _RESPONSE.pack(STATUS_HIT, len(found)) + found
+                )
+            elif op == OP_PUT:
+                if self.server.secret is not None and _verify(self.server.secret, key, value) is None:
+                    response = _RESPONSE.pack(STATUS_ERROR, 0)
+                else:
+                    store.put(key, value)
+                    response = _RESPONSE.pack(STATUS_STORED, 0)
+            elif op == OP_STATS:
+                stats = store.stats()
+                response = _RESPONSE.pack(STATUS_HIT, len(stats)) + stats
+            else:
+                response = _RESPONSE.pack(STATUS_ERROR, 0)
+            try:
+                sock.sendall(response)
+            except OSError:
+                return
+
+
+class CacheNodeServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, max_entries: int = 100000, secret: Optional[bytes] = None):
+        self.store = _NodeStore(max_entries)
+        self.secret = secret
+        super().__init__(address, _Handler)
+
+    def start(self) -> threading.Thread:
+        """Serve on a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name="cache-node", daemon=True)
+        thread.start()
+        return thread
+
+
+def parse_address(value: str, default_port: int = DEFAULT_PORT):
+    host, _, port = value.strip().rpartition(":")
+    if not host:
+        return value.strip(), default_port
+    return host, int(port)
+
+
+class CacheNodeClient:
+    """Persistent connection (one per thread) to one cache node"""
+
+    def __init__(self, address: str, timeout: float = 0.05, retry_after: float = 5.0):
+        self.address = address
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.errors = 0
+        self._down_until = 0.0
+        self._local = threading.local()
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.create_connection(parse_address(self.address), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.sock = sock
+        return sock
+
+    def request(self, op: int, key: bytes, value: bytes = b"") -> Optional[bytes]:
+        """Send one frame; returns the response value, or None on a miss or error"""
+        if not self.available:
+            return None
+        if len(key) + len(value) > MAX_FRAME_BYTES:
+            # The node would refuse it and drop the connection; that is not the node failing
+            return None
+        try:
+            sock = self._socket()
+            sock.sendall(_REQUEST.pack(op, len(key), len(value)) + key + value)
+            status, length = _RESPONSE.unpack(_recv_exact(sock, _RESPONSE.size))
+            data = _recv_exact(sock, length)
+        except (OSError, ConnectionError, struct.error):
+            self.close()
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+        return data if status in (STATUS_HIT, STATUS_STORED) else None
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+class DistributedCache:
+    """Remote cache tier for SentenceCache: reads try each replica, writes go to all.
+
+    With a secret, writes are signed and entries without a valid signature
+    are treated as misses.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 1, timeout: float = 0.05,
+                 retry_after: float = 5.0, vnodes: int = 64, secret: Optional[bytes] = None):
+        self.ring = HashRing(nodes, vnodes)
+        self.replicas = max(1, min(replicas, 2))
+        self.clients = {node: CacheNodeClient(node, timeout, retry_after) for node in self.ring.nodes}
+        self.secret = secret
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: CacheKey) -> Optional[Tuple[str, float]]:
+        """Translation for key and when it was written, or None"""
+        encoded = encode_key(key)
+        for node in self.ring.nodes_for(encoded, self.replicas):
+            value = self.clients[node].request(OP_GET, encoded)
+            if value is not None and self.secret is not None:
+                value = _verify(self.secret, encoded, value)
+            if value is not None and len(value) >= _WRITTEN_AT.size:
+                with self._lock:
+                    self.hits += 1
+                return value[_WRITTEN_AT.size:].decode("utf-8"), _WRITTEN_AT.unpack_from(value)[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def put(self, key: CacheKey, value: str, written_at: Optional[float] = None):
+        encoded = encode_key(key)
+        data = _WRITTEN_AT.pack(time.time() if written_at is None else written_at) + value.encode("utf-8")
+        if self.secret is not None:
+            data = _sign(self.secret, encoded, data) + data
+        for node in self.ring.nodes_for(encoded, self.replicas):
+            self.clients[node].request(OP_PUT, encoded, data)
+
+    def stats(self) -> Dict:
+        return {
+            "replicas": self.replicas,
+            "hits": self.hits,
+            "misses": self.misses,
+            "nodes": [
+                {"address": node, "available": client.available, "errors": client.errors}
+                for node, client in self.clients.items()
+            ],
+        }
+
+
+def distributed_cache_from_env() -> Optional[DistributedCache]:
+    """Remote tier over TRANSLATION_CACHE_NODES ("host:port,..."), or None when unset.
+
+    TRANSLATION_CACHE_LISTEN ("host:port") also runs a node in this process.
+    TRANSLATION_CACHE_SECRET signs writes, and the in-process node requires it.
+    """
+    secret = secret_from_env()
+    listen = os.getenv("TRANSLATION_CACHE_LISTEN")
+    if listen:
+        CacheNodeServer(
+            parse_address(listen),
+            max_entries=int(os.getenv("TRANSLATION_CACHE_NODE_SIZE", "100000")),
+            secret=secret
+        ).start()
+    nodes = [node.strip() for node in os.getenv("TRANSLATION_CACHE_NODES", "").split(",") if node.strip()]
+    if not nodes:
+        return None
+    return DistributedCache(
+        nodes,
+        replicas=int(os.getenv("TRANSLATION_CACHE_REPLICAS", "1")),
+        timeout=float(os.getenv("TRANSLATION_CACHE_TIMEOUT", "0.05")),
+        secret=secret
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or inspect distributed translation cache nodes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run a cache node")
+    serve.add_argument("--host", default="127.0.0.1",
+                       help="Address to listen on; other hosts can only reach the node if this is set")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--max-entries", type=int, default=100000)
+    stats = commands.add_parser("stats", help="Show a node's entry count and hit rate")
+    stats.add_argument("address")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        secret = secret_from_env()
+        server = CacheNodeServer((args.host, args.port), args.max_entries, secret=secret)
+        print(f"Cache node listening on {args.host}:{args.port}")
+        if secret is None:
+            print("TRANSLATION_CACHE_SECRET is not set: any client that can reach this node can write to it",
+                  file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    client = CacheNodeClient(args.address, timeout=2.0)
+    result = client.request(OP_STATS, b"")
+    if result is None:
+        print(f"Could not reach {args.address}", file=sys.stderr)
+        return 1
+    print(result.decode("utf-8"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
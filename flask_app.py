@@ -1,113 +1,248 @@
-from flask import Flask, render_template, request, jsonify
-import oci
+from flask import Flask, render_template, request, jsonify, Response, g, send_file, stream_with_context
+import functools
+import hashlib
+import hmac
 import os
-from typing import Dict
+import time
+from typing import Dict, List, Optional
 import json
+import tempfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from batch_translation import DETECTION_TEXT_CHARACTERS
+from oci_translator import OCITranslator
+from live_translation import LiveSessionRegistry, SentenceCache
+from cache_snapshot import DEFAULT_SNAPSHOT_PATH, cache_entries, open_snapshot, write_snapshot
+from cache_warmup import warmup_from_env
+from distributed_cache import distributed_cache_from_env
+from client_quotas import QuotaExceeded, fair_queue_from_env, retry_after_header
+import deadlines
+from deadlines import DeadlineExceeded, parse_timeout, request_deadline
+from json_codec import FastJSONProvider
+from credential_reload import CredentialReloader, CredentialWatcher, credential_paths_from_env
+from memory_diagnostics import deep_sizeof, diagnostics_from_env
+from traffic_log import CACHE_HIT, CACHE_MISS, CACHE_NONE, recorder_from_env
+from translation_jobs import JobQueue, JOB_DONE, JOB_FAILED
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+# Opt-in; started before the caches are built so their allocations are traced
+memory_diagnostics = diagnostics_from_env()
+# Opt-in sampled traffic log for offline replay (see traffic_log.py)
+traffic_recorder = recorder_from_env()
 
-class OCITranslator:
-    """Oracle Cloud Infrastructure Language Translation Service wrapper"""
-    
-    def __init__(self):
-        self.config = self._load_config()
-        self.client = None
-        self._initialize_client()
-    
-    def _load_config(self) -> Dict:
-        """Load OCI configuration from environment variables"""
-        return {
-            "user": os.getenv("OCI_USER"),
-            "key_content": os.getenv("OCI_KEY_CONTENT"),
-            "fingerprint": os.getenv("OCI_FINGERPRINT"),
-            "tenancy": os.getenv("OCI_TENANCY"),
-            "region": os.getenv("OCI_REGION", "us-ashburn-1"),
-            "compartment_id": os.getenv("OCI_COMPARTMENT_ID")
-        }
-    
-    def _initialize_client(self):
-        """Initialize OCI AI Language client"""
-        try:
-            if all(self.config.values()):
-                oci_config = {
-                    "user": self.config["user"],
-                    "key_content": self.config["key_content"],
-                    "fingerprint": self.config["fingerprint"],
-                    "tenancy": self.config["tenancy"],
-                    "region": self.config["region"]
-                }
-                self.client = oci.ai_language.AIServiceLanguageClient(oci_config)
-            else:
-                print("Warning: OCI configuration not complete")
-        except Exception as e:
-            print(f"Failed to initialize OCI client: {str(e)}")
-    
-    def translate_text(self, text: str, target_language: str, source_language: str = "auto") -> str:
-        """Translate text using OCI Language Translation service"""
-        if not self.client:
-            return "OCI client not initialized. Please check your configuration."
-        
-        try:
-            # Auto-detect source language if needed
-            if source_language == "auto":
-                detected_lang = self.detect_language(text)
-                if detected_lang != "unknown":
-                    source_language = detected_lang
-                else:
-                    source_language = "en"  # Default to English
-            
-            # Create TextDocument with proper structure
-            text_doc = oci.ai_language.models.TextDocument(
-                key="user_input",
-                text=text,
-                language_code=source_language
-            )
-            
-            # Create translation request
-            translation_details = oci.ai_language.models.BatchLanguageTranslationDetails(
-                compartment_id=self.config["compartment_id"],
-                target_language_code=target_language,
-                documents=[text_doc]
-            )
-            
-            response = self.client.batch_language_translation(translation_details)
-            
-            if response.data and response.data.documents:
-                return response.data.documents[0].translated_text
-            else:
-                return "No translation received from OCI service."
-                
-        except Exception as e:
-            return f"Translation error: {str(e)}"
-    
-    def detect_language(self, text: str) -> str:
-        """Detect the language of input text"""
-        if not self.client:
-            return "unknown"
-        
-        try:
-            detection_details = oci.ai_language.models.BatchDetectLanguageDetails(
-                compartment_id=self.config["compartment_id"],
-                documents=[{
-                    "key": "user_input",
-                    "text": text
-                }]
-            )
-            
-            response = self.client.batch_detect_language(detection_details)
-            
-            if response.data and response.data.documents:
-                languages = response.data.documents[0].languages
-                if languages:
-                    return languages[0].code
-            return "unknown"
-            
-        except Exception as e:
-            print(f"Language detection error: {str(e)}")
-            return "unknown"
+def _record_backend_call(route: str, texts: List[str], source_language: str, target_language: str, started: float):
+    if traffic_recorder and traffic_recorder.sampled():
+        traffic_recorder.record(route, texts, source_language, target_language, time.perf_counter() - started)
 
 # Initialize translator
-translator = OCITranslator()
+translator = OCITranslator(on_backend_call=_record_backend_call)
+# Shared by /translate and live sessions; a snapshot from a previous instance backs it
+translation_cache = SentenceCache(
+    max_entries=int(os.getenv("TRANSLATION_CACHE_SIZE", "10000")),
+    snapshot=open_snapshot(DEFAULT_SNAPSHOT_PATH),
+    # Entries older than the soft TTL are refreshed in the background and served while that runs
+    soft_ttl=float(os.getenv("TRANSLATION_CACHE_SOFT_TTL", "86400")),
+    hard_ttl=float(os.getenv("TRANSLATION_CACHE_HARD_TTL", "604800")),
+    revalidate_wait=float(os.getenv("TRANSLATION_CACHE_REVALIDATE_WAIT", "0.1")),
+    # Optional cache shared with the other hosts; this instance's LRU is its near cache
+    remote=distributed_cache_from_env(),
+    # Translations made before the glossary last changed are not served
+    glossary=translator.router.glossary if translator.router else None
+)
+warmup = warmup_from_env(translator, translation_cache)
+# Rotated keys are picked up from the credential files without a restart
+credential_reloader = CredentialReloader(translator.router) if translator.router else None
+credential_watcher = CredentialWatcher(
+    translator._load_config,
+    credential_paths_from_env,
+    credential_reloader,
+    interval=float(os.getenv("OCI_CREDENTIAL_POLL_SECONDS", "5"))
+) if credential_reloader else None
+live_sessions = LiveSessionRegistry(translator, cache=translation_cache)
+job_queue = JobQueue(translator, workers=int(os.getenv("TRANSLATION_JOB_WORKERS", "2")))
+
+fair_queue = fair_queue_from_env()
+
+if memory_diagnostics:
+    memory_diagnostics.register('translation_cache', lambda: {
+        'entries': len(translation_cache),
+        'bytes': deep_sizeof(translation_cache.items()),
+        'snapshot_entries': len(translation_cache.snapshot) if translation_cache.snapshot else 0
+    })
+    memory_diagnostics.register('live_sessions', lambda: {
+        'sessions': len(live_sessions),
+        'text_bytes': sum(deep_sizeof(session.text) for session in live_sessions.sessions()),
+        'buffered_events': sum(session.buffered_events() for session in live_sessions.sessions())
+    })
+    memory_diagnostics.register('jobs', lambda: {'queued': job_queue.queued()})
+    memory_diagnostics.register('requests', lambda: {
+        'api_in_flight': fair_queue.stats()['in_flight'],
+        'api_waiting': fair_queue.stats()['waiting'],
+        'backend_in_flight': translator.router.scheduler.in_flight() if translator.router else 0
+    })
+
+MAX_JOB_PAGE_SIZE = 1000
+MAX_DETECTION_TEXTS = int(os.getenv("MAX_DETECTION_TEXTS", "10000"))
+# Larger bodies are refused from their Content-Length, before any of the body is read
+MAX_CONTENT_LENGTH = int(os.getenv("TRANSLATION_MAX_CONTENT_LENGTH", str(1024 * 1024)))
+MAX_JOB_CONTENT_LENGTH = int(os.getenv("TRANSLATION_MAX_JOB_CONTENT_LENGTH", str(32 * 1024 * 1024)))
+# Bodies without a Content-Length are cut off at the larger limit while Werkzeug reads them
+app.config['MAX_CONTENT_LENGTH'] = max(MAX_CONTENT_LENGTH, MAX_JOB_CONTENT_LENGTH)
+# Clients can override this per request with include_original_text
+ECHO_ORIGINAL_TEXT = os.getenv("TRANSLATION_ECHO_ORIGINAL_TEXT", "true").lower() in ("1", "true", "yes")
+# Operator endpoints expose cached text and internals; without a key they are refused
+ADMIN_KEY = os.getenv("TRANSLATION_ADMIN_KEY")
+
+def _client_id():
+    """Caller identity from X-API-Key or a bearer token, falling back to the remote address"""
+    api_key = request.headers.get('X-API-Key')
+    authorization = request.headers.get('Authorization', '')
+    if not api_key and authorization.startswith('Bearer '):
+        api_key = authorization[len('Bearer '):].strip()
+    return fair_queue.identify(api_key, request.remote_addr)
+
+def _owner(client_id: str) -> str:
+    """Stored with jobs and live sessions in place of the client ID, which can contain an API key"""
+    return hashlib.sha256(client_id.encode('utf-8')).hexdigest()
+
+def _owned_by(owner: Optional[str], client_id: str) -> bool:
+    return owner is not None and hmac.compare_digest(owner, _owner(client_id))
+
+def job_owner_required(view):
+    """Pass the job to a view if the caller created it; other clients' jobs are reported as unknown"""
+    @functools.wraps(view)
+    def wrapped(job_id):
+        client_id = _client_id()
+        if client_id is None:
+            return jsonify({'error': 'Missing or invalid API key'}), 401
+        job = job_queue.status(job_id)
+        if job is None or not _owned_by(job.pop('owner'), client_id):
+            return jsonify({'error': 'Unknown job'}), 404
+        return view(job)
+    return wrapped
+
+def live_owner_required(view):
+    """Pass the live session to a view if the caller opened it; other clients' sessions are reported as unknown"""
+    @functools.wraps(view)
+    def wrapped(session_id):
+        client_id = _client_id()
+        if client_id is None:
+            return jsonify({'error': 'Missing or invalid API key'}), 401
+        session = live_sessions.get(session_id)
+        if session is None or not _owned_by(session.owner, client_id):
+            return jsonify({'error': 'Unknown live session'}), 404
+        return view(session)
+    return wrapped
+
+def _text_cost(data: Dict) -> int:
+    text = data.get('text') or data.get('insert') or ''
+    return len(text) if isinstance(text, str) else 0
+
+def _texts_cost(data: Dict) -> int:
+    texts = data.get('texts')
+    if isinstance(texts, list):
+        return sum(len(t) for t in texts if isinstance(t, str))
+    return _text_cost(data)
+
+def client_quota(cost_of=_text_cost, queued: bool = True):
+    """Apply the caller's quotas to a view; queued views also wait for the caller's fair turn"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            client_id = _client_id()
+            if client_id is None:
+                return jsonify({'error': 'Missing or invalid API key'}), 401
+            cost = cost_of(request.get_json(silent=True) or {})
+            try:
+                if not queued:
+                    fair_queue.charge(client_id, cost)
+                    return view(*args, **kwargs)
+                with fair_queue.slot(client_id, cost, timeout=deadlines.remaining()):
+                    return view(*args, **kwargs)
+            except QuotaExceeded as e:
+                if (deadlines.remaining() or 0.0) < 0:
+                    raise DeadlineExceeded("Deadline exceeded waiting for a translation slot")
+                return jsonify({'error': str(e)}), 429, retry_after_header(e)
+        return wrapped
+    return decorator
+
+def admin_required(view):
+    """Serve a view only to callers sending TRANSLATION_ADMIN_KEY in X-Admin-Key"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if not ADMIN_KEY:
+            return jsonify({'error': 'Admin endpoints are disabled; set TRANSLATION_ADMIN_KEY'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Key', '').encode('utf-8'), ADMIN_KEY.encode('utf-8')):
+            return jsonify({'error': 'Missing or invalid admin key'}), 401
+        return view(*args, **kwargs)
+    return wrapped
+
+def _detection_cost(data: Dict) -> int:
+    # Only the start of each text is sent for detection
+    texts = data.get('texts')
+    if isinstance(texts, list):
+        return sum(min(len(t), DETECTION_TEXT_CHARACTERS) for t in texts if isinstance(t, str))
+    return 0
+
+def with_deadline(view):
+    """Run a view under a deadline from X-Request-Timeout, capped at TRANSLATION_REQUEST_TIMEOUT"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        with request_deadline(parse_timeout(request.headers.get('X-Request-Timeout'))):
+            return view(*args, **kwargs)
+    return wrapped
+
+def record_traffic(route: str):
+    """Write a sample of a route's requests to the traffic log; views set g.cache_outcome"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            if not traffic_recorder or not traffic_recorder.sampled():
+                return view(*args, **kwargs)
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = app.make_response(view(*args, **kwargs))
+                status = response.status_code
+                return response
+            except DeadlineExceeded:
+                status = 504
+                raise
+            finally:
+                data = request.get_json(silent=True) or {}
+                texts = data.get('texts') if isinstance(data.get('texts'), list) else [data.get('text') or '']
+                traffic_recorder.record(
+                    route,
+                    [t for t in texts if isinstance(t, str)],
+                    data.get('source_language'),
+                    data.get('target_language'),
+                    time.perf_counter() - started,
+                    status,
+                    g.get('cache_outcome', CACHE_NONE)
+                )
+        return wrapped
+    return decorator
+
+@app.errorhandler(DeadlineExceeded)
+def deadline_exceeded(error):
+    return jsonify({'error': str(error)}), 504
+
+@app.before_request
+def limit_content_length():
+    """Refuse an oversized body before it is buffered or parsed; batch jobs get a larger limit"""
+    limit = MAX_JOB_CONTENT_LENGTH if request.endpoint == 'submit_job' else MAX_CONTENT_LENGTH
+    if request.content_length is not None and request.content_length > limit:
+        return jsonify({'error': f'Request body over {limit} bytes'}), 413
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_entity_too_large(error):
+    return jsonify({'error': f"Request body over {app.config['MAX_CONTENT_LENGTH']} bytes"}), 413
+
+def _sse(event_type: str, data: Dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
 
 def get_supported_languages() -> Dict[str, str]:
     """Return supported language codes and names"""
@@ -141,6 +276,9 @@ def index():
     return render_template('index.html', languages=languages)
 
 @app.route('/translate', methods=['POST'])
+@record_traffic('/translate')
+@with_deadline
+@client_quota()
 def translate():
     """Translation API endpoint"""
     data = request.get_json()
@@ -154,21 +292,33 @@ def translate():
     
     # Detect language if auto-detect is selected
     detected_lang = None
+    effective_source = source_lang
     if source_lang == "auto":
         detected_lang = translator.detect_language(text)
+        effective_source = detected_lang if detected_lang != "unknown" else "en"
     
-    # Perform translation
-    translation = translator.translate_text(text, target_lang, source_lang)
+    # Perform translation, reusing cached and warmed-up translations
+    cache_key = (text.strip(), effective_source, target_lang)
+    translation, hit = translation_cache.fetch(
+        cache_key, lambda: translator.translate_text(text, target_lang, effective_source)
+    )
+    g.cache_outcome = CACHE_HIT if hit else CACHE_MISS
     
-    return jsonify({
-        'original_text': text,
+    result = {
         'translated_text': translation,
         'source_language': source_lang,
         'target_language': target_lang,
         'detected_language': detected_lang
-    })
+    }
+    # Echoing a large text back can cost more than the translation itself
+    if data.get('include_original_text', ECHO_ORIGINAL_TEXT):
+        result['original_text'] = text
+    return jsonify(result)
 
 @app.route('/detect_language', methods=['POST'])
+@record_traffic('/detect_language')
+@with_deadline
+@client_quota()
 def detect_language():
     """Language detection API endpoint"""
     data = request.get_json()
@@ -185,12 +335,302 @@ def detect_language():
         'language_name': languages.get(detected_lang, 'Unknown')
     })
 
+@app.route('/detect_language/batch', methods=['POST'])
+@record_traffic('/detect_language/batch')
+@with_deadline
+@client_quota(_detection_cost)
+def detect_language_batch():
+    """Batch language detection API endpoint; results are in request order"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'No texts provided'}), 400
+    if not all(isinstance(t, str) for t in texts):
+        return jsonify({'error': 'texts must be a list of strings'}), 400
+    if len(texts) > MAX_DETECTION_TEXTS:
+        return jsonify({'error': f'At most {MAX_DETECTION_TEXTS} texts per request'}), 400
+    if not translator.router:
+        return jsonify({'error': 'OCI client not initialized. Please check your configuration.'}), 503
+    
+    try:
+        detected = translator.detect_languages(texts)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Language detection error: {str(e)}'}), 502
+    languages = get_supported_languages()
+    
+    return jsonify({
+        'results': [
+            {
+                'detected_language': code,
+                'language_name': languages.get(code, 'Unknown'),
+                'score': score
+            }
+            for code, score in detected
+        ]
+    })
+
+@app.route('/live', methods=['POST'])
+@client_quota(queued=False)
+def live_open():
+    """Open a live translation session; events are streamed from /live/<id>/events"""
+    data = request.get_json(silent=True) or {}
+    session = live_sessions.create(
+        target_language=data.get('target_language', 'ja'),
+        source_language=data.get('source_language', 'auto'),
+        owner=_owner(_client_id())
+    )
+    if data.get('text'):
+        session.set_text(data['text'])
+
+    return jsonify({'session_id': session.session_id, 'version': session.version})
+
+@app.route('/live/<session_id>', methods=['POST'])
+@client_quota(queued=False)
+@live_owner_required
+def live_update(session):
+    """Send a text delta or full text to a live translation session"""
+    data = request.get_json(silent=True) or {}
+    if 'target_language' in data or 'source_language' in data:
+        session.set_languages(data.get('target_language'), data.get('source_language'))
+
+    if 'text' in data:
+        session.set_text(data['text'])
+    elif 'insert' in data or 'delete' in data:
+        applied = session.apply_delta(
+            base_version=data.get('base_version', -1),
+            offset=data.get('offset', 0),
+            delete=data.get('delete', 0),
+            insert=data.get('insert', '')
+        )
+        if not applied:
+            # Client must resend the full text
+            return jsonify({'error': 'Version mismatch', 'version': session.version}), 409
+
+    return jsonify({'version': session.version})
+
+@app.route('/live/<session_id>/events')
+@live_owner_required
+def live_events(session):
+    """Server-Sent Events stream of per-sentence translations"""
+    def generate():
+        yield 'retry: 2000\n\n'
+        while not session.closed:
+            event = session.next_event(timeout=15)
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield _sse(event['type'], event)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/live/<session_id>', methods=['DELETE'])
+@live_owner_required
+def live_close(session):
+    """Close a live translation session"""
+    live_sessions.close(session.session_id)
+    return jsonify({'closed': True})
+
+@app.route('/jobs', methods=['POST'])
+@client_quota(_texts_cost, queued=False)
+def submit_job():
+    """Submit a batch translation job; returns its ID immediately"""
+    data = request.get_json(silent=True) or {}
+
+    texts = data.get('texts')
+    if texts is None and 'text' in data:
+        texts = data['text'].split('\n')
+    if not isinstance(texts, list) or not any(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify({'error': 'No texts provided'}), 400
+    if not all(isinstance(t, str) for t in texts):
+        return jsonify({'error': 'texts must be a list of strings'}), 400
+
+    job_id = job_queue.submit(
+        texts,
+        target_language=data.get('target_language', 'ja'),
+        source_language=data.get('source_language', 'auto'),
+        owner=_owner(_client_id())
+    )
+    return jsonify({'job_id': job_id, 'status': job_queue.status(job_id)['status']}), 202
+
+@app.route('/jobs/tuning')
+def job_tuning():
+    """Current pack size and observed latency/throughput curve per language pair"""
+    tuner = job_queue.tuner
+    return jsonify({
+        'latency_slo_seconds': tuner.latency_slo,
+        'sizes': tuner.sizes,
+        'pairs': tuner.stats()
+    })
+
+@app.route('/jobs/<job_id>')
+@job_owner_required
+def job_status(job):
+    """Progress of a batch translation job"""
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/results')
+@job_owner_required
+def job_results(job):
+    """One page of job results, in input order"""
+    job_id = job['id']
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_JOB_PAGE_SIZE)
+    items = job_queue.results(job_id, offset, limit)
+    next_offset = items[-1]['position'] + 1 if len(items) == limit else None
+
+    return jsonify({'items': items, 'offset': offset, 'next_offset': next_offset})
+
+@app.route('/jobs/<job_id>/export')
+@job_owner_required
+def job_export(job):
+    """All job results as a streamed CSV or TSV download"""
+    job_id = job['id']
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'tsv'):
+        return jsonify({'error': 'format must be csv or tsv'}), 400
+
+    return Response(
+        stream_with_context(job_queue.export(job_id, ',' if export_format == 'csv' else '\t')),
+        mimetype='text/csv' if export_format == 'csv' else 'text/tab-separated-values',
+        headers={'Content-Disposition': f'attachment; filename=translations.{export_format}'}
+    )
+
+@app.route('/jobs/<job_id>/events')
+@job_owner_required
+def job_events(job):
+    """Server-Sent Events stream of job progress until it finishes"""
+    job_id = job['id']
+
+    def generate():
+        last_completed = None
+        while True:
+            job = job_queue.status(job_id)
+            job.pop('owner')
+            if job['completed'] != last_completed:
+                last_completed = job['completed']
+                yield _sse('progress', job)
+            if job['status'] in (JOB_DONE, JOB_FAILED):
+                yield _sse(job['status'], job)
+                return
+            time.sleep(1)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/cache/snapshot')
+@admin_required
+def cache_snapshot():
+    """Download the translation cache as a snapshot file for the next instance to load"""
+    output = tempfile.TemporaryFile()
+    write_snapshot(output, cache_entries(translation_cache))
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype='application/octet-stream',
+        as_attachment=True,
+        download_name='translation_cache.snap'
+    )
+
+@app.before_request
+def start_background_work():
+    # Started by the first request rather than at import, so the CLI and
+    # start-up benchmark do not trigger it
+    warmup.start()
+    if credential_watcher:
+        credential_watcher.start()
+
+@app.route('/ready')
+def ready():
+    """Readiness check: 503 until the cache warm-up has finished"""
+    return jsonify(warmup.status()), 200 if warmup.ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """Backend concurrency and latency in Prometheus text format"""
+    lines = []
+    
+    def metric(name, metric_type, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    
+    router = translator.router
+    if router:
+        scheduler = router.scheduler.stats()
+        metric("translation_concurrency_limit", "gauge", "Current concurrency limit toward the translation backend",
+               [({}, scheduler["limit"])])
+        metric("translation_requests_in_flight", "gauge", "Backend calls running, by priority class",
+               [({"priority": priority}, count) for priority, count in scheduler["running"].items()])
+        metric("translation_requests_waiting", "gauge", "Backend calls queued for a slot, by priority class",
+               [({"priority": priority}, count) for priority, count in scheduler["waiting"].items()])
+        if router.limiter:
+            limiter = router.limiter.stats()
+            metric("translation_throttled_total", "counter", "Backend calls rejected with throttling",
+                   [({}, limiter["throttled"])])
+            metric("translation_limit_decreases_total", "counter", "Multiplicative limit decreases, by cause",
+                   [({"reason": reason}, count) for reason, count in limiter["decreases"].items()])
+        backends = router.stats()
+        metric("translation_backend_latency_ms", "gauge", "Moving-average latency per backend",
+               [({"backend": b["name"]}, b["latency_ms"]) for b in backends if b["latency_ms"] is not None])
+        metric("translation_backend_error_rate", "gauge", "Moving-average error rate per backend",
+               [({"backend": b["name"]}, b["error_rate"]) for b in backends])
+    metric("translation_cache_entries", "gauge", "Entries in the translation cache", [({}, len(translation_cache))])
+    metric("translation_cache_stale_served_total", "counter", "Stale translations served while a refresh was slow or failing",
+           [({}, translation_cache.stale_served)])
+    
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
+def _memory_diagnostics_disabled():
+    return jsonify({'error': 'Memory diagnostics are disabled; set TRANSLATION_MEMORY_DIAGNOSTICS=true'}), 404
+
+@app.route('/health/memory')
+@admin_required
+def health_memory():
+    """RSS, per-subsystem memory and top allocation sites (growth since the baseline, if taken)"""
+    if not memory_diagnostics:
+        return _memory_diagnostics_disabled()
+    top = min(max(request.args.get('top', 20, type=int), 1), 200)
+    return jsonify(memory_diagnostics.report(top))
+
+@app.route('/health/memory/baseline', methods=['POST'])
+@admin_required
+def health_memory_baseline():
+    """Take the tracemalloc snapshot that later reports are compared with"""
+    if not memory_diagnostics:
+        return _memory_diagnostics_disabled()
+    return jsonify(memory_diagnostics.take_baseline())
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'oci_client_initialized': translator.client is not None
+        'oci_client_initialized': translator.router is not None,
+        'backends': translator.router.stats() if translator.router else [],
+        'scheduler': translator.router.scheduler.stats() if translator.router else None,
+        'concurrency': translator.router.limiter.stats() if translator.router and translator.router.limiter else None,
+        'credentials': credential_reloader.stats() if credential_reloader else None,
+        'glossary': translator.router.glossary.stats() if translator.router and translator.router.glossary else None,
+        'live_sessions': len(live_sessions),
+        'queued_jobs': job_queue.queued(),
+        'api_clients': fair_queue.stats(),
+        'cache_entries': len(translation_cache),
+        'distributed_cache': translation_cache.remote.stats() if translation_cache.remote else None,
+        'traffic_log': traffic_recorder.stats() if traffic_recorder else None,
+        'json_codec': app.json.codec,
+        'ready': warmup.ready
     })
 
 if __name__ == '__main__':
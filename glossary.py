@@ -0,0 +1,241 @@
+"""
+Glossary enforcement for translations.
+
+Glossary terms are compiled into an Aho-Corasick automaton, so finding every
+term in a text takes one pass over the text however many terms there are.
+Matched terms are swapped for placeholders before the text goes to the
+backend and replaced with the approved target-language term afterwards.
+
+The glossary is a CSV file named by TRANSLATION_GLOSSARY. The first column
+is the source term and the other columns are target language codes. An empty
+cell means the term is kept as written (do not translate):
+
+    term,ja,es
+    Oracle Cloud Infrastructure,,
+    JWT token,JWTトークン,token JWT
+"""
+import csv
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Bracketed ASCII survives machine translation better than symbols or markup
+PLACEHOLDER = "[[G{}]]"
+_PLACEHOLDER_PATTERN = re.compile(r"\[\[\s*G\s*(\d+)\s*\]\]")
+
+
+def _fold(c: str) -> str:
+    # Lower-case one character without changing the text length
+    lowered = c.lower()
+    return lowered if len(lowered) == 1 else c
+
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+class Glossary:
+    """Compiled term index; immutable once built, so it is safe to share between threads"""
+
+    def __init__(self, terms: Dict[str, Dict[str, str]]):
+        self.terms = []
+        self.targets = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail = [0]
+        self._output = [-1]      # term ending at this node
+        self._dict_link = [0]    # nearest node on the fail chain with an output
+
+        for term, targets in terms.items():
+            if not term.strip():
+                continue
+            node = 0
+            for c in term:
+                c = _fold(c)
+                following = self._goto[node].get(c)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[node][c] = following
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(-1)
+                    self._dict_link.append(0)
+                node = following
+            if self._output[node] == -1:
+                self._output[node] = len(self.terms)
+                self.terms.append(term)
+                self.targets.append(targets)
+
+        # Breadth-first, so every node's fail target is finished before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and c not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(c, 0)
+                self._fail[child] = target if target != child else 0
+                self._dict_link[child] = (
+                    self._fail[child] if self._output[self._fail[child]] != -1
+                    else self._dict_link[self._fail[child]]
+                )
+
+    def __len__(self):
+        return len(self.terms)
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Non-overlapping (start, end, term index) matches, leftmost-longest, on word boundaries"""
+        matches = []
+        node = 0
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        for i, c in enumerate(text):
+            c = _fold(c)
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            hit = node if output[node] != -1 else dict_link[node]
+            while hit:
+                index = output[hit]
+                start = i + 1 - len(self.terms[index])
+                if self._on_boundary(text, start, i + 1):
+                    matches.append((start, i + 1, index))
+                hit = dict_link[hit]
+
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                selected.append(match)
+                end = match[1]
+        return selected
+
+    @staticmethod
+    def _on_boundary(text: str, start: int, end: int) -> bool:
+        # Terms are whole words unless they start or end with a non-word character (e.g. CJK punctuation)
+        if start > 0 and _is_word(text[start]) and _is_word(text[start - 1]):
+            return False
+        if end < len(text) and _is_word(text[end - 1]) and _is_word(text[end]):
+            return False
+        return True
+
+    def protect(self, text: str, target_language: str) -> Tuple[str, List[str]]:
+        """Replace glossary terms with placeholders; returns the text and the replacement for each"""
+        replacements = []
+        parts = []
+        position = 0
+        for start, end, index in self.find(text):
+            parts.append(text[position:start])
+            parts.append(PLACEHOLDER.format(len(replacements)))
+            replacements.append(self.targets[index].get(target_language) or text[start:end])
+            position = end
+        parts.append(text[position:])
+        return "".join(parts), replacements
+
+    @staticmethod
+    def restore(translated: str, replacements: List[str]) -> str:
+        """Put approved terms back in place of the placeholders"""
+        if not replacements:
+            return translated
+
+        def replace(match):
+            index = int(match.group(1))
+            return replacements[index] if index < len(replacements) else match.group(0)
+
+        return _PLACEHOLDER_PATTERN.sub(replace, translated)
+
+
+def load_glossary(path: str) -> Glossary:
+    """Read a glossary CSV: term, then one column per target language"""
+    terms = {}
+    with open(path, 'r', encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        languages = [code.strip() for code in header[1:]]
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            terms[row[0].strip()] = {
+                code: value.strip()
+                for code, value in zip(languages, row[1:])
+                if code and value.strip()
+            }
+    return Glossary(terms)
+
+
+class GlossaryWatcher:
+    """Serves the current glossary and reloads it in the background when the file changes.
+
+    Requests only read a reference; the file's mtime is checked at most every
+    check_interval seconds and a changed file is compiled on another thread,
+    then swapped in whole. Each swap starts a new generation, and
+    version() returns it with the Unix time it took effect (the file's mtime
+    for the glossary loaded at start-up), so caches can tell which
+    translations were made under an older glossary.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.error = None
+        self.generation = 0
+        self.loaded_at: Optional[float] = None
+        self._glossary: Optional[Glossary] = None
+        self._mtime = None
+        self._checked = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+        self._reload()
+
+    def current(self) -> Optional[Glossary]:
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            with self._lock:
+                start = mtime != self._mtime and not self._reloading
+                if start:
+                    self._reloading = True
+            if start:
+                threading.Thread(target=self._reload, name="glossary-reload", daemon=True).start()
+        return self._glossary
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            glossary = load_glossary(self.path)
+            self.error = None
+        except (OSError, ValueError, csv.Error) as e:
+            # Keep serving the last good glossary
+            mtime, glossary = None, None
+            self.error = f"Glossary error: {str(e)}"
+        with self._lock:
+            if glossary is not None:
+                # A previous process may have written translations since the file changed,
+                # but within this one the old glossary is in use until this swap
+                self.loaded_at = mtime / 1e9 if self._glossary is None else time.time()
+                self._glossary = glossary
+                self.generation += 1
+            self._mtime = mtime
+            self._reloading = False
+
+    def version(self) -> Tuple[int, Optional[float]]:
+        """Generation of the current glossary and when it took effect"""
+        with self._lock:
+            return self.generation, self.loaded_at
+
+    def stats(self) -> Dict:
+        glossary = self._glossary
+        return {"path": self.path, "terms": len(glossary) if glossary else 0, "error": self.error}
+
+
+def glossary_from_env() -> Optional[GlossaryWatcher]:
+    path = os.getenv("TRANSLATION_GLOSSARY")
+    return GlossaryWatcher(path) if path else None
@@ -0,0 +1,67 @@
+"""
+Fast JSON for the Flask API.
+
+FastJSONProvider parses request bodies and serializes responses with
+orjson when it is installed. orjson is several times faster than the
+standard library on large texts. It also writes UTF-8 bytes that go
+straight into the response, with no \\uXXXX escaping and no second
+encoding pass.
+
+orjson is optional. Without it, or for a value it cannot handle (such as
+an integer over 64 bits), the provider falls back to Flask's json-based
+default. Output is the same JSON either way, except that non-ASCII text
+is sent as UTF-8 rather than escaped.
+"""
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when available"""
+
+    @property
+    def codec(self) -> str:
+        return "orjson" if orjson is not None else "json"
+
+    def _options(self, pretty: bool = False) -> int:
+        # Dates and dataclasses go through Flask's default so they serialize as before
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Out-of-range integers and the like; truly invalid JSON fails here too
+            return super().loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
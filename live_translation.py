@@ -0,0 +1,532 @@
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Tuple
+
+import deadlines
+from batch_translation import pack_texts
+from deadlines import DeadlineExceeded
+
+# Translator methods report failures as text rather than raising
+ERROR_PREFIXES = (
+    "❌",
+    "Translation error:",
+    "OCI client not initialized",
+    "No translation received",
+)
+
+_SENTENCE_RE = re.compile(r'[^.!?。！？\n]+(?:[.!?。！？]+|\n+|$)\s*|\n+')
+
+
+def is_translation_error(text: str) -> bool:
+    """Check whether a translator result is an error message"""
+    return text.startswith(ERROR_PREFIXES)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, keeping trailing punctuation and whitespace"""
+    return [match.group(0) for match in _SENTENCE_RE.finditer(text) if match.group(0)]
+
+
+class SentenceCache:
+    """Bounded LRU of per-sentence translations.
+
+    An optional read-only snapshot (see cache_snapshot) backs the LRU: misses
+    are looked up there and promoted, so a restarted instance starts warm.
+    An optional remote tier (see distributed_cache) is consulted after that,
+    and every put is written through to it, so the LRU acts as a near cache
+    in front of a cache shared by several hosts.
+
+    With soft_ttl and hard_ttl (seconds), fetch() serves stale-while-revalidate.
+    Entries younger than soft_ttl are served as they are. An older entry is
+    refreshed by one background translation per key; the caller waits up to
+    revalidate_wait seconds for it and gets the stale value if the backend is
+    slower than that or fails. Entries older than hard_ttl are dropped.
+    Without TTLs entries never expire. Ages count from when the translation
+    was written, which the snapshot and remote tiers keep too, so an entry
+    promoted from a tier is no younger than it was there. A translation
+    counts as written when it was started, before the backend read the
+    glossary. With a glossary watcher, each entry keeps the glossary
+    generation current when it was started and is dropped once another one
+    is in use. The snapshot and remote tiers only keep write times, so their
+    entries must be written after the current glossary took effect.
+    """
+
+    def __init__(self, max_entries: int = 2000, snapshot=None, soft_ttl: Optional[float] = None,
+                 hard_ttl: Optional[float] = None, revalidate_wait: float = 0.1, refresh_workers: int = 4,
+                 remote=None, glossary=None):
+        self.max_entries = max_entries
+        self.snapshot = snapshot
+        self.remote = remote
+        self.glossary = glossary
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.revalidate_wait = revalidate_wait
+        self.refresh_workers = refresh_workers
+        self.stale_served = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Translations in progress, so concurrent requests for one key share a single call
+        self._in_flight: Dict[Tuple[str, str, str], Future] = {}
+        self._executor = None
+
+    def glossary_version(self) -> Tuple[int, float]:
+        """Current glossary generation and the write time before which tier entries predate it"""
+        if self.glossary is None:
+            return 0, 0.0
+        # Checks the file for changes at most every check_interval seconds
+        self.glossary.current()
+        generation, loaded_at = self.glossary.version()
+        return generation, loaded_at or 0.0
+
+    def valid_after(self) -> float:
+        """Write time before which entries were made under an older glossary"""
+        return self.glossary_version()[1]
+
+    def _expired(self, written_at: float, now: float, valid_after: float) -> bool:
+        return written_at < valid_after or (self.hard_ttl is not None and now - written_at >= self.hard_ttl)
+
+    def _lookup(self, key: Tuple[str, str, str]) -> Optional[Tuple[str, float]]:
+        """Cached value and its age in seconds, or None if missing, past hard_ttl or older than the glossary"""
+        now = time.time()
+        generation, valid_after = self.glossary_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, written_at, made_under = entry
+                if made_under != generation or self._expired(written_at, now, 0.0):
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    return value, now - written_at
+        # A tier holds either the same write (expired as well) or a newer one from another host
+        for tier in (self.snapshot, self.remote):
+            if tier is not None:
+                entry = tier.get_entry(key)
+                if entry is not None and not self._expired(entry[1], now, valid_after):
+                    value, written_at = self._store(key, *entry, generation)
+                    return value, now - written_at
+        return None
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        entry = self._lookup(key)
+        return entry[0] if entry else None
+
+    def put(self, key: Tuple[str, str, str], value: str, started: Optional[Tuple[float, int]] = None):
+        """Cache a translation; started is the write time and glossary generation taken before translating"""
+        written_at, generation = started if started is not None else self.start()
+        self._store(key, value, written_at, generation)
+        if self.remote is not None:
+            self.remote.put(key, value, written_at)
+
+    def start(self) -> Tuple[float, int]:
+        """Write time and glossary generation for a translation about to be made"""
+        return time.time(), self.glossary_version()[0]
+
+    def _store(self, key: Tuple[str, str, str], value: str, written_at: float,
+               generation: int) -> Tuple[str, float]:
+        """Keep value unless a newer write for key got here first; returns the value and write time kept"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[2], entry[1]) <= (generation, written_at):
+                entry = self._entries[key] = (value, written_at, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry[0], entry[1]
+
+    def fetch(self, key: Tuple[str, str, str], translate: Callable[[], str]) -> Tuple[str, bool]:
+        """Translation for key, calling translate on a miss; returns it and whether the cache answered.
+
+        translate returns a translation or a translator error message; errors
+        are passed back but never cached.
+        """
+        entry = self._lookup(key)
+        if entry is not None and (self.soft_ttl is None or entry[1] < self.soft_ttl):
+            return entry[0], True
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if entry is None:
+            if owner:
+                self._translate_into(key, translate, future)
+                return future.result(), False
+            return self._wait(future, lambda: self.fetch(key, translate)[0]), False
+
+        # Stale: refresh off the request path and only wait briefly for it
+        if owner:
+            self._refresh_executor().submit(self._translate_into, key, translate, future)
+        budget = deadlines.remaining()
+        try:
+            fresh = future.result(timeout=self.revalidate_wait if budget is None else
+                                  max(min(self.revalidate_wait, budget), 0.0))
+        except Exception:
+            fresh = None
+        if fresh is None or is_translation_error(fresh):
+            with self._lock:
+                self.stale_served += 1
+            return entry[0], True
+        return fresh, False
+
+    def fetch_many(self, keys: List[Tuple[str, str, str]],
+                   translate: Callable[[List[str]], List[str]]) -> List[Tuple[str, bool]]:
+        """fetch() for several keys, sending all of their misses to translate in one call.
+
+        translate takes the texts of the missing keys and returns their
+        translations (or translator error messages) in the same order.
+        """
+        results: List[Optional[Tuple[str, bool]]] = [None] * len(keys)
+        owned = []
+        waiting = []
+        for i, key in enumerate(keys):
+            entry = self._lookup(key)
+            if entry is not None and (self.soft_ttl is None or entry[1] < self.soft_ttl):
+                results[i] = (entry[0], True)
+            elif entry is not None:
+                # Stale entries are refreshed one by one in the background, as in fetch()
+                results[i] = self.fetch(key, lambda key=key: translate([key[0]])[0])
+            else:
+                with self._lock:
+                    future = self._in_flight.get(key)
+                    if future is None:
+                        future = self._in_flight[key] = Future()
+                        owned.append((i, key, future))
+                    else:
+                        waiting.append((i, key, future))
+
+        if owned:
+            self._translate_many_into([key for _, key, _ in owned], translate, [future for _, _, future in owned])
+        for i, key, future in owned:
+            results[i] = (future.result(), False)
+        for i, key, future in waiting:
+            retry = lambda key=key: self.fetch(key, lambda: translate([key[0]])[0])[0]
+            results[i] = (self._wait(future, retry), False)
+        return results
+
+    def _wait(self, future: Future, retry: Callable[[], str]) -> str:
+        """Another caller's translation, waited for within this caller's deadline.
+
+        If that caller only failed because its own deadline ran out, retry
+        translates with this caller's budget instead.
+        """
+        budget = deadlines.remaining()
+        try:
+            return future.result(timeout=None if budget is None else max(budget, 0.0))
+        except FutureTimeout:
+            raise DeadlineExceeded("Deadline exceeded waiting for a translation in progress")
+        except DeadlineExceeded:
+            deadlines.check("translation")
+            return retry()
+
+    def _translate_into(self, key: Tuple[str, str, str], translate: Callable[[], str], future: Future):
+        self._translate_many_into([key], lambda texts: [translate()], [future])
+
+    def _translate_many_into(self, keys: List[Tuple[str, str, str]], translate: Callable[[List[str]], List[str]],
+                             futures: List[Future]):
+        values, error = None, None
+        # Taken before the backend reads the glossary, so a reload during the call is never missed
+        started = self.start()
+        try:
+            values = translate([key[0] for key in keys])
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise ValueError(f"Translator returned {values!r:.80} for {len(keys)} texts")
+            for key, value in zip(keys, values):
+                if not is_translation_error(value):
+                    self.put(key, value, started)
+        except BaseException as e:
+            error = e
+        finally:
+            # Leave _in_flight before waking waiters, so one that retries starts a new call
+            with self._lock:
+                for key in keys:
+                    self._in_flight.pop(key, None)
+            # Every future is resolved, whatever went wrong, or its waiters would block forever
+            for i, future in enumerate(futures):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(values[i])
+        if error is not None and not isinstance(error, Exception):
+            raise error
+
+    def _refresh_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix="cache-refresh")
+            return self._executor
+
+    def items(self) -> List[Tuple[Tuple[str, str, str], str]]:
+        with self._lock:
+            return [(key, value) for key, (value, _, _) in self._entries.items()]
+
+    def entries(self) -> List[Tuple[Tuple[str, str, str], str, float]]:
+        """Keys, values and write times of entries made under the current glossary, as written to snapshots"""
+        generation = self.glossary_version()[0]
+        with self._lock:
+            return [
+                (key, value, written_at) for key, (value, written_at, made_under) in self._entries.items()
+                if made_under == generation
+            ]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _sentence_translator(translator, target_language: str, source_language: str) -> Callable[[List[str]], List[str]]:
+    """Translate cache misses in as few backend calls as fit the batch limits"""
+    def translate(texts: List[str]) -> List[str]:
+        results = []
+        for pack in pack_texts(texts):
+            results.extend(translator.translate_texts(pack, target_language, source_language))
+        return results
+    return translate
+
+
+def translate_by_sentence(translator, text: str, target_language: str,
+                          source_language: str = "auto",
+                          cache: Optional[SentenceCache] = None) -> Tuple[str, Dict]:
+    """Translate text sentence by sentence, sending the sentences missing from the cache in one batch.
+
+    Returns the joined translation and a stats dict with hit/miss counts and the
+    detected language (when source_language is "auto"). If any sentence fails, the
+    first error message is returned instead of a partial translation.
+    """
+    cache = cache if cache is not None else SentenceCache()
+    sentences = split_sentences(text)
+    stats = {"sentences": len(sentences), "hits": 0, "misses": 0, "detected_language": None}
+
+    if source_language == "auto":
+        detected = translator.detect_language(text)
+        source_language = detected if detected != "unknown" else "en"
+        stats["detected_language"] = detected
+
+    keys = [(sentence.strip(), source_language, target_language) for sentence in sentences if sentence.strip()]
+    results = iter(cache.fetch_many(keys, _sentence_translator(translator, target_language, source_language)))
+    parts = []
+    for sentence in sentences:
+        if not sentence.strip():
+            parts.append(sentence)
+            continue
+        translated, hit = next(results)
+        stats["hits" if hit else "misses"] += 1
+        if is_translation_error(translated):
+            return translated, stats
+        parts.append(translated + sentence[len(sentence.rstrip()):])
+
+    return "".join(parts).rstrip(), stats
+
+
+class LiveTranslationSession:
+    """A live translation channel for one client.
+
+    The client sends text deltas; a background worker waits for input to settle,
+    translates the sentences missing from the cache in one batch and pushes each
+    result as an event. Events for a superseded version are no longer pushed.
+    """
+
+    def __init__(self, translator, target_language: str = "ja", source_language: str = "auto",
+                 debounce_seconds: float = 0.3, cache: Optional[SentenceCache] = None,
+                 owner: Optional[str] = None):
+        self.session_id = uuid.uuid4().hex
+        # The client allowed to use the session, if the caller restricts that
+        self.owner = owner
+        self.translator = translator
+        self.target_language = target_language
+        self.source_language = source_language
+        self.debounce_seconds = debounce_seconds
+        self.cache = cache if cache is not None else SentenceCache()
+        self.text = ""
+        self.version = 0
+        self.last_activity = time.monotonic()
+        self.closed = False
+
+        self._events = queue.Queue(maxsize=1000)
+        self._condition = threading.Condition()
+        self._due_at = None
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def apply_delta(self, base_version: int, offset: int = 0, delete: int = 0,
+                    insert: str = "") -> bool:
+        """Apply an edit made against base_version; returns False if the client is out of sync"""
+        with self._condition:
+            if base_version != self.version or offset < 0 or offset > len(self.text):
+                return False
+            self.text = self.text[:offset] + insert + self.text[offset + delete:]
+            self._mark_changed()
+            return True
+
+    def set_text(self, text: str):
+        """Replace the whole text, used for the initial sync and resyncs"""
+        with self._condition:
+            self.text = text
+            self._mark_changed()
+
+    def set_languages(self, target_language: Optional[str] = None,
+                      source_language: Optional[str] = None):
+        """Change the language pair and retranslate the current text"""
+        with self._condition:
+            if target_language:
+                self.target_language = target_language
+            if source_language:
+                self.source_language = source_language
+            self._mark_changed()
+
+    def _mark_changed(self):
+        self.version += 1
+        self.last_activity = time.monotonic()
+        self._due_at = self.last_activity + self.debounce_seconds
+        self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def next_event(self, timeout: float) -> Optional[Dict]:
+        """Return the next pushed event, or None if nothing arrived within timeout"""
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def buffered_events(self) -> int:
+        return self._events.qsize()
+
+    def _push(self, event: Dict):
+        try:
+            self._events.put_nowait(event)
+        except queue.Full:
+            # Consumer went away; drop the oldest event rather than block the worker
+            try:
+                self._events.get_nowait()
+            except queue.Empty:
+                pass
+            self._events.put_nowait(event)
+
+    def _superseded(self, version: int) -> bool:
+        with self._condition:
+            return self.closed or self.version != version
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self.closed:
+                    if self._due_at is not None:
+                        remaining = self._due_at - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self.closed:
+                    return
+                self._due_at = None
+                version = self.version
+                text = self.text
+                target_language = self.target_language
+                source_language = self.source_language
+
+            self._translate_version(version, text, target_language, source_language)
+
+    def _translate_version(self, version: int, text: str, target_language: str,
+                           source_language: str):
+        sentences = split_sentences(text)
+        if not text.strip():
+            self._push({"type": "done", "version": version, "sentences": 0})
+            return
+
+        if source_language == "auto":
+            detected = self.translator.detect_language(text)
+            source_language = detected if detected != "unknown" else "en"
+            self._push({"type": "detected", "version": version, "language": detected})
+
+        if self._superseded(version):
+            return
+        indexes = [index for index, sentence in enumerate(sentences) if sentence.strip()]
+        results = self.cache.fetch_many(
+            [(sentences[index].strip(), source_language, target_language) for index in indexes],
+            _sentence_translator(self.translator, target_language, source_language)
+        )
+        for index, (translated, _) in zip(indexes, results):
+            if self._superseded(version):
+                return
+            sentence = sentences[index]
+            if is_translation_error(translated):
+                self._push({"type": "error", "version": version, "index": index, "error": translated})
+                return
+            self._push({
+                "type": "sentence",
+                "version": version,
+                "index": index,
+                "source": sentence,
+                "translation": translated,
+            })
+
+        if not self._superseded(version):
+            self._push({"type": "done", "version": version, "sentences": len(sentences)})
+
+
+class LiveSessionRegistry:
+    """Tracks open live sessions and closes idle ones"""
+
+    def __init__(self, translator, idle_timeout: float = 600, max_sessions: int = 500,
+                 cache: Optional[SentenceCache] = None):
+        self.translator = translator
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.cache = cache if cache is not None else SentenceCache()
+        self._sessions: Dict[str, LiveTranslationSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, target_language: str, source_language: str,
+               owner: Optional[str] = None) -> LiveTranslationSession:
+        self.expire_idle()
+        session = LiveTranslationSession(
+            self.translator,
+            target_language=target_language,
+            source_language=source_language,
+            cache=self.cache,
+            owner=owner,
+        )
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_activity)
+                self._sessions.pop(oldest.session_id).close()
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[LiveTranslationSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            session.close()
+
+    def sessions(self) -> List[LiveTranslationSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def expire_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s.last_activity < cutoff]
+            for sid in idle:
+                self._sessions.pop(sid).close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
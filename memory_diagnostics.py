@@ -0,0 +1,138 @@
+"""
+Opt-in memory diagnostics for long-running workers.
+
+Set TRANSLATION_MEMORY_DIAGNOSTICS=true to start tracemalloc at start-up.
+The report has the process RSS and its high-water mark, a byte count for
+each registered subsystem, the top allocation sites, and, once a baseline
+has been taken, the sites that grew most since then. Taking a baseline,
+waiting, and reading the report again shows where a leak is allocating.
+tracemalloc slows allocation down, so leave it off unless you are
+investigating.
+"""
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+# Frames of our own bookkeeping that would otherwise top every report
+_IGNORED_FILES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by obj and the containers and strings inside it"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def rss_bytes() -> Dict[str, Optional[int]]:
+    """Current resident set size and its high-water mark, where the platform reports them"""
+    current = peak = None
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if peak is None:
+        try:
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Kilobytes on Linux, bytes on macOS
+            peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+        except (ImportError, OSError):
+            pass
+    return {"current": current, "peak": peak}
+
+
+def _statistics(stats: List, top: int) -> List[Dict]:
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "bytes": stat.size,
+            "count": stat.count,
+            **({"bytes_diff": stat.size_diff, "count_diff": stat.count_diff}
+               if hasattr(stat, "size_diff") else {}),
+        }
+        for stat in stats[:top]
+    ]
+
+
+class MemoryDiagnostics:
+    """tracemalloc snapshots plus per-subsystem accounting.
+
+    Subsystems register a callable that returns a small dict (entries,
+    bytes, queue lengths); it is only called when a report is requested.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self._subsystems: Dict[str, Callable[[], Dict]] = {}
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def register(self, name: str, accounting: Callable[[], Dict]):
+        self._subsystems[name] = accounting
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED_FILES)
+
+    def take_baseline(self) -> Dict:
+        """Remember the current allocations; later reports include the growth since"""
+        snapshot = self._snapshot()
+        with self._lock:
+            self._baseline = snapshot
+        return {"traced_bytes": sum(stat.size for stat in snapshot.statistics("filename"))}
+
+    def report(self, top: int = 20) -> Dict:
+        subsystems = {}
+        for name, accounting in self._subsystems.items():
+            try:
+                subsystems[name] = accounting()
+            except Exception as e:
+                subsystems[name] = {"error": str(e)}
+
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            "rss_bytes": rss_bytes(),
+            "traced": {"current": current, "peak": peak},
+            "subsystems": subsystems,
+        }
+        if tracemalloc.is_tracing():
+            snapshot = self._snapshot()
+            report["top"] = _statistics(snapshot.statistics("lineno"), top)
+            with self._lock:
+                baseline = self._baseline
+            if baseline is not None:
+                report["growth"] = _statistics(snapshot.compare_to(baseline, "lineno"), top)
+        return report
+
+
+def diagnostics_from_env() -> Optional[MemoryDiagnostics]:
+    """Started diagnostics if TRANSLATION_MEMORY_DIAGNOSTICS=true; TRACEMALLOC_FRAMES sets traceback depth"""
+    if os.getenv("TRANSLATION_MEMORY_DIAGNOSTICS", "false").lower() != "true":
+        return None
+    diagnostics = MemoryDiagnostics(frames=int(os.getenv("TRACEMALLOC_FRAMES", "1")))
+    diagnostics.start()
+    return diagnostics
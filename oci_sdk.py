@@ -0,0 +1,32 @@
+"""
+On-demand loading of the OCI SDK.
+
+`import oci` pulls in the auth stack (cryptography, requests, ...) and, on
+older SDK releases, every service package. Modules here call ai_language()
+at the point they build a client or request model instead of importing oci
+at module level, so app start-up, health checks and CLI --help stay fast.
+"""
+import importlib
+import os
+
+_ai_language = None
+_retry = None
+
+
+def ai_language():
+    """The oci.ai_language module, imported on first call"""
+    global _ai_language
+    if _ai_language is None:
+        # Only load the AI Language service, not every package oci/__init__ knows about
+        os.environ.setdefault("OCI_PYTHON_SDK_NO_SERVICE_IMPORTS", "true")
+        _ai_language = importlib.import_module("oci.ai_language")
+    return _ai_language
+
+
+def retry():
+    """The oci.retry module, imported on first call"""
+    global _retry
+    if _retry is None:
+        ai_language()
+        _retry = importlib.import_module("oci.retry")
+    return _retry
@@ -0,0 +1,122 @@
+"""
+The OCI translator shared by the Flask app and the command-line tools.
+
+It is configured from the environment: OCI_* variables, an OCI CLI config
+file (OCI_CONFIG_FILE) or a key file (OCI_PRIVATE_KEY_PATH), and
+OCI_REGIONS. Constructing it has no side effects beyond building the
+backend router, so the CLIs use it without importing the web app and its
+job workers, caches and background threads. The Streamlit apps subclass it
+(see translation_component) to read secrets.toml instead.
+"""
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from batch_translation import detect_languages
+from credential_reload import read_key_file, read_oci_config
+from deadlines import DeadlineExceeded
+from translation_backends import build_router, parse_regions
+
+
+class OCITranslator:
+    """Oracle Cloud Infrastructure Language Translation Service wrapper"""
+    
+    def __init__(self, on_backend_call: Optional[Callable] = None):
+        # Called as on_backend_call(route, texts, source_language, target_language, started)
+        self.on_backend_call = on_backend_call
+        self.config = self._load_config()
+        self.router = self._build_router()
+        if not self.router:
+            print("Warning: OCI configuration not complete")
+    
+    def _build_router(self):
+        # Backends create their OCI clients on first use, so start-up does not load the SDK
+        return build_router(self.config, parse_regions(os.getenv("OCI_REGIONS")))
+    
+    def _load_config(self) -> Dict:
+        """Load OCI configuration from environment variables, an OCI config file or a key file"""
+        config = {
+            "user": os.getenv("OCI_USER"),
+            "key_content": os.getenv("OCI_KEY_CONTENT"),
+            "fingerprint": os.getenv("OCI_FINGERPRINT"),
+            "tenancy": os.getenv("OCI_TENANCY"),
+            "region": os.getenv("OCI_REGION", "us-ashburn-1"),
+            "compartment_id": os.getenv("OCI_COMPARTMENT_ID")
+        }
+        # Files can change while the app runs, so they take precedence over the environment
+        if os.getenv("OCI_CONFIG_FILE"):
+            config.update(read_oci_config(os.getenv("OCI_CONFIG_FILE"), os.getenv("OCI_CONFIG_PROFILE", "DEFAULT")))
+        if os.getenv("OCI_PRIVATE_KEY_PATH"):
+            config["key_content"] = read_key_file(os.getenv("OCI_PRIVATE_KEY_PATH"))
+        return config
+    
+    def _record(self, route: str, texts: List[str], source_language: str, target_language: str, started: float):
+        if self.on_backend_call:
+            self.on_backend_call(route, texts, source_language, target_language, started)
+    
+    def translate_text(self, text: str, target_language: str, source_language: str = "auto") -> str:
+        """Translate text using OCI Language Translation service"""
+        if not self.router:
+            return "OCI client not initialized. Please check your configuration."
+        
+        try:
+            # Auto-detect source language if needed
+            if source_language == "auto":
+                detected_lang = self.detect_language(text)
+                if detected_lang != "unknown":
+                    source_language = detected_lang
+                else:
+                    source_language = "en"  # Default to English
+            
+            started = time.perf_counter()
+            translation = self.router.translate([text], target_language, source_language)[0]
+            self._record("translator.translate", [text], source_language, target_language, started)
+            return translation
+            
+        except DeadlineExceeded:
+            # Not a translation result; the route answers 504
+            raise
+        except Exception as e:
+            return self._error_message(e)
+    
+    def translate_texts(self, texts: List[str], target_language: str, source_language: str) -> List[str]:
+        """Translate several texts in one backend call; on failure every result is the error message"""
+        if not self.router:
+            return ["OCI client not initialized. Please check your configuration."] * len(texts)
+        
+        try:
+            started = time.perf_counter()
+            translations = self.router.translate(texts, target_language, source_language)
+            self._record("translator.translate", texts, source_language, target_language, started)
+            return translations
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return [self._error_message(e)] * len(texts)
+    
+    def _error_message(self, error: Exception) -> str:
+        """Translation result reported in place of a failed call"""
+        return f"Translation error: {str(error)}"
+    
+    def detect_language(self, text: str) -> str:
+        """Detect the language of input text"""
+        if not self.router:
+            return "unknown"
+        
+        try:
+            started = time.perf_counter()
+            detected = self.router.detect_language(text)
+            self._record("translator.detect", [text], detected, None, started)
+            return detected
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            self._detection_failed(e)
+            return "unknown"
+    
+    def _detection_failed(self, error: Exception):
+        print(f"Language detection error: {str(error)}")
+    
+    def detect_languages(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Detect the language of many texts in packed, concurrent batch calls; raises on failure"""
+        return detect_languages(self, texts)
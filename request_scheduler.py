@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Priority classes for calls to the translation backend
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, BULK: 1}
+# Share of the current limit a class may hold when it has no fixed cap
+DEFAULT_SHARES = {BULK: 0.25}
+
+
+class PriorityScheduler:
+    """Admits backend calls by priority class with weighted fair queuing.
+
+    At most limit calls run at once. When a slot frees up, the waiting class
+    with the smallest virtual time goes next and its virtual time advances
+    by 1/weight, so with the default weights interactive calls get eight
+    slots for every bulk one. Classes in caps never hold more than that many
+    slots, and classes in shares never hold more than that fraction of the
+    current limit (at least one slot), which keeps capacity free for
+    interactive traffic as the limit changes. Bulk work takes
+    one slot per pack and releases it between packs, so a batch job is
+    preempted at pack boundaries rather than holding the client for its
+    whole run.
+    """
+
+    def __init__(self, limit: int = 8, weights: Optional[Dict[str, float]] = None,
+                 caps: Optional[Dict[str, int]] = None, shares: Optional[Dict[str, float]] = None):
+        self.limit = limit
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.caps = dict(caps or {})
+        self.shares = dict(DEFAULT_SHARES if shares is None else shares)
+        self._cond = threading.Condition()
+        self._waiting = {priority: deque() for priority in self.weights}
+        self._running = {priority: 0 for priority in self.weights}
+        self._vtime = {priority: 0.0 for priority in self.weights}
+        self._clock = 0.0
+
+    def _cap(self, priority: str) -> int:
+        """Most slots a class may hold under the current limit"""
+        if priority in self.caps:
+            return self.caps[priority]
+        if priority in self.shares:
+            return max(1, int(self.limit * self.shares[priority]))
+        return self.limit
+
+    def _next(self):
+        """Ticket at the head of the class that should run next, if a slot is free"""
+        if sum(self._running.values()) >= self.limit:
+            return None
+        candidates = [
+            priority for priority, waiting in self._waiting.items()
+            if waiting and self._running[priority] < self._cap(priority)
+        ]
+        if not candidates:
+            return None
+        priority = min(candidates, key=lambda p: (self._vtime[p], -self.weights[p]))
+        return self._waiting[priority][0]
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, timeout: Optional[float] = None):
+        """Hold one concurrency slot for the duration of a backend call.
+
+        Yields a function that gives the slot back early; calling it again, or
+        leaving the block afterwards, does nothing. Raises TimeoutError if no
+        slot is granted within timeout seconds.
+        """
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+        ticket = object()
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            waiting = self._waiting[priority]
+            if not waiting:
+                # An idle class must not bank credit while it had nothing to send
+                self._vtime[priority] = max(self._vtime[priority], self._clock)
+            waiting.append(ticket)
+            while self._next() is not ticket:
+                left = give_up_at - time.monotonic() if give_up_at is not None else None
+                if left is not None and left <= 0:
+                    waiting.remove(ticket)
+                    self._cond.notify_all()
+                    raise TimeoutError("Timed out waiting for a backend slot")
+                self._cond.wait(left)
+            waiting.popleft()
+            self._running[priority] += 1
+            self._clock = self._vtime[priority]
+            self._vtime[priority] += 1.0 / self.weights[priority]
+            # More than one slot may be free
+            self._cond.notify_all()
+        released = False
+
+        def release():
+            nonlocal released
+            with self._cond:
+                if released:
+                    return
+                released = True
+                self._running[priority] -= 1
+                self._cond.notify_all()
+
+        try:
+            yield release
+        finally:
+            release()
+
+    def in_flight(self) -> int:
+        return sum(self._running.values())
+
+    def set_limit(self, limit: int):
+        """Change the concurrency limit; waiters are admitted at once if it grew"""
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "running": dict(self._running),
+                "waiting": {priority: len(waiting) for priority, waiting in self._waiting.items()},
+            }
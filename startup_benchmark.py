@@ -0,0 +1,103 @@
+"""
+Start-up import-time benchmark.
+
+Imports an entry point in a fresh interpreter with `-X importtime`, reports
+the slowest top-level imports and fails when the best of several runs is
+over the start-up budget. Use it in CI or before changing dependencies so
+autoscaled workers keep coming up quickly.
+
+Usage:
+    python startup_benchmark.py                          # flask_app, default budget
+    python startup_benchmark.py --module translate_cli --budget-ms 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "500"))
+
+# Imports that should never happen at start-up
+DEFERRED_MODULES = ("oci",)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parse `-X importtime` output into (module, depth, self_us, cumulative_us) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head[len("import time:"):]
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str) -> Dict:
+    """Import module once in a fresh interpreter and summarize where the time went"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    # Rows are printed children first, so the module's direct imports are the
+    # depth-1 rows just before its own depth-0 row
+    total_us = 0
+    direct = []
+    imports = []
+    for row in rows:
+        if row[1] == 1:
+            direct.append(row)
+        elif row[1] == 0:
+            if row[0] == module:
+                total_us = row[3]
+                imports = direct
+            direct = []
+    loaded = {row[0].split(".")[0] for row in rows}
+    return {
+        "total_ms": total_us / 1000,
+        "modules": len(rows),
+        "imports": sorted(imports, key=lambda row: row[3], reverse=True),
+        "deferred_loaded": [name for name in DEFERRED_MODULES if name in loaded],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure start-up import time against a budget")
+    parser.add_argument("--module", default="flask_app", help="Module to import (default: flask_app)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Start-up budget in milliseconds (default: {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument("--runs", type=int, default=3, help="Runs; the fastest one is compared to the budget")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["total_ms"])
+
+    print(f"import {args.module}: {best['total_ms']:.0f} ms, {best['modules']} modules "
+          f"(best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, _, self_us, cumulative_us in best["imports"][:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    failed = False
+    if best["deferred_loaded"]:
+        print(f"Loaded at start-up but should be lazy: {', '.join(best['deferred_loaded'])}")
+        failed = True
+    if best["total_ms"] > args.budget_ms:
+        print(f"Over budget by {best['total_ms'] - args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,618 @@
+"""
+Structure-preserving translation for localization files.
+
+Each format knows how to stream the translatable strings out of a file and how
+to stream a copy of the file with those strings replaced, leaving keys, markup
+and layout alone. Strings are deduplicated and translated in packed batches.
+
+Usage:
+    python structured_formats.py -t ja -o messages.ja.po messages.pot
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from xml.sax import make_parser
+from xml.sax.handler import ContentHandler, feature_external_ges, feature_namespaces
+from xml.sax.saxutils import XMLGenerator
+
+from batch_translation import dedupe_by_frequency, detect_batch_language, pack_texts, translate_batch_with_retry
+
+READ_CHUNK_SIZE = 1 << 16
+
+_URL_RE = re.compile(r'^[a-z][a-z0-9+.-]*://\S*$', re.IGNORECASE)
+
+
+def is_translatable(text: str) -> bool:
+    """Skip strings with no words in them, such as numbers, IDs and URLs"""
+    stripped = text.strip()
+    return any(ch.isalpha() for ch in stripped) and not _URL_RE.match(stripped)
+
+
+def _text_reader(stream: BinaryIO, newline: Optional[str] = None) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline=newline)
+
+
+def _text_writer(stream: BinaryIO, newline: Optional[str] = None) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8", newline=newline)
+
+
+def _release(wrapper: io.TextIOWrapper):
+    """Flush a text wrapper without closing the binary stream underneath"""
+    wrapper.flush()
+    wrapper.detach()
+
+
+class JsonFormat:
+    """JSON resource files: every string value is translated, object keys are kept"""
+
+    extensions = (".json",)
+
+    _STRUCTURE_RE = re.compile(r'["{}\[\],:]')
+    _STRING_END_RE = re.compile(r'["\\]')
+
+    def _tokens(self, stream: BinaryIO) -> Iterator[Tuple[str, str]]:
+        """Yield ("raw", text), ("key", literal) or ("value", literal) pieces in order.
+
+        String literals keep their quotes and escapes, so joining every piece
+        reproduces the input exactly.
+        """
+        reader = _text_reader(stream)
+        stack = []
+        expect_key = False
+        raw = []
+        literal = None
+        escaped = False
+        is_key = False
+        try:
+            while True:
+                chunk = reader.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                i = 0
+                while i < len(chunk):
+                    if literal is not None:
+                        if escaped:
+                            literal.append(chunk[i])
+                            escaped = False
+                            i += 1
+                            continue
+                        match = self._STRING_END_RE.search(chunk, i)
+                        if match is None:
+                            literal.append(chunk[i:])
+                            break
+                        j = match.start()
+                        literal.append(chunk[i:j + 1])
+                        i = j + 1
+                        if chunk[j] == '\\':
+                            escaped = True
+                            continue
+                        yield ("key" if is_key else "value", "".join(literal))
+                        literal = None
+                        continue
+
+                    match = self._STRUCTURE_RE.search(chunk, i)
+                    if match is None:
+                        raw.append(chunk[i:])
+                        break
+                    j = match.start()
+                    char = chunk[j]
+                    if char == '"':
+                        raw.append(chunk[i:j])
+                        if raw:
+                            yield ("raw", "".join(raw))
+                            raw = []
+                        is_key = bool(stack) and stack[-1] == "{" and expect_key
+                        literal = ['"']
+                    else:
+                        raw.append(chunk[i:j + 1])
+                        if char in "{[":
+                            stack.append(char)
+                            expect_key = char == "{"
+                        elif char in "}]":
+                            if stack:
+                                stack.pop()
+                            expect_key = False
+                        elif char == ",":
+                            expect_key = bool(stack) and stack[-1] == "{"
+                        elif char == ":":
+                            expect_key = False
+                    i = j + 1
+            if literal is not None:
+                raise ValueError("Unterminated string in JSON input")
+            if raw:
+                yield ("raw", "".join(raw))
+        finally:
+            reader.detach()
+
+    def extract(self, stream: BinaryIO) -> Iterator[str]:
+        for kind, piece in self._tokens(stream):
+            if kind == "value":
+                value = json.loads(piece)
+                if is_translatable(value):
+                    yield value
+
+    def write(self, stream: BinaryIO, output: BinaryIO, translations: Dict[str, str]):
+        writer = _text_writer(output)
+        for kind, piece in self._tokens(stream):
+            if kind == "value":
+                translated = translations.get(json.loads(piece))
+                if translated is not None:
+                    piece = json.dumps(translated, ensure_ascii=False)
+            writer.write(piece)
+        _release(writer)
+
+
+class CsvFormat:
+    """CSV with a header row; all columns except the first (the key) are translated"""
+
+    extensions = (".csv",)
+
+    def __init__(self, columns: Optional[List[str]] = None):
+        self.columns = columns
+
+    def _column_indexes(self, header: List[str]) -> List[int]:
+        if self.columns:
+            missing = [c for c in self.columns if c not in header]
+            if missing:
+                raise ValueError(f"CSV columns not found: {missing}")
+            return [header.index(c) for c in self.columns]
+        return list(range(1, len(header)))
+
+    def extract(self, stream: BinaryIO) -> Iterator[str]:
+        reader = _text_reader(stream, newline="")
+        try:
+            rows = csv.reader(reader)
+            header = next(rows, None)
+            if header is None:
+                return
+            indexes = self._column_indexes(header)
+            for row in rows:
+                for i in indexes:
+                    if i < len(row) and is_translatable(row[i]):
+                        yield row[i]
+        finally:
+            reader.detach()
+
+    def write(self, stream: BinaryIO, output: BinaryIO, translations: Dict[str, str]):
+        reader = _text_reader(stream, newline="")
+        writer = _text_writer(output, newline="")
+        try:
+            last_line = [""]
+
+            def lines():
+                for line in reader:
+                    last_line[0] = line
+                    yield line
+
+            rows = csv.reader(lines())
+            header = next(rows, None)
+            if header is None:
+                return
+            # Keep the input's line endings rather than csv's default \r\n. The header
+            # record ends with the last line it took, which differs from the first when
+            # a quoted header contains a newline.
+            lineterminator = "\r\n" if last_line[0].endswith("\r\n") else "\n"
+            out = csv.writer(writer, lineterminator=lineterminator)
+            out.writerow(header)
+            indexes = self._column_indexes(header)
+            for row in rows:
+                for i in indexes:
+                    if i < len(row) and row[i] in translations:
+                        row[i] = translations[row[i]]
+                out.writerow(row)
+        finally:
+            reader.detach()
+            _release(writer)
+
+
+_PO_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+_PO_KEYWORD_RE = re.compile(r'^(msgctxt|msgid_plural|msgid|msgstr(?:\[\d+\])?)\s+(".*")\s*$')
+
+
+def _po_unquote(literal: str) -> str:
+    body = literal.strip()[1:-1]
+    return re.sub(r'\\(.)', lambda m: _PO_ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _po_quote(text: str) -> str:
+    return '"' + (text.replace("\\", "\\\\").replace('"', '\\"')
+                  .replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r")) + '"'
+
+
+class PoFormat:
+    """gettext PO/POT catalogs: msgid (and msgid_plural) are translated into msgstr.
+
+    Entries that already have a translation are left alone unless overwrite is set;
+    the header entry is always kept as it is.
+    """
+
+    extensions = (".po", ".pot")
+
+    def __init__(self, overwrite: bool = False):
+        self.overwrite = overwrite
+
+    def _entries(self, stream: BinaryIO) -> Iterator[Tuple[List[str], Dict[str, str]]]:
+        """Yield (raw lines, fields) per entry; blank separator lines are entries with no fields"""
+        reader = _text_reader(stream)
+        try:
+            lines = []
+            fields = {}
+            current = None
+            for line in reader:
+                stripped = line.strip()
+                if not stripped:
+                    if lines:
+                        yield lines, fields
+                    yield [line], {}
+                    lines, fields, current = [], {}, None
+                    continue
+                lines.append(line)
+                match = _PO_KEYWORD_RE.match(stripped)
+                if match:
+                    current = match.group(1)
+                    fields[current] = _po_unquote(match.group(2))
+                elif stripped.startswith('"') and current:
+                    fields[current] += _po_unquote(stripped)
+                else:
+                    current = None
+            if lines:
+                yield lines, fields
+        finally:
+            reader.detach()
+
+    def _needs_translation(self, fields: Dict[str, str]) -> bool:
+        if not fields.get("msgid"):
+            return False
+        if self.overwrite:
+            return True
+        return not any(v for k, v in fields.items() if k.startswith("msgstr"))
+
+    def extract(self, stream: BinaryIO) -> Iterator[str]:
+        for _, fields in self._entries(stream):
+            if self._needs_translation(fields):
+                for key in ("msgid", "msgid_plural"):
+                    if key in fields and is_translatable(fields[key]):
+                        yield fields[key]
+
+    def write(self, stream: BinaryIO, output: BinaryIO, translations: Dict[str, str]):
+        writer = _text_writer(output)
+        for lines, fields in self._entries(stream):
+            if not self._needs_translation(fields) or fields["msgid"] not in translations:
+                writer.writelines(lines)
+                continue
+
+            # Keep comments, context and msgid lines; regenerate every msgstr
+            kept = []
+            in_msgstr = False
+            for line in lines:
+                stripped = line.strip()
+                if stripped.startswith("msgstr"):
+                    in_msgstr = True
+                elif not stripped.startswith('"'):
+                    in_msgstr = False
+                if not in_msgstr:
+                    kept.append(line)
+            writer.writelines(kept)
+
+            singular = translations[fields["msgid"]]
+            if "msgid_plural" in fields:
+                plural = translations.get(fields["msgid_plural"], singular)
+                plural_keys = sorted(k for k in fields if k.startswith("msgstr[")) or ["msgstr[0]", "msgstr[1]"]
+                for key in plural_keys:
+                    writer.write(f"{key} {_po_quote(singular if key == 'msgstr[0]' else plural)}\n")
+            else:
+                writer.write(f"msgstr {_po_quote(singular)}\n")
+        _release(writer)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].rsplit(":", 1)[-1]
+
+
+class _XliffRewriter(ContentHandler):
+    """SAX pass-through that fills in <target> elements of XLIFF 1.2 and 2.0 units"""
+
+    def __init__(self, out: XMLGenerator, translations: Dict[str, str],
+                 target_language: Optional[str], overwrite: bool):
+        super().__init__()
+        self.out = out
+        self.translations = translations
+        self.target_language = target_language
+        self.overwrite = overwrite
+        self.in_unit = False
+        self.source_text = None
+        self.source_plain = True
+        self.in_source = False
+        self.source_tag = None
+        self.after_source = False
+        self.held = []
+        self.target_events = None
+        self.target_depth = 0
+        self.target_tag = None
+        self.target_attrs = None
+        self.whitespace_run = ""
+        self.source_indent = ""
+        self.version = "1.2"
+
+    def _translation(self) -> Optional[str]:
+        if self.source_text is None or not self.source_plain:
+            return None
+        return self.translations.get(self.source_text)
+
+    def _emit_new_target(self):
+        translation = self._translation()
+        if translation is None:
+            return
+        # Indent the new element like its <source>
+        self.out.characters(self.source_indent)
+        tag = self.source_tag[:-len("source")] + "target"
+        self.out.startElement(tag, {})
+        self.out.characters(translation)
+        self.out.endElement(tag)
+
+    def _flush_held(self):
+        for text in self.held:
+            self.out.characters(text)
+        self.held = []
+
+    def startElement(self, name, attrs):
+        local = _local_name(name)
+
+        if self.target_events is not None:
+            self.target_depth += 1
+            self.target_events.append(("start", name, attrs))
+            return
+
+        if self.after_source:
+            self.after_source = False
+            if local != "target":
+                self._emit_new_target()
+            self._flush_held()
+
+        if local in ("trans-unit", "segment"):
+            self.in_unit = True
+            self.source_text = None
+            self.source_plain = True
+        elif local == "source" and self.in_unit:
+            self.in_source = True
+            self.source_tag = name
+            self.source_indent = self.whitespace_run
+            self.source_text = ""
+        elif self.in_source:
+            self.source_plain = False
+        elif local == "target" and self.in_unit:
+            self.target_events = []
+            self.target_depth = 0
+            self.target_tag = name
+            self.target_attrs = attrs
+            return
+
+        # Declare the target language: on <file> in XLIFF 1.2, on the root in 2.0
+        if local == "xliff":
+            self.version = attrs.get("version", "1.2")
+        if self.target_language and self.version.startswith("2"):
+            if local == "xliff" and "trgLang" not in attrs:
+                attrs = dict(attrs.items(), trgLang=self.target_language)
+        elif self.target_language and local == "file" and "target-language" not in attrs:
+            attrs = dict(attrs.items(), **{"target-language": self.target_language})
+
+        self.out.startElement(name, attrs)
+        self.whitespace_run = ""
+
+    def endElement(self, name):
+        local = _local_name(name)
+
+        if self.target_events is not None:
+            if self.target_depth > 0:
+                self.target_depth -= 1
+                self.target_events.append(("end", name, None))
+                return
+            self._end_target()
+            return
+
+        if self.after_source:
+            self.after_source = False
+            self._emit_new_target()
+            self._flush_held()
+
+        self.out.endElement(name)
+        self.whitespace_run = ""
+        if local == "source" and self.in_source:
+            self.in_source = False
+            self.after_source = True
+        elif local in ("trans-unit", "segment"):
+            self.in_unit = False
+
+    def _end_target(self):
+        events = self.target_events
+        self.target_events = None
+        existing = "".join(text for kind, text, _ in events if kind == "chars")
+        has_markup = any(kind != "chars" for kind, _, _ in events)
+        translation = self._translation()
+
+        self.out.startElement(self.target_tag, self.target_attrs)
+        if translation is not None and (self.overwrite or (not existing.strip() and not has_markup)):
+            self.out.characters(translation)
+        else:
+            for kind, value, attrs in events:
+                if kind == "start":
+                    self.out.startElement(value, attrs)
+                elif kind == "end":
+                    self.out.endElement(value)
+                else:
+                    self.out.characters(value)
+        self.out.endElement(self.target_tag)
+
+    def characters(self, content):
+        if self.target_events is not None:
+            self.target_events.append(("chars", content, None))
+            return
+        if self.after_source:
+            self.held.append(content)
+            return
+        if self.in_source:
+            self.source_text += content
+        self.whitespace_run = self.whitespace_run + content if not content.strip() else ""
+        self.out.characters(content)
+
+    def ignorableWhitespace(self, whitespace):
+        self.characters(whitespace)
+
+    def processingInstruction(self, target, data):
+        self.out.processingInstruction(target, data)
+
+    def startDocument(self):
+        self.out.startDocument()
+
+    def endDocument(self):
+        self.out.endDocument()
+
+
+class XliffFormat:
+    """XLIFF 1.2 and 2.0: plain-text <source> elements are translated into <target>.
+
+    Units whose source contains inline markup are left untouched, as are existing
+    targets unless overwrite is set. Comments are not carried over to the output.
+    """
+
+    extensions = (".xlf", ".xliff")
+
+    def __init__(self, overwrite: bool = False, target_language: Optional[str] = None):
+        self.overwrite = overwrite
+        self.target_language = target_language
+
+    def extract(self, stream: BinaryIO) -> Iterator[str]:
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            if _local_name(elem.tag) not in ("trans-unit", "segment"):
+                continue
+            source = target = None
+            for child in elem:
+                local = _local_name(child.tag)
+                if local == "source":
+                    source = child
+                elif local == "target":
+                    target = child
+            if source is not None and len(source) == 0 and source.text and is_translatable(source.text):
+                has_target = target is not None and (len(target) > 0 or (target.text or "").strip())
+                if self.overwrite or not has_target:
+                    yield source.text
+            elem.clear()
+
+    def write(self, stream: BinaryIO, output: BinaryIO, translations: Dict[str, str]):
+        generator = XMLGenerator(output, encoding="utf-8", short_empty_elements=True)
+        parser = make_parser()
+        parser.setFeature(feature_namespaces, False)
+        parser.setFeature(feature_external_ges, False)
+        parser.setContentHandler(_XliffRewriter(generator, translations, self.target_language, self.overwrite))
+        parser.parse(stream)
+
+
+FORMATS = (JsonFormat, CsvFormat, PoFormat, XliffFormat)
+SUPPORTED_EXTENSIONS = tuple(ext for fmt in FORMATS for ext in fmt.extensions)
+
+
+def format_for_filename(filename: str, target_language: Optional[str] = None):
+    """Return a format instance for a file name, or None for plain text"""
+    extension = os.path.splitext(filename)[1].lower()
+    for fmt in FORMATS:
+        if extension in fmt.extensions:
+            return fmt(target_language=target_language) if fmt is XliffFormat else fmt()
+    return None
+
+
+def unique_strings(fmt, stream: BinaryIO) -> Tuple[List[str], Dict]:
+    """Translatable strings in a file, deduplicated and most frequent first, with dedup stats"""
+    return dedupe_by_frequency(fmt.extract(stream))
+
+
+def translate_strings(translator, strings: List[str], target_language: str,
+                      source_language: str = "auto") -> Dict[str, str]:
+    """Translate unique strings in packed batches; returns a source → translation map"""
+    if not strings:
+        return {}
+    if source_language == "auto":
+        source_language = detect_batch_language(translator, strings)
+
+    translations = {}
+    for pack in pack_texts(strings):
+        for text, translated in zip(pack, translate_batch_with_retry(translator, pack, target_language, source_language)):
+            translations[text] = translated
+    return translations
+
+
+def translate_file(translator, input_path: str, output_path: str, target_language: str,
+                   source_language: str = "auto", fmt=None) -> Dict[str, int]:
+    """Translate a structured file into output_path; returns dedup and translation counts"""
+    fmt = fmt or format_for_filename(input_path, target_language)
+    if fmt is None:
+        raise ValueError(f"Unsupported file type: {input_path}")
+
+    with open(input_path, "rb") as f:
+        strings, stats = unique_strings(fmt, f)
+
+    translations = translate_strings(translator, strings, target_language, source_language)
+
+    # Write next to the destination and rename, so a failed run leaves no partial file
+    directory = os.path.dirname(os.path.abspath(output_path))
+    with open(input_path, "rb") as f, tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as out:
+        try:
+            fmt.write(f, out, translations)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    os.replace(out.name, output_path)
+
+    stats["translated"] = len(translations)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate JSON, CSV, PO and XLIFF files, keeping their structure")
+    parser.add_argument("input", help=f"Input file ({', '.join(SUPPORTED_EXTENSIONS)})")
+    parser.add_argument("-o", "--output", required=True, help="Output file")
+    parser.add_argument("-t", "--target-language", required=True, help="Target language code, e.g. ja")
+    parser.add_argument("-s", "--source-language", default="auto", help="Source language code (default: auto)")
+    parser.add_argument("--columns", help="CSV only: comma-separated columns to translate (default: all but the first)")
+    parser.add_argument("--overwrite", action="store_true", help="PO/XLIFF only: replace existing translations")
+    args = parser.parse_args(argv)
+
+    fmt = format_for_filename(args.input, args.target_language)
+    if fmt is None:
+        parser.error(f"Unsupported file type; expected one of {', '.join(SUPPORTED_EXTENSIONS)}")
+    if isinstance(fmt, CsvFormat) and args.columns:
+        fmt.columns = args.columns.split(",")
+    if isinstance(fmt, (PoFormat, XliffFormat)):
+        fmt.overwrite = args.overwrite
+
+    # Same environment-variable configuration as the Flask app, without its workers and caches
+    from oci_translator import OCITranslator
+    translator = OCITranslator()
+    if not translator.router:
+        print("OCI client not initialized. Please check your configuration.", file=sys.stderr)
+        return 1
+
+    try:
+        stats = translate_file(translator, args.input, args.output, args.target_language,
+                               args.source_language, fmt=fmt)
+    except Exception as e:
+        print(f"Translation error: {str(e)}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Translated {stats['translated']} unique strings into {args.output} "
+        f"({stats['dedup_ratio']:.0%} duplicates, {stats['characters_saved']} characters saved)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
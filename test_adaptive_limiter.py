@@ -0,0 +1,55 @@
+from contextlib import ExitStack
+
+from adaptive_limiter import AdaptiveLimiter
+from request_scheduler import INTERACTIVE, PriorityScheduler
+
+
+def test_throttling_backs_off_multiplicatively():
+    scheduler = PriorityScheduler(limit=10)
+    limiter = AdaptiveLimiter(scheduler, min_limit=2, cooldown=0)
+
+    limiter.record(INTERACTIVE, None, throttled=True)
+    assert scheduler.limit == 7
+    for _ in range(10):
+        limiter.record(INTERACTIVE, None, throttled=True)
+    assert scheduler.limit == 2
+    assert limiter.stats()["decreases"]["throttled"] == 11
+
+
+def test_one_burst_of_throttling_counts_once_per_cooldown():
+    scheduler = PriorityScheduler(limit=10)
+    limiter = AdaptiveLimiter(scheduler, cooldown=60)
+    for _ in range(5):
+        limiter.record(INTERACTIVE, None, throttled=True)
+    assert scheduler.limit == 7
+    assert limiter.throttled == 5
+
+
+def test_idle_limit_does_not_grow():
+    scheduler = PriorityScheduler(limit=4)
+    limiter = AdaptiveLimiter(scheduler)
+    for _ in range(100):
+        limiter.record(INTERACTIVE, 0.1)
+    assert scheduler.limit == 4
+
+
+def test_busy_limit_grows_additively():
+    scheduler = PriorityScheduler(limit=4)
+    limiter = AdaptiveLimiter(scheduler)
+    with ExitStack() as slots:
+        for _ in range(4):
+            slots.enter_context(scheduler.slot())
+        for _ in range(5):
+            limiter.record(INTERACTIVE, 0.1)
+    # About one more slot per limit's worth of calls
+    assert 5.0 < limiter.limit < 5.2
+    assert scheduler.limit == 5
+
+
+def test_latency_spike_backs_off():
+    scheduler = PriorityScheduler(limit=10)
+    limiter = AdaptiveLimiter(scheduler, cooldown=0)
+    limiter.record(INTERACTIVE, 0.1)
+    limiter.record(INTERACTIVE, 1.0)
+    assert scheduler.limit == 7
+    assert limiter.stats()["decreases"]["latency"] == 1
@@ -0,0 +1,68 @@
+import threading
+
+from batch_translation import DETECTION_TEXT_CHARACTERS, PackingTuner, dedupe_by_frequency, detect_languages, pack_texts
+
+
+def test_packs_respect_document_and_character_limits():
+    packs = list(pack_texts(["aaaa", "bb", "cc", "d", "e"], max_documents=2, max_characters=6))
+    assert packs == [["aaaa", "bb"], ["cc", "d"], ["e"]]
+
+
+def test_oversized_text_gets_a_pack_of_its_own():
+    assert list(pack_texts(["a", "x" * 10, "b"], max_characters=5)) == [["a"], ["x" * 10], ["b"]]
+
+
+def test_callable_limit_is_asked_for_every_pack():
+    limits = iter([2, 4, 100])
+    packs = list(pack_texts(["aa", "bb", "cc", "dd"], max_characters=lambda: next(limits)))
+    assert packs == [["aa"], ["bb", "cc"], ["dd"]]
+
+
+def test_dedupe_orders_by_frequency_then_first_seen():
+    unique, stats = dedupe_by_frequency(["b", "a", "c", "a", "b", "a"])
+    assert unique == ["a", "b", "c"]
+    assert stats == {"texts": 6, "unique_texts": 3, "dedup_ratio": 0.5, "characters_saved": 3}
+
+
+def test_tuner_picks_the_fastest_size_within_the_slo():
+    tuner = PackingTuner(max_characters=8000, min_characters=1000, latency_slo=2.0, explore=0)
+    assert tuner.sizes == [1000, 2000, 4000, 8000]
+    for characters, latency in [(1000, 0.5), (2000, 0.6), (4000, 1.5), (8000, 3.0)]:
+        tuner.record("en", "ja", characters, latency)
+
+    # 2000 characters in 0.6 s beats 4000 in 1.5 s; 8000 misses the SLO
+    assert tuner.target("en", "ja") == 2000
+    # Unmeasured pairs start in the middle of the range
+    assert tuner.target("en", "fr") == 4000
+
+
+def test_tuner_shrinks_when_everything_is_too_slow():
+    tuner = PackingTuner(max_characters=8000, min_characters=1000, latency_slo=1.0, explore=0)
+    tuner.record("en", "ja", 4000, 5.0)
+    assert tuner.target("en", "ja") == 2000
+
+
+class FakeDetectionRouter:
+    def __init__(self):
+        self.packs = []
+        self.lock = threading.Lock()
+
+    def detect_languages(self, texts, priority=None):
+        with self.lock:
+            self.packs.append(list(texts))
+        return [("ja" if text.startswith("こ") else "en", 0.9) for text in texts]
+
+
+class FakeDetectionTranslator:
+    def __init__(self):
+        self.router = FakeDetectionRouter()
+
+
+def test_detection_sends_each_distinct_sample_once():
+    translator = FakeDetectionTranslator()
+    long_text = "Hello " * 200
+    results = detect_languages(translator, ["Hello", "こんにちは", "Hello", "  ", long_text, long_text + "more"])
+
+    assert results == [("en", 0.9), ("ja", 0.9), ("en", 0.9), ("unknown", 0.0), ("en", 0.9), ("en", 0.9)]
+    sent = [text for pack in translator.router.packs for text in pack]
+    assert sorted(sent) == sorted(["Hello", "こんにちは", long_text[:DETECTION_TEXT_CHARACTERS]])
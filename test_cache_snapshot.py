@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from cache_snapshot import CacheSnapshot, cache_entries, encode_key, save_snapshot, write_snapshot
+from live_translation import SentenceCache
+
+
+def test_snapshot_round_trip_keeps_write_times(tmp_path):
+    path = str(tmp_path / "cache.snap")
+    assert save_snapshot(path, [(("Hello", "en", "ja"), "こんにちは", 100.0), (("Bye", "en", "fr"), "Au revoir", 200.0)]) == 2
+
+    snapshot = CacheSnapshot(path)
+    try:
+        assert snapshot.get_entry(("Hello", "en", "ja")) == ("こんにちは", 100.0)
+        assert snapshot.get(("Bye", "en", "fr")) == "Au revoir"
+        assert snapshot.get(("Hello", "en", "fr")) is None
+        assert sorted(snapshot.entries()) == [(("Bye", "en", "fr"), "Au revoir", 200.0),
+                                              (("Hello", "en", "ja"), "こんにちは", 100.0)]
+    finally:
+        snapshot.close()
+
+
+def test_newest_duplicate_is_written():
+    output = io.BytesIO()
+    key = ("Hello", "en", "ja")
+    assert write_snapshot(output, [(key, "new", 200.0), (key, "old", 100.0)]) == 1
+    assert b"new" in output.getvalue() and b"old" not in output.getvalue()
+
+
+def test_cache_entries_include_snapshot_and_live_entries(tmp_path):
+    path = str(tmp_path / "cache.snap")
+    save_snapshot(path, [(("Hello", "en", "ja"), "こんにちは", 100.0)])
+    cache = SentenceCache(snapshot=CacheSnapshot(path))
+    cache.put(("Bye", "en", "ja"), "さようなら")
+
+    assert [(key, value) for key, value, _ in cache_entries(cache)] == [
+        (("Hello", "en", "ja"), "こんにちは"), (("Bye", "en", "ja"), "さようなら")
+    ]
+    cache.snapshot.close()
+
+
+def test_file_that_is_not_a_snapshot_is_refused(tmp_path):
+    path = tmp_path / "other.snap"
+    path.write_bytes(b"TCSNAP01" + bytes(8))
+    with pytest.raises(ValueError):
+        CacheSnapshot(str(path))
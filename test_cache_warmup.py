@@ -0,0 +1,57 @@
+import threading
+
+from cache_warmup import CacheWarmup, load_phrases, parse_languages
+from live_translation import SentenceCache
+
+
+class FakeRouter:
+    def __init__(self, error=None):
+        self.packs = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def translate(self, texts, target_language, source_language, priority=None):
+        if self.error:
+            raise self.error
+        with self.lock:
+            self.packs.append((target_language, list(texts)))
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+class FakeTranslator:
+    def __init__(self, router):
+        self.router = router
+
+
+def test_warmup_fills_the_cache_and_skips_cached_phrases():
+    router = FakeRouter()
+    cache = SentenceCache()
+    cache.put(("Hello", "en", "ja"), "こんにちは")
+    warmup = CacheWarmup(FakeTranslator(router), cache, ["Hello", "Thanks", "Hello"], ["ja", "en", "fr"])
+
+    warmup.start()
+    warmup.start()
+    assert warmup.wait(5)
+    assert warmup.status()["ready"] and warmup.error is None
+    assert warmup.target_languages == ["ja", "fr"]
+    assert router.packs == [("ja", ["Thanks"]), ("fr", ["Hello", "Thanks"])]
+    assert cache.get(("Hello", "en", "ja")) == "こんにちは"
+    assert cache.get(("Thanks", "en", "fr")) == "[fr] Thanks"
+    assert warmup.translated == 3
+
+
+def test_failed_warmup_still_becomes_ready():
+    warmup = CacheWarmup(FakeTranslator(FakeRouter(error=RuntimeError("no credentials"))), SentenceCache(),
+                         ["Hello"], ["ja"])
+    warmup.run()
+    assert warmup.ready
+    assert warmup.error == "Translation error: no credentials"
+
+
+def test_phrase_file_and_language_list(tmp_path):
+    path = tmp_path / "phrases.txt"
+    path.write_text("Hello\n\n  Bye  \n", encoding="utf-8")
+    assert load_phrases(str(path)) == ["Hello", "Bye"]
+    assert load_phrases(None)
+    assert parse_languages(" ja, fr,,", ["de"]) == ["ja", "fr"]
+    assert parse_languages("", ["de"]) == ["de"]
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from client_quotas import ClientQuota, FairQueue, QuotaExceeded, TokenBucket
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_bucket_admits_within_budget_and_says_when_to_retry():
+    bucket = TokenBucket(capacity=100, refill_per_second=10)
+    assert bucket.take(60) == 0.0
+    assert bucket.take(60) == pytest.approx(2.0, abs=0.1)
+
+
+def test_identify_rejects_unknown_keys():
+    queue = FairQueue(quotas={"k1": ClientQuota("acme")}, require_key=True)
+    assert queue.identify("k1", "10.0.0.1") == "key:k1"
+    assert queue.identify("nope", "10.0.0.1") is None
+    assert queue.identify(None, "10.0.0.1") is None
+
+
+def test_character_quota_is_enforced():
+    queue = FairQueue(default_quota=ClientQuota("anonymous", chars_per_minute=600))
+    queue.charge("addr:a", 600)
+    with pytest.raises(QuotaExceeded) as error:
+        queue.charge("addr:a", 100)
+    assert error.value.retry_after > 0
+
+
+def test_busy_clients_take_turns():
+    queue = FairQueue(limit=1, quantum=1000)
+    order = []
+    hold = queue.slot("addr:hold", 0)
+    hold.__enter__()
+
+    def request(client_id):
+        with queue.slot(client_id, 1000):
+            order.append(client_id)
+
+    threads = []
+    for client_id in ["addr:a"] * 3 + ["addr:b"] * 3:
+        threads.append(threading.Thread(target=request, args=(client_id,)))
+        threads[-1].start()
+        _wait_for(lambda: queue.stats()["waiting"] == len(threads))
+    hold.__exit__(None, None, None)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["addr:a", "addr:b"] * 3
+
+
+def test_idle_clients_are_forgotten():
+    queue = FairQueue(sweep_interval=0)
+    for i in range(50):
+        with queue.slot(f"addr:10.0.0.{i}", 0):
+            pass
+    queue.charge("addr:busy", 10000)
+    queue.charge("addr:other", 0)
+
+    # Only the client still refilling its bucket is kept, besides the new one
+    assert queue.stats()["clients"] == 2
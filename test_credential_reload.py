@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from credential_reload import CredentialReloader, CredentialWatcher, oci_config_key_file, read_oci_config
+
+
+class FakeBackend:
+    """OCI backend stand-in whose client build can be held or made to fail"""
+
+    def __init__(self, config):
+        self.config = config
+        self.client = "client-0"
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def build_client(self, config):
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return f"client-{config['user']}"
+
+    def use_credentials(self, config, client):
+        self.config = config
+        self.client = client
+
+
+def _config(user):
+    return {"user": user, "fingerprint": "f", "tenancy": "t", "region": "r", "key_content": "k"}
+
+
+def _wait(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_new_client_is_swapped_in_once_built():
+    backend = FakeBackend(_config("a"))
+    reloader = CredentialReloader(SimpleNamespace(backends=[backend]))
+    backend.release.clear()
+
+    assert reloader.update(_config("b"))
+    assert not reloader.update(_config("b"))
+    # Calls keep using the old client until the new one is ready
+    assert backend.client == "client-0" and reloader.stats()["pending"]
+    backend.release.set()
+    _wait(lambda: reloader.reloads == 1)
+    assert backend.client == "client-b"
+    assert reloader.config == _config("b")
+    assert not reloader.update(_config("b"))
+
+
+def test_failed_build_keeps_the_working_client():
+    backend = FakeBackend(_config("a"))
+    backend.error = RuntimeError("bad key")
+    reloader = CredentialReloader(SimpleNamespace(backends=[backend]))
+
+    assert reloader.update(_config("b"))
+    _wait(lambda: reloader.error is not None)
+    assert reloader.error == "Credential reload error: bad key"
+    assert backend.client == "client-0" and reloader.reloads == 0
+    assert not reloader.stats()["pending"]
+
+
+def test_superseded_update_is_dropped():
+    backend = FakeBackend(_config("a"))
+    reloader = CredentialReloader(SimpleNamespace(backends=[backend]))
+    backend.release.clear()
+    reloader.update(_config("b"))
+    reloader.update(_config("c"))
+    backend.release.set()
+
+    _wait(lambda: reloader.reloads == 1)
+    time.sleep(0.05)
+    assert backend.client == "client-c" and reloader.reloads == 1
+
+
+def test_incomplete_config_is_ignored():
+    reloader = CredentialReloader(SimpleNamespace(backends=[FakeBackend(_config("a"))]))
+    assert not reloader.update(dict(_config("b"), key_content=""))
+    assert not CredentialReloader(SimpleNamespace(backends=[object()])).update(_config("b"))
+
+
+def _write_config(tmp_path, user="a", key="KEY"):
+    key_file = tmp_path / "key.pem"
+    key_file.write_text(key)
+    config_file = tmp_path / "config"
+    config_file.write_text(
+        f"[DEFAULT]\nuser={user}\nfingerprint=f\ntenancy=t\nregion=r\nkey_file={key_file}\n"
+    )
+    return str(config_file), str(key_file)
+
+
+def test_read_oci_config_reads_the_key_file(tmp_path):
+    config_file, key_file = _write_config(tmp_path)
+    assert read_oci_config(config_file) == dict(_config("a"), key_content="KEY")
+    assert oci_config_key_file(config_file) == key_file
+
+
+def test_watcher_reloads_when_a_file_changes(tmp_path):
+    config_file, key_file = _write_config(tmp_path)
+    backend = FakeBackend(read_oci_config(config_file))
+    reloader = CredentialReloader(SimpleNamespace(backends=[backend]))
+    watcher = CredentialWatcher(lambda: read_oci_config(config_file), lambda: [config_file, key_file], reloader)
+    assert not watcher.check()
+
+    _write_config(tmp_path, user="b", key="NEW")
+    stat = os.stat(key_file)
+    os.utime(key_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert watcher.check()
+    _wait(lambda: reloader.reloads == 1)
+    assert backend.config["key_content"] == "NEW"
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+import deadlines
+from deadlines import DeadlineExceeded, parse_timeout, request_deadline
+from translation_backends import BackendRouter, MockBackend
+
+
+def test_nested_deadline_never_extends_the_outer_one():
+    assert deadlines.remaining() is None
+    with request_deadline(1.0):
+        with request_deadline(60.0):
+            assert deadlines.remaining() <= 1.0
+        with request_deadline(0.1):
+            assert deadlines.remaining() <= 0.1
+    assert deadlines.remaining() is None
+
+
+def test_check_refuses_to_start_work_without_budget():
+    with request_deadline(0.0):
+        with pytest.raises(DeadlineExceeded):
+            deadlines.check("translation")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, 10.0), ("2.5", 2.5), ("60", 10.0), ("-1", 0.0), ("soon", 10.0),
+    ("nan", 10.0), ("inf", 10.0), ("-inf", 10.0),
+])
+def test_parse_timeout_is_capped(header, expected):
+    assert parse_timeout(header, default=10.0) == expected
+
+
+def test_slow_backend_call_is_abandoned_at_the_deadline():
+    router = BackendRouter([MockBackend(latency=1.0)], explore=0)
+    started = time.monotonic()
+    with request_deadline(0.1):
+        with pytest.raises(DeadlineExceeded):
+            router.translate(["hi"], "ja", "en")
+    assert time.monotonic() - started < 0.5
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline():
+    router = BackendRouter([MockBackend()], explore=0)
+    router.scheduler.set_limit(1)
+    with router.scheduler.slot():
+        with request_deadline(0.1):
+            with pytest.raises(DeadlineExceeded):
+                router.translate(["hi"], "ja", "en")
+
+
+def test_abandoned_call_gives_back_its_slot():
+    router = BackendRouter([MockBackend(latency=1.0)], explore=0)
+    router.scheduler.set_limit(1)
+    with request_deadline(0.1):
+        with pytest.raises(DeadlineExceeded):
+            router.translate(["hi"], "ja", "en")
+
+    # The abandoned call is still running, but a live request gets the slot
+    assert router.scheduler.in_flight() == 0
+    with router.scheduler.slot(timeout=0.1):
+        pass
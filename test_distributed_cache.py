@@ -0,0 +1,157 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cache_snapshot import encode_key
+from distributed_cache import (
+    MAX_FRAME_BYTES, OP_GET, OP_PUT, CacheNodeClient, CacheNodeServer, DistributedCache, HashRing, main
+)
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distributed_cache.py")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Node:
+    """A cache node in its own process"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.address = f"127.0.0.1:{port}"
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, SCRIPT, "serve", "--host", "127.0.0.1", "--port", str(self.port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"cache node on {self.address} did not start")
+
+    def stop(self):
+        self.process.kill()
+        self.process.wait()
+
+
+@pytest.fixture
+def nodes():
+    started = [Node(_free_port()).start() for _ in range(3)]
+    yield started
+    for node in started:
+        if node.process.poll() is None:
+            node.stop()
+
+
+def _keys(count: int):
+    return [(f"sentence {i}", "en", "ja") for i in range(count)]
+
+
+def _held_by(node: Node, key) -> bool:
+    return CacheNodeClient(node.address, timeout=1.0).request(OP_GET, encode_key(key)) is not None
+
+
+def test_ring_moves_only_the_removed_nodes_keys():
+    keys = [encode_key(key) for key in _keys(1000)]
+    before = HashRing(["a:1", "b:1", "c:1"])
+    after = HashRing(["a:1", "b:1"])
+    moved = [key for key in keys if before.nodes_for(key)[0] != after.nodes_for(key)[0]]
+    assert moved and all(before.nodes_for(key)[0] == "c:1" for key in moved)
+
+
+def test_each_key_is_stored_on_its_owner(nodes):
+    cache = DistributedCache([node.address for node in nodes], timeout=1.0)
+    for key in _keys(60):
+        cache.put(key, f"<{key[0]}>")
+
+    by_address = {node.address: node for node in nodes}
+    for key in _keys(60):
+        owner = cache.ring.nodes_for(encode_key(key))[0]
+        assert [address for address, node in by_address.items() if _held_by(node, key)] == [owner]
+        assert cache.get(key) == f"<{key[0]}>"
+    assert all(any(cache.ring.nodes_for(encode_key(key))[0] == node.address for key in _keys(60)) for node in nodes)
+
+
+def test_replicas_survive_a_node_going_down_and_it_rejoins(nodes):
+    cache = DistributedCache([node.address for node in nodes], replicas=2, timeout=0.5, retry_after=0.2)
+    for key in _keys(30):
+        cache.put(key, f"<{key[0]}>")
+
+    down = nodes[0]
+    down.stop()
+    assert all(cache.get(key) == f"<{key[0]}>" for key in _keys(30))
+    assert not cache.clients[down.address].available
+
+    down.start()
+    time.sleep(0.3)
+    assert cache.clients[down.address].available
+    key = next(key for key in _keys(100) if down.address in cache.ring.nodes_for(encode_key(key), 2))
+    cache.put(key, "again")
+    assert _held_by(down, key)
+
+
+def test_oversized_value_is_skipped_without_marking_the_node_down(nodes):
+    cache = DistributedCache([nodes[0].address], timeout=1.0)
+    cache.put(("big", "en", "ja"), "x" * MAX_FRAME_BYTES)
+
+    assert cache.clients[nodes[0].address].available
+    assert cache.get(("big", "en", "ja")) is None
+    cache.put(("small", "en", "ja"), "ok")
+    assert cache.get(("small", "en", "ja")) == "ok"
+
+
+@pytest.fixture
+def signed_node():
+    server = CacheNodeServer(("127.0.0.1", 0), secret=b"shared")
+    server.start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_node_with_a_secret_refuses_unsigned_writes(signed_node):
+    key = ("Hello", "en", "ja")
+    DistributedCache([signed_node], timeout=1.0).put(key, "<script>")
+    DistributedCache([signed_node], timeout=1.0, secret=b"wrong").put(key, "<script>")
+    signed = DistributedCache([signed_node], timeout=1.0, secret=b"shared")
+    assert signed.get(key) is None
+
+    signed.put(key, "こんにちは")
+    assert signed.get(key) == "こんにちは"
+    assert signed.stats()["hits"] == 1 and signed.stats()["misses"] == 1
+
+
+def test_unsigned_entries_are_not_served_to_hosts_with_a_secret(signed_node):
+    key = ("Hello", "en", "ja")
+    # A node without the secret accepts anything; the reading host still checks
+    server = CacheNodeServer(("127.0.0.1", 0))
+    server.start()
+    try:
+        address = f"127.0.0.1:{server.server_address[1]}"
+        CacheNodeClient(address, timeout=1.0).request(OP_PUT, encode_key(key), b"\0" * 40 + b"forged")
+        assert DistributedCache([address], timeout=1.0, secret=b"shared").get(key) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_listens_on_loopback_by_default(monkeypatch):
+    served = []
+    monkeypatch.setattr(CacheNodeServer, "serve_forever", lambda self: served.append(self.server_address))
+    monkeypatch.delenv("TRANSLATION_CACHE_SECRET", raising=False)
+    port = _free_port()
+    assert main(["serve", "--port", str(port)]) == 0
+    assert served == [("127.0.0.1", port)]
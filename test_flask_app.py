@@ -0,0 +1,154 @@
+import importlib
+import time
+
+import pytest
+
+from cache_snapshot import MAGIC
+
+
+@pytest.fixture(scope="module")
+def flask_app(tmp_path_factory):
+    # The app reads its configuration at import
+    directory = tmp_path_factory.mktemp("flask_app")
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("TRANSLATION_BACKEND", "mock")
+        env.setenv("TRANSLATION_MOCK_LATENCY", "0")
+        env.setenv("TRANSLATION_JOB_DB", str(directory / "jobs.sqlite3"))
+        env.setenv("TRANSLATION_CACHE_SNAPSHOT", str(directory / "cache.snap"))
+        env.delenv("TRANSLATION_CACHE_NODES", raising=False)
+        yield importlib.import_module("flask_app")
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.app.test_client()
+
+
+def test_snapshot_is_refused_without_a_configured_admin_key(flask_app, client, monkeypatch):
+    monkeypatch.setattr(flask_app, "ADMIN_KEY", None)
+    assert client.get("/cache/snapshot", headers={"X-Admin-Key": ""}).status_code == 403
+
+
+def test_snapshot_needs_the_admin_key(flask_app, client, monkeypatch):
+    monkeypatch.setattr(flask_app, "ADMIN_KEY", "secret")
+    assert client.get("/cache/snapshot").status_code == 401
+    assert client.get("/cache/snapshot", headers={"X-Admin-Key": "wrong"}).status_code == 401
+
+    response = client.get("/cache/snapshot", headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
+    assert response.data.startswith(MAGIC)
+
+
+class FakeDiagnostics:
+    def report(self, top):
+        return {"top": top}
+
+    def take_baseline(self):
+        return {"baseline": True}
+
+
+def test_memory_diagnostics_need_the_admin_key(flask_app, client, monkeypatch):
+    monkeypatch.setattr(flask_app, "ADMIN_KEY", "secret")
+    monkeypatch.setattr(flask_app, "memory_diagnostics", FakeDiagnostics())
+    assert client.get("/health/memory").status_code == 401
+    assert client.post("/health/memory/baseline").status_code == 401
+
+    headers = {"X-Admin-Key": "secret"}
+    assert client.get("/health/memory?top=5", headers=headers).get_json() == {"top": 5}
+    assert client.post("/health/memory/baseline", headers=headers).get_json() == {"baseline": True}
+
+
+def _finished_job(client, texts):
+    response = client.post("/jobs", json={"texts": texts, "source_language": "en", "target_language": "ja"})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    deadline = time.monotonic() + 10
+    while client.get(f"/jobs/{job_id}").get_json()["status"] != "done":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return job_id
+
+
+def test_jobs_reject_bad_input(client):
+    assert client.post("/jobs", json={"texts": []}).status_code == 400
+    assert client.post("/jobs", json={"texts": ["ok", 3]}).status_code == 400
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.get("/jobs/unknown/results").status_code == 404
+
+
+def test_job_results_are_paged_in_input_order(client):
+    job_id = _finished_job(client, ["one", "two", "", "one"])
+    job = client.get(f"/jobs/{job_id}").get_json()
+    assert (job["total"], job["completed"], job["progress"]) == (4, 4, 1.0)
+
+    first = client.get(f"/jobs/{job_id}/results?limit=2").get_json()
+    assert [item["translation"] for item in first["items"]] == ["[ja] one", "[ja] two"]
+    rest = client.get(f"/jobs/{job_id}/results?offset={first['next_offset']}&limit=2").get_json()
+    assert [item["translation"] for item in rest["items"]] == ["", "[ja] one"]
+
+
+def test_job_export_streams_csv(client):
+    job_id = _finished_job(client, ["a,b", "c"])
+    response = client.get(f"/jobs/{job_id}/export")
+    assert response.headers["Content-Disposition"] == "attachment; filename=translations.csv"
+    assert response.get_data(as_text=True).splitlines() == ["line,source,translation", '1,"a,b","[ja] a,b"', "2,c,[ja] c"]
+    assert client.get(f"/jobs/{job_id}/export?format=xml").status_code == 400
+
+
+def test_jobs_are_hidden_from_other_clients(client):
+    job_id = _finished_job(client, ["one"])
+    assert "owner" not in client.get(f"/jobs/{job_id}").get_json()
+    other = {"REMOTE_ADDR": "192.0.2.1"}
+    for path in ("", "/results", "/export", "/events"):
+        response = client.get(f"/jobs/{job_id}{path}", environ_base=other)
+        assert response.status_code == 404
+        assert response.get_json() == {"error": "Unknown job"}
+
+
+def test_oversized_translate_body_is_refused(flask_app, client):
+    body = b"x" * (flask_app.MAX_CONTENT_LENGTH + 1)
+    response = client.post("/translate", data=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+    assert "error" in response.get_json()
+
+
+def test_translate_can_leave_out_the_original_text(client):
+    body = {"text": "Hello.", "source_language": "en", "target_language": "ja", "include_original_text": False}
+    data = client.post("/translate", json=body).get_json()
+    assert data["translated_text"] == "[ja] Hello."
+    assert "original_text" not in data
+
+
+def test_live_session_streams_sentence_events(client):
+    session_id = client.post("/live", json={"text": "One. Two.", "source_language": "en"}).get_json()["session_id"]
+    response = client.get(f"/live/{session_id}/events", buffered=False)
+    events = []
+    for chunk in response.response:
+        chunk = chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        events += [line[len("event: "):] for line in chunk.splitlines() if line.startswith("event: ")]
+        if "done" in events:
+            break
+    response.close()
+    client.delete(f"/live/{session_id}")
+
+    assert response.mimetype == "text/event-stream"
+    assert events.count("sentence") == 2
+
+
+def test_live_delta_against_an_old_version_is_refused(client):
+    session_id = client.post("/live", json={"text": "One.", "source_language": "en"}).get_json()["session_id"]
+    response = client.post(f"/live/{session_id}", json={"base_version": 99, "offset": 0, "insert": "x"})
+    assert response.status_code == 409
+    assert "version" in response.get_json()
+    client.delete(f"/live/{session_id}")
+    assert client.post(f"/live/{session_id}", json={"text": "Two."}).status_code == 404
+
+
+def test_live_sessions_are_hidden_from_other_clients(client):
+    session_id = client.post("/live", json={"text": "One.", "source_language": "en"}).get_json()["session_id"]
+    other = {"REMOTE_ADDR": "192.0.2.1"}
+    assert client.get(f"/live/{session_id}/events", environ_base=other).status_code == 404
+    assert client.post(f"/live/{session_id}", json={"text": "Two."}, environ_base=other).status_code == 404
+    assert client.delete(f"/live/{session_id}", environ_base=other).status_code == 404
+    assert client.post(f"/live/{session_id}", json={"text": "Two."}).status_code == 200
+    client.delete(f"/live/{session_id}")
@@ -0,0 +1,114 @@
+import os
+import time
+
+from glossary import Glossary, GlossaryWatcher, load_glossary
+from live_translation import SentenceCache
+
+
+def _matched(glossary, text):
+    return [text[start:end] for start, end, _ in glossary.find(text)]
+
+
+def test_find_prefers_leftmost_longest_whole_words():
+    glossary = Glossary({"JWT": {}, "JWT token": {}, "token": {}, "Oracle Cloud": {}})
+    assert _matched(glossary, "Send the jwt token to oracle cloud.") == ["jwt token", "oracle cloud"]
+    assert _matched(glossary, "JWTs and tokens") == []
+
+
+def test_find_uses_fail_links_across_overlapping_terms():
+    glossary = Glossary({"new york city": {}, "york": {}})
+    assert _matched(glossary, "From New York to York") == ["York", "York"]
+    assert _matched(glossary, "New York City") == ["New York City"]
+
+
+def test_protect_and_restore():
+    glossary = Glossary({"JWT token": {"ja": "JWTトークン"}, "Oracle": {}})
+    protected, replacements = glossary.protect("Oracle issues a JWT token.", "ja")
+
+    assert protected == "[[G0]] issues a [[G1]]."
+    assert replacements == ["Oracle", "JWTトークン"]
+    # Backends sometimes add spaces inside the brackets
+    assert Glossary.restore("[[ G0 ]]が[[G1]]を発行します。", replacements) == "OracleがJWTトークンを発行します。"
+
+
+def _write(path, text, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_glossary_reads_language_columns(tmp_path):
+    path = tmp_path / "glossary.csv"
+    _write(path, "term,ja,es\nOracle Cloud,,\nJWT token,JWTトークン,token JWT\n", time.time())
+    glossary = load_glossary(str(path))
+    assert glossary.terms == ["Oracle Cloud", "JWT token"]
+    assert glossary.targets[1] == {"ja": "JWTトークン", "es": "token JWT"}
+
+
+def test_glossary_change_invalidates_cached_translations(tmp_path):
+    path = tmp_path / "glossary.csv"
+    _write(path, "term,ja\nJWT,JWT\n", time.time() - 60)
+    watcher = GlossaryWatcher(str(path), check_interval=0)
+    cache = SentenceCache(glossary=watcher)
+    key = ("A JWT.", "en", "ja")
+    cache.put(key, "old")
+    assert cache.get(key) == "old"
+
+    _write(path, "term,ja\nJWT,JWTトークン\n", time.time() + 1)
+    deadline = time.monotonic() + 5
+    while cache.get(key) is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert cache.entries() == []
+    assert watcher.current().targets[0] == {"ja": "JWTトークン"}
+
+
+class FakeTier:
+    """Remote tier keeping write times only"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get_entry(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value, written_at):
+        self.entries[key] = (value, written_at)
+
+
+def test_translation_written_before_the_reload_is_dropped(tmp_path):
+    path = tmp_path / "glossary.csv"
+    _write(path, "term,ja\nJWT,JWT\n", time.time() - 60)
+    # Reloads only when the test asks for one
+    watcher = GlossaryWatcher(str(path), check_interval=3600)
+    remote = FakeTier()
+    cache = SentenceCache(glossary=watcher, remote=remote)
+    watcher.current()
+    key = ("A JWT.", "en", "ja")
+
+    # The file changes, but a translation made before the watcher notices still uses the old terms
+    _write(path, "term,ja\nJWT,JWTトークン\n", time.time() - 1)
+    assert cache.fetch(key, lambda: "old") == ("old", False)
+    watcher._reload()
+
+    assert cache.get(key) is None
+    assert cache.entries() == []
+
+
+def test_translation_started_before_the_reload_is_dropped(tmp_path):
+    path = tmp_path / "glossary.csv"
+    _write(path, "term,ja\nJWT,JWT\n", time.time() - 60)
+    watcher = GlossaryWatcher(str(path), check_interval=3600)
+    cache = SentenceCache(glossary=watcher, remote=FakeTier())
+    watcher.current()
+    key = ("A JWT.", "en", "ja")
+
+    def translate_during_reload():
+        _write(path, "term,ja\nJWT,JWTトークン\n", time.time())
+        watcher._reload()
+        return "old"
+
+    assert cache.fetch(key, translate_during_reload) == ("old", False)
+    assert cache.get(key) is None
+    cache.put(key, "new")
+    assert cache.get(key) == "new"
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+from flask import Flask
+
+from json_codec import FastJSONProvider, orjson
+
+
+@pytest.fixture
+def provider():
+    return FastJSONProvider(Flask(__name__))
+
+
+def test_round_trip_matches_the_standard_library(provider):
+    value = {"text": "こんにちは \"world\"\n", "items": [1, 2.5, None, True], "nested": {"a": []}}
+    assert json.loads(provider.dumps(value)) == value
+    assert provider.loads(json.dumps(value)) == value
+
+
+def test_non_ascii_is_sent_as_utf8(provider):
+    assert "こんにちは" in provider.dumps({"text": "こんにちは"})
+
+
+def test_values_orjson_rejects_fall_back(provider):
+    big = 2 ** 70
+    assert json.loads(provider.dumps({"n": big})) == {"n": big}
+    assert provider.loads('{"n": %d}' % big) == {"n": big}
+
+
+def test_invalid_json_still_fails(provider):
+    with pytest.raises(ValueError):
+        provider.loads("{not json")
+
+
+def test_codec_reports_the_backend(provider):
+    assert provider.codec == ("json" if orjson is None else "orjson")
@@ -0,0 +1,217 @@
+import threading
+import time
+
+import pytest
+
+from deadlines import DeadlineExceeded, request_deadline
+from live_translation import LiveTranslationSession, SentenceCache, split_sentences, translate_by_sentence
+
+
+class FakeTranslator:
+    """Records each batch it is asked to translate"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def detect_language(self, text):
+        return "en"
+
+    def translate_texts(self, texts, target_language, source_language):
+        with self.lock:
+            self.batches.append(list(texts))
+        if self.error:
+            return [self.error] * len(texts)
+        return [f"<{text}>" for text in texts]
+
+
+def test_split_sentences_keeps_text():
+    text = "One. Two!\nThree? 四。"
+    assert "".join(split_sentences(text)) == text
+
+
+def test_misses_go_in_one_batch():
+    translator = FakeTranslator()
+    cache = SentenceCache()
+    translation, stats = translate_by_sentence(translator, "One. Two. Three.", "ja", "en", cache=cache)
+
+    assert translation == "<One.> <Two.> <Three.>"
+    assert translator.batches == [["One.", "Two.", "Three."]]
+    assert stats["misses"] == 3
+
+
+def test_only_changed_sentences_are_sent():
+    translator = FakeTranslator()
+    cache = SentenceCache()
+    translate_by_sentence(translator, "One. Two. Three.", "ja", "en", cache=cache)
+    translation, stats = translate_by_sentence(translator, "One. Deux. Three. Four.", "ja", "en", cache=cache)
+
+    assert translation == "<One.> <Deux.> <Three.> <Four.>"
+    assert translator.batches[-1] == ["Deux.", "Four."]
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_repeated_sentence_is_sent_once():
+    translator = FakeTranslator()
+    translate_by_sentence(translator, "Hi. Hi. Hi.", "ja", "en", cache=SentenceCache())
+    assert translator.batches == [["Hi."]]
+
+
+def test_errors_are_returned_and_not_cached():
+    cache = SentenceCache()
+    translation, _ = translate_by_sentence(FakeTranslator(error="Translation error: down"), "One. Two.", "ja", "en", cache=cache)
+    assert translation == "Translation error: down"
+    assert len(cache) == 0
+
+
+def test_live_session_translates_a_version_in_one_batch():
+    translator = FakeTranslator()
+    session = LiveTranslationSession(translator, "ja", "en", debounce_seconds=0.0)
+    try:
+        session.set_text("One. Two.")
+        events = []
+        while not events or events[-1]["type"] != "done":
+            event = session.next_event(timeout=5)
+            assert event is not None
+            events.append(event)
+    finally:
+        session.close()
+
+    assert [e["translation"] for e in events if e["type"] == "sentence"] == ["<One.>", "<Two.>"]
+    assert translator.batches == [["One.", "Two."]]
+
+
+class FakeTier:
+    """Snapshot or remote tier holding fixed entries"""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_entry(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value, written_at):
+        self.entries[key] = (value, written_at)
+
+
+def test_expired_entry_is_not_revived_from_a_tier():
+    key = ("One.", "en", "ja")
+    written_at = time.time() - 100
+    cache = SentenceCache(snapshot=FakeTier({key: ("old", written_at)}), soft_ttl=10, hard_ttl=50)
+    cache._store(key, "old", written_at, 0)
+
+    assert cache.fetch(key, lambda: "new") == ("new", False)
+    assert cache.get(key) == "new"
+
+
+def test_tier_entries_keep_their_age():
+    key = ("One.", "en", "ja")
+    cache = SentenceCache(remote=FakeTier({key: ("shared", time.time() - 30)}), soft_ttl=10, hard_ttl=50,
+                          revalidate_wait=5)
+    # Stale on the remote tier, so it is refreshed rather than served as new
+    assert cache.fetch(key, lambda: "fresh") == ("fresh", False)
+
+
+def test_older_write_does_not_replace_a_newer_one():
+    key = ("One.", "en", "ja")
+    cache = SentenceCache()
+    cache._store(key, "new", time.time(), 0)
+    assert cache._store(key, "old", time.time() - 60, 0)[0] == "new"
+    assert cache.get(key) == "new"
+
+
+def test_stale_entry_is_served_when_refresh_fails():
+    key = ("One.", "en", "ja")
+    cache = SentenceCache(soft_ttl=10, hard_ttl=50, revalidate_wait=5)
+    cache._store(key, "old", time.time() - 20, 0)
+
+    assert cache.fetch(key, lambda: "Translation error: down") == ("old", True)
+    assert cache.stale_served == 1
+    assert cache.fetch(key, lambda: "new") == ("new", False)
+
+
+def _owner_in_flight(cache, key, translate):
+    """Start a fetch on another thread and return once it owns the key"""
+    thread = threading.Thread(target=lambda: _swallow(lambda: cache.fetch(key, translate)))
+    thread.start()
+    while key not in cache._in_flight:
+        time.sleep(0.001)
+    return thread
+
+
+def _swallow(call):
+    try:
+        call()
+    except Exception:
+        pass
+
+
+def test_waiter_gives_up_at_its_deadline():
+    key = ("One.", "en", "ja")
+    cache = SentenceCache()
+    release = threading.Event()
+    owner = _owner_in_flight(cache, key, lambda: release.wait() and "<One.>")
+    try:
+        started = time.monotonic()
+        with request_deadline(0.1):
+            with pytest.raises(DeadlineExceeded):
+                cache.fetch(key, lambda: "unused")
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        owner.join()
+
+
+def test_waiter_retries_when_the_owner_ran_out_of_time():
+    key = ("One.", "en", "ja")
+    cache = SentenceCache()
+    release = threading.Event()
+
+    def owner_translate():
+        release.wait()
+        raise DeadlineExceeded()
+
+    owner = _owner_in_flight(cache, key, owner_translate)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(cache.fetch_many([key], lambda texts: ["<One.>"])))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    owner.join()
+    waiter.join(5)
+    assert results == [[("<One.>", False)]]
+
+
+def test_short_translation_result_fails_every_waiter():
+    keys = [("One.", "en", "ja"), ("Two.", "en", "ja")]
+    cache = SentenceCache()
+    release = threading.Event()
+
+    def short_translate(texts):
+        release.wait()
+        return ["<One.>"]
+
+    owner_error = []
+    owner = threading.Thread(target=lambda: _record_error(owner_error, lambda: cache.fetch_many(keys, short_translate)))
+    owner.start()
+    while keys[1] not in cache._in_flight:
+        time.sleep(0.001)
+    waiter_error = []
+    waiter = threading.Thread(target=lambda: _record_error(waiter_error, lambda: cache.fetch(keys[1], lambda: None)))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert not owner.is_alive() and not waiter.is_alive()
+    assert isinstance(owner_error[0], ValueError) and isinstance(waiter_error[0], ValueError)
+    assert cache._in_flight == {} and len(cache) == 0
+
+
+def _record_error(errors, call):
+    try:
+        call()
+    except Exception as e:
+        errors.append(e)
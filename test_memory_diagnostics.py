@@ -0,0 +1,47 @@
+import tracemalloc
+
+import pytest
+
+from memory_diagnostics import MemoryDiagnostics, deep_sizeof, diagnostics_from_env
+
+
+@pytest.fixture
+def diagnostics():
+    diagnostics = MemoryDiagnostics()
+    diagnostics.start()
+    yield diagnostics
+    tracemalloc.stop()
+
+
+def test_deep_sizeof_counts_contents_once():
+    text = "x" * 1000
+    assert deep_sizeof([text]) > 1000
+    assert deep_sizeof([text, text]) < 2 * deep_sizeof([text])
+    cycle = []
+    cycle.append(cycle)
+    assert deep_sizeof(cycle) > 0
+
+
+def test_report_includes_subsystems_and_their_errors(diagnostics):
+    diagnostics.register("cache", lambda: {"entries": 3})
+    diagnostics.register("broken", lambda: 1 / 0)
+    report = diagnostics.report()
+
+    assert report["subsystems"]["cache"] == {"entries": 3}
+    assert "error" in report["subsystems"]["broken"]
+    assert report["top"] and "growth" not in report
+
+
+def test_growth_since_baseline_is_reported(diagnostics):
+    diagnostics.take_baseline()
+    kept = [str(i) * 100 for i in range(2000)]
+    growth = diagnostics.report(top=5)["growth"]
+
+    assert len(growth) <= 5
+    assert growth[0]["bytes_diff"] > 100000
+    assert kept
+
+
+def test_diagnostics_are_off_by_default(monkeypatch):
+    monkeypatch.delenv("TRANSLATION_MEMORY_DIAGNOSTICS", raising=False)
+    assert diagnostics_from_env() is None
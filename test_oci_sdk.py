@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _loaded_modules(tmp_path, code):
+    env = dict(os.environ, TRANSLATION_BACKEND="mock", TRANSLATION_JOB_DB=str(tmp_path / "jobs.sqlite3"),
+               PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", code + "\nimport sys\nprint(' '.join(sys.modules))"],
+                            cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return set(result.stdout.split())
+
+
+def test_flask_app_starts_without_importing_oci(tmp_path):
+    modules = _loaded_modules(tmp_path, "import flask_app\nflask_app.app.test_client().get('/health')")
+    assert "flask_app" in modules
+    assert "oci" not in modules
+
+
+def test_entry_point_modules_do_not_import_oci(tmp_path):
+    modules = _loaded_modules(tmp_path, "import oci_sdk, translation_backends, batch_translation, translate_cli")
+    assert "oci" not in modules
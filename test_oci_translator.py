@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run_cli(tmp_path, module, *args):
+    env = dict(os.environ, TRANSLATION_BACKEND="mock", PYTHONPATH=ROOT)
+    code = (
+        f"import sys, {module}\n"
+        f"status = {module}.main(sys.argv[1:])\n"
+        "assert 'flask_app' not in sys.modules, 'CLI imported the web app'\n"
+        "sys.exit(status)\n"
+    )
+    return subprocess.run([sys.executable, "-c", code, *args], cwd=tmp_path, env=env,
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_translate_cli_does_not_start_the_web_app(tmp_path):
+    (tmp_path / "in.txt").write_text("Hello\nWorld\n", encoding="utf-8")
+    result = _run_cli(tmp_path, "translate_cli", "in.txt", "-t", "ja", "-s", "en", "-o", "out.txt")
+
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8").splitlines() == ["[ja] Hello", "[ja] World"]
+    # No job store or other server state is created in the working directory
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.txt", "out.txt"]
+
+
+def test_structured_formats_cli_does_not_start_the_web_app(tmp_path):
+    (tmp_path / "in.json").write_text('{"greeting": "Hello"}', encoding="utf-8")
+    result = _run_cli(tmp_path, "structured_formats", "in.json", "-t", "ja", "-s", "en", "-o", "out.json")
+
+    assert result.returncode == 0, result.stderr
+    assert "[ja] Hello" in (tmp_path / "out.json").read_text(encoding="utf-8")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.json", "out.json"]
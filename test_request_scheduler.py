@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from request_scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.002)
+
+
+def test_limit_is_enforced():
+    scheduler = PriorityScheduler(limit=1)
+    with scheduler.slot():
+        with pytest.raises(TimeoutError):
+            with scheduler.slot(timeout=0.05):
+                pass
+    assert scheduler.in_flight() == 0
+
+
+def test_bulk_cap_keeps_slots_for_interactive_calls():
+    scheduler = PriorityScheduler(limit=4, caps={BULK: 1})
+    with scheduler.slot(BULK):
+        with pytest.raises(TimeoutError):
+            with scheduler.slot(BULK, timeout=0.05):
+                pass
+        with scheduler.slot(INTERACTIVE, timeout=0.05):
+            assert scheduler.stats()["running"] == {INTERACTIVE: 1, BULK: 1}
+
+
+def test_default_bulk_cap_follows_the_current_limit():
+    scheduler = PriorityScheduler(limit=8)
+    with scheduler.slot(BULK), scheduler.slot(BULK):
+        scheduler.set_limit(4)
+        with pytest.raises(TimeoutError):
+            with scheduler.slot(BULK, timeout=0.05):
+                pass
+        scheduler.set_limit(16)
+        with scheduler.slot(BULK, timeout=0.05), scheduler.slot(BULK, timeout=0.05):
+            assert scheduler.stats()["running"][BULK] == 4
+
+
+def test_interactive_calls_get_eight_turns_per_bulk_turn():
+    scheduler = PriorityScheduler(limit=1)
+    order = []
+
+    def call(priority):
+        with scheduler.slot(priority):
+            order.append(priority)
+
+    hold = scheduler.slot(INTERACTIVE)
+    hold.__enter__()
+    threads = []
+    for priority in [BULK] * 2 + [INTERACTIVE] * 9:
+        threads.append(threading.Thread(target=call, args=(priority,)))
+        threads[-1].start()
+        _wait_for(lambda: sum(scheduler.stats()["waiting"].values()) == len(threads))
+    hold.__exit__(None, None, None)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [BULK] + [INTERACTIVE] * 8 + [BULK, INTERACTIVE]
+
+
+def test_raising_the_limit_admits_waiters():
+    scheduler = PriorityScheduler(limit=1)
+    admitted = threading.Event()
+
+    def call():
+        with scheduler.slot(timeout=5):
+            admitted.set()
+
+    with scheduler.slot():
+        thread = threading.Thread(target=call)
+        thread.start()
+        _wait_for(lambda: scheduler.stats()["waiting"][INTERACTIVE] == 1)
+        scheduler.set_limit(2)
+        assert admitted.wait(5)
+    thread.join(5)
+
+
+def test_slot_released_early_is_only_given_back_once():
+    scheduler = PriorityScheduler(limit=1)
+    with scheduler.slot() as release:
+        release()
+        assert scheduler.in_flight() == 0
+        release()
+    assert scheduler.in_flight() == 0
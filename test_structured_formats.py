@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from structured_formats import CsvFormat, JsonFormat, PoFormat, XliffFormat, format_for_filename, unique_strings
+
+
+def _round_trip(fmt, source: str):
+    strings = list(fmt.extract(io.BytesIO(source.encode("utf-8"))))
+    output = io.BytesIO()
+    fmt.write(io.BytesIO(source.encode("utf-8")), output, {text: f"<{text}>" for text in strings})
+    return strings, output.getvalue().decode("utf-8")
+
+
+def test_json_replaces_values_and_keeps_layout():
+    source = '{\n  "title": "Hello",\n  "count": 3,\n  "items": ["One", "https://example.com"],\n  "esc": "a\\"b"\n}\n'
+    strings, output = _round_trip(JsonFormat(), source)
+
+    assert strings == ["Hello", "One", 'a"b']
+    assert output == '{\n  "title": "<Hello>",\n  "count": 3,\n  "items": ["<One>", "https://example.com"],\n  "esc": "<a\\"b>"\n}\n'
+
+
+def test_csv_translates_all_but_the_key_column():
+    source = "key,text,note\ngreeting,Hello,Say hi\nfarewell,\"Bye, now\",\n"
+    strings, output = _round_trip(CsvFormat(), source)
+
+    assert strings == ["Hello", "Say hi", "Bye, now"]
+    assert "greeting,<Hello>,<Say hi>" in output
+    assert '"<Bye, now>"' in output
+
+
+def test_csv_quoted_header_with_a_newline_keeps_crlf_rows():
+    source = 'key,"long\ntext"\r\ngreeting,Hello\r\n'
+    strings, output = _round_trip(CsvFormat(), source)
+
+    assert strings == ["Hello"]
+    assert output == 'key,"long\ntext"\r\ngreeting,<Hello>\r\n'
+
+
+def test_po_fills_empty_msgstr_only():
+    source = (
+        'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+        '#: app.py:1\nmsgid "Hello"\nmsgstr ""\n\n'
+        'msgid "Done"\nmsgstr "Fertig"\n'
+    )
+    strings, output = _round_trip(PoFormat(), source)
+
+    assert strings == ["Hello"]
+    assert 'msgid "Hello"\nmsgstr "<Hello>"' in output
+    assert 'msgstr "Fertig"' in output
+    assert "#: app.py:1" in output
+
+
+def test_xliff_adds_targets():
+    source = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">'
+        '<file source-language="en" target-language="ja" datatype="plaintext" original="x">'
+        '<body><trans-unit id="1"><source>Hello</source></trans-unit></body></file></xliff>'
+    )
+    strings, output = _round_trip(XliffFormat(target_language="ja"), source)
+
+    assert strings == ["Hello"]
+    assert "<source>Hello</source>" in output
+    assert "&lt;Hello&gt;</target>" in output
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("a.json", JsonFormat), ("a.csv", CsvFormat), ("a.po", PoFormat), ("a.xlf", XliffFormat), ("a.txt", type(None)),
+])
+def test_format_for_filename(name, expected):
+    assert isinstance(format_for_filename(name, "ja"), expected)
+
+
+def test_unique_strings_counts_duplicates():
+    strings, stats = unique_strings(JsonFormat(), io.BytesIO(b'["a", "b", "a", "a"]'))
+    assert strings == ["a", "b"]
+    assert (stats["texts"], stats["unique_texts"]) == (4, 2)
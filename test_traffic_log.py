@@ -0,0 +1,64 @@
+import pytest
+
+from traffic_log import CACHE_HIT, TrafficRecorder, _synthetic_text, read_records, redact, text_hash
+
+
+def _recorded(path, **kwargs):
+    return TrafficRecorder(str(path), sample_rate=1.0, **kwargs)
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "traffic.log"
+    recorder = _recorded(path)
+    recorder.record("/translate", ["Hello"], "en", "ja", 0.25, cache=CACHE_HIT)
+    recorder.record("/detect_language/batch", ["a", "bc"], None, None, 0.5, status=429)
+    recorder.close()
+
+    first, second = read_records([str(path)])
+    assert (first.route, first.source_language, first.target_language, first.characters) == ("/translate", "en", "ja", 5)
+    assert first.cache == CACHE_HIT and first.duration == pytest.approx(0.25)
+    assert first.text_hash == text_hash("Hello") and first.text == ""
+    assert (second.route, second.items, second.status, second.characters) == ("/detect_language/batch", 2, 429, 3)
+
+
+def test_redact_mode_keeps_only_the_shape_of_the_text(tmp_path):
+    path = tmp_path / "traffic.log"
+    recorder = _recorded(path, text_mode="redact")
+    recorder.record("/translate", ["Room 101, please."], "en", "ja", 0.1)
+    recorder.close()
+
+    (record,) = read_records([str(path)])
+    assert record.text == redact("Room 101, please.") == "xxxx 000, xxxxxx."
+    # Replay fills masked letters from the hash: same length, distinct per text
+    assert len(_synthetic_text(record)) == len(record.text)
+
+
+def test_logs_rotate_by_size(tmp_path):
+    path = tmp_path / "traffic.log"
+    recorder = _recorded(path, max_bytes=200, backups=2)
+    for i in range(20):
+        recorder.record("/translate", [f"text {i}"], "en", "ja", 0.1)
+    recorder.close()
+
+    files = [str(tmp_path / name) for name in ("traffic.log.2", "traffic.log.1", "traffic.log")]
+    records = list(read_records(files))
+    assert 0 < len(records) < 20
+    assert records[-1].text_hash == text_hash("text 19")
+
+
+def test_unknown_text_mode_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        TrafficRecorder(str(tmp_path / "traffic.log"), text_mode="full")
+
+
+def test_batches_over_65535_items_are_recorded(tmp_path):
+    path = tmp_path / "traffic.log"
+    recorder = _recorded(path, text_mode="none")
+    recorder.record("/detect_language/batch", ["a"] * 65535, None, None, 0.1)
+    recorder.record("/detect_language/batch", ["a"] * 65536, None, None, 0.1)
+    recorder.record("/translate", ["a"], "en", "ja", 0.1, status=70000)
+    recorder.close()
+
+    first, second, third = read_records([str(path)])
+    assert (first.items, second.items) == (65535, 65536)
+    assert third.status == 65535
@@ -0,0 +1,70 @@
+import io
+import json
+import threading
+
+import pytest
+
+from translate_cli import run
+
+
+class FakeRouter:
+    """Translates until fail_after packs have been sent"""
+
+    def __init__(self, fail_after=None):
+        self.packs = []
+        self.fail_after = fail_after
+        self.lock = threading.Lock()
+
+    def translate(self, texts, target_language, source_language, priority=None):
+        with self.lock:
+            if self.fail_after is not None and len(self.packs) >= self.fail_after:
+                raise RuntimeError("backend down")
+            self.packs.append(list(texts))
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+class FakeTranslator:
+    def __init__(self, router):
+        self.router = router
+
+
+def _run(translator, tmp_path, **kwargs):
+    return run(translator, [str(tmp_path / "in.txt")], str(tmp_path / "out.txt"), "ja", "en",
+               checkpoint_path=str(tmp_path / "out.ckpt"), workers=1, checkpoint_every=1,
+               max_documents=2, tune=False, log=io.StringIO(), **kwargs)
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path):
+    lines = [f"line {i}" for i in range(10)]
+    (tmp_path / "in.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        _run(FakeTranslator(FakeRouter(fail_after=2)), tmp_path)
+    checkpoint = json.loads((tmp_path / "out.ckpt").read_text())
+    assert checkpoint["lines_done"] == 4
+    # A partial write after the checkpoint is dropped on resume
+    with open(tmp_path / "out.txt", "ab") as f:
+        f.write(b"[ja] half")
+
+    router = FakeRouter()
+    assert _run(FakeTranslator(router), tmp_path) == 10
+    assert router.packs[0] == ["line 4", "line 5"]
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8").splitlines() == [f"[ja] {line}" for line in lines]
+    assert not (tmp_path / "out.ckpt").exists()
+
+
+def test_blank_and_repeated_lines(tmp_path):
+    (tmp_path / "in.txt").write_text("Hi\n\nHi\n", encoding="utf-8")
+    router = FakeRouter()
+    run(FakeTranslator(router), [str(tmp_path / "in.txt")], str(tmp_path / "out.txt"), "ja", "en",
+        max_documents=10, tune=False, log=io.StringIO())
+
+    assert router.packs == [["Hi"]]
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "[ja] Hi\n\n[ja] Hi\n"
+
+
+def test_checkpoint_for_another_language_is_refused(tmp_path):
+    (tmp_path / "in.txt").write_text("Hi\n", encoding="utf-8")
+    (tmp_path / "out.ckpt").write_text(json.dumps({"target_language": "fr", "lines_done": 0, "output_bytes": 0}))
+    with pytest.raises(SystemExit):
+        _run(FakeTranslator(FakeRouter()), tmp_path)
@@ -0,0 +1,58 @@
+import pytest
+
+from translation_backends import BackendRouter, MockBackend, TranslationBackend, parse_regions
+
+
+class FailingBackend(TranslationBackend):
+    def __init__(self, name, error):
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    def translate(self, texts, target_language, source_language):
+        self.calls += 1
+        raise self.error
+
+
+def test_failover_to_the_next_backend():
+    failing = FailingBackend("down", RuntimeError("connection reset"))
+    router = BackendRouter([failing, MockBackend("up")], explore=0)
+
+    assert router.translate(["hi"], "ja", "en") == ["[ja] hi"]
+    assert [(stats["name"], stats["errors"]) for stats in router.stats()] == [("down", 1), ("up", 0)]
+
+
+def test_bad_request_is_not_retried_elsewhere():
+    bad = FailingBackend("strict", ValueError("unsupported language"))
+    other = MockBackend("other")
+    router = BackendRouter([bad, other], explore=0)
+
+    with pytest.raises(ValueError):
+        router.translate(["hi"], "xx", "en")
+    assert router.stats()[1]["calls"] == 0
+
+
+def test_unhealthy_backend_is_skipped_until_retry_after():
+    failing = FailingBackend("down", RuntimeError("503"))
+    router = BackendRouter([failing, MockBackend("up")], explore=0, alpha=1.0, retry_after=60)
+    router.translate(["a"], "ja", "en")
+    router.translate(["b"], "ja", "en")
+    assert failing.calls == 1
+    assert [backend.name for backend in router.ranked()] == ["up", "down"]
+
+
+def test_fastest_measured_backend_goes_first():
+    slow, fast = MockBackend("slow", latency=0.02), MockBackend("fast")
+    router = BackendRouter([slow, fast], explore=0)
+    # Unmeasured backends are tried first, in order
+    assert router.ranked() == [slow, fast]
+    router.translate(["a"], "ja", "en")
+    assert router.ranked() == [fast, slow]
+    router.translate(["b"], "ja", "en")
+    assert router.ranked() == [fast, slow]
+
+
+def test_parse_regions():
+    assert parse_regions(" us-ashburn-1, ,eu-frankfurt-1") == ["us-ashburn-1", "eu-frankfurt-1"]
+    assert parse_regions(["ap-tokyo-1"]) == ["ap-tokyo-1"]
+    assert parse_regions(None) == []
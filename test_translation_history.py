@@ -0,0 +1,65 @@
+import time
+
+from translation_history import HistoryStore, RecentHistory
+
+
+def _store(tmp_path, **kwargs):
+    return HistoryStore(str(tmp_path / "history.sqlite3"), **kwargs)
+
+
+def test_pages_are_newest_first_per_session(tmp_path):
+    store = _store(tmp_path)
+    for i in range(5):
+        store.add("s1", f"text {i}", f"テキスト {i}", "en", "ja")
+    store.add("s2", "other", "他", "en", "ja")
+
+    first = store.page("s1", limit=2)
+    assert [e["source"] for e in first] == ["text 4", "text 3"]
+    assert [e["source"] for e in store.page("s1", before_id=first[-1]["id"], limit=2)] == ["text 2", "text 1"]
+    assert store.count("s1") == 5
+
+
+def test_search_matches_source_or_translation(tmp_path):
+    store = _store(tmp_path)
+    store.add("s1", "Hello world", "こんにちは世界", "en", "ja")
+    store.add("s1", "Goodbye", "さようなら", "en", "ja")
+    store.add("s2", "Hello again", "またこんにちは", "en", "ja")
+
+    assert [e["source"] for e in store.search("hello", "s1")] == ["Hello world"]
+    assert [e["source"] for e in store.search("こんにちは")] == ["Hello again", "Hello world"]
+    assert [e["source"] for e in store.search("世")] == ["Hello world"]
+
+
+def test_each_session_keeps_its_newest_entries(tmp_path):
+    store = _store(tmp_path, max_session_entries=3)
+    for i in range(5):
+        store.add("s1", f"text {i}", "", "en", "ja")
+    store.add("s2", "other", "", "en", "ja")
+
+    assert [e["source"] for e in store.page("s1")] == ["text 4", "text 3", "text 2"]
+    assert store.count("s2") == 1
+    assert store.search("text 0", "s1") == []
+
+
+def test_old_entries_are_pruned(tmp_path):
+    store = _store(tmp_path, max_age_days=1)
+    now = time.time()
+    store.add("s1", "new", "", "en", "ja", timestamp=now)
+    # Added after this hour's pruning ran
+    store.add("s1", "old", "", "en", "ja", timestamp=now - 2 * 86400)
+
+    assert store.prune(now) == 1
+    assert [e["source"] for e in store.page("s1")] == ["new"]
+
+
+def test_returning_session_sees_its_stored_history(tmp_path):
+    store = _store(tmp_path)
+    first = RecentHistory(store, "s1", max_entries=2)
+    for i in range(3):
+        first.add(f"text {i}", "", "en", "ja")
+
+    returning = RecentHistory(store, "s1", max_entries=2)
+    assert len(returning) == 2
+    page = returning.page(limit=2)
+    assert [e["source"] for e in page] == ["text 2", "text 1"]
+    assert [e["source"] for e in returning.page(before_id=page[-1]["id"], limit=2)] == ["text 0"]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from translation_jobs import JOB_DONE, JOB_QUEUED, JOB_RUNNING, JobQueue, JobStore
+
+
+class FakeRouter:
+    def __init__(self):
+        self.packs = []
+        self.lock = threading.Lock()
+
+    def translate(self, texts, target_language, source_language, priority=None):
+        with self.lock:
+            self.packs.append(list(texts))
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.router = FakeRouter()
+
+    def detect_language(self, text):
+        return "en"
+
+
+def _wait_done(jobs, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.status(job_id)
+        if job["status"] == JOB_DONE:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job still {jobs.status(job_id)['status']}")
+
+
+def test_strings_are_deduplicated_most_frequent_first(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create(["b", "a", "", "a", "c", "a", "b"], "ja", "en")
+
+    job = store.get(job_id)
+    assert (job["total"], job["completed"]) == (7, 1)
+    assert (job["translatable_lines"], job["unique_texts"], job["characters_saved"]) == (6, 3, 3)
+    assert [row["text"] for row in store.pending_strings(job_id, 10)] == ["a", "b", "c"]
+
+
+def test_pending_strings_pages_by_rank(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create([f"text {i}" for i in range(5)], "ja", "en")
+
+    first = store.pending_strings(job_id, 2)
+    second = store.pending_strings(job_id, 2, after_rank=first[-1]["rank"])
+    assert [row["text"] for row in first + second] == ["text 0", "text 1", "text 2", "text 3"]
+
+
+def test_save_translations_fills_every_duplicate(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create(["hi", "bye", "hi"], "ja", "en")
+    rows = store.pending_strings(job_id, 10)
+    store.save_translations(job_id, rows[:1], ["やあ"])
+
+    assert [item["translation"] for item in store.results(job_id)] == ["やあ", None, "やあ"]
+    assert store.get(job_id)["completed"] == 2
+    assert [row["text"] for row in store.pending_strings(job_id, 10)] == ["bye"]
+
+
+def test_queue_translates_each_distinct_text_once(tmp_path):
+    translator = FakeTranslator()
+    jobs = JobQueue(translator, JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, max_documents=2)
+    job_id = jobs.submit(["x", "y", "x", "z", "", "y"], "ja", "en")
+
+    job = _wait_done(jobs, job_id)
+    assert job["progress"] == 1.0
+    assert sorted(text for pack in translator.router.packs for text in pack) == ["x", "y", "z"]
+    assert all(len(pack) <= 2 for pack in translator.router.packs)
+    assert [item["translation"] for item in jobs.results(job_id)] == [
+        "[ja] x", "[ja] y", "[ja] x", "[ja] z", "", "[ja] y"
+    ]
+
+
+def test_unfinished_jobs_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job_id = store.create(["one", "two"], "ja", "en")
+    store.set_status(job_id, JOB_QUEUED)
+
+    jobs = JobQueue(FakeTranslator(), JobStore(path), workers=1)
+    assert _wait_done(jobs, job_id)["completed"] == 2
+
+
+def test_recovery_does_not_enqueue_a_job_twice(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.create(["one"], "ja", "en")
+    jobs = JobQueue(FakeTranslator(), store, workers=0)
+    jobs._recover()
+    jobs._recover()
+    assert jobs.queued() == 1
+
+
+def test_running_job_is_not_taken_over_until_stale(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create(["one"], "ja", "en")
+    assert store.claim(job_id, stale_after=60)
+    assert store.get(job_id)["status"] == JOB_RUNNING
+    assert not store.claim(job_id, stale_after=60)
+    assert store.claim(job_id, stale_after=0)
+
+
+def test_export_streams_csv_in_pages(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create(["a", "b,c", "a"], "ja", "en")
+    store.save_translations(job_id, store.pending_strings(job_id, 10), ["A", "B,C"])
+    jobs = JobQueue(FakeTranslator(), store, workers=0)
+
+    chunks = list(jobs.export(job_id, page_size=2))
+    assert len(chunks) == 2
+    assert b"".join(chunks).decode("utf-8").splitlines() == [
+        "line,source,translation", "1,a,A", '2,"b,c","B,C"', "3,a,A"
+    ]
+    assert b"".join(jobs.export(job_id, "\t")).decode("utf-8").splitlines()[2] == "2\tb,c\tB,C"
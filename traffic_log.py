@@ -0,0 +1,352 @@
+"""
+Sampled, compact binary log of API traffic, and a replay tool for it.
+
+The Flask routes and the translator record one fixed-size record per sampled
+request: the route, language pair, character and item counts, status,
+duration and cache outcome. Depending on TRAFFIC_LOG_TEXT, the text is
+dropped ("none"), kept as an 8-byte hash ("hash", the default) or stored with
+every letter and digit masked ("redact"). Records go onto a bounded queue and
+a background thread writes them. When the queue is full, records are
+dropped rather than slowing a request. Log files rotate by size.
+
+Replay sends the recorded requests to the Flask app with the mock backend, at
+the recorded pace or scaled by --speed. It prints latency percentiles per
+route next to the recorded ones, so a change can be checked against real
+traffic shapes:
+
+Usage:
+    python traffic_log.py info traffic.log traffic.log.1
+    python traffic_log.py replay traffic.log --speed 4 --concurrency 32
+"""
+import argparse
+import atexit
+import hashlib
+import os
+import queue
+import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"TRAFLOG1"
+
+# timestamp, duration, characters, status, items, route, cache, source, target, text hash, text length
+_RECORD = struct.Struct("<dfIHIBB8s8s8sI")
+_MAX_U16 = 0xFFFF
+_MAX_U32 = 0xFFFFFFFF
+
+ROUTES = (
+    "/translate",
+    "/detect_language",
+    "/detect_language/batch",
+    "translator.translate",
+    "translator.detect",
+)
+
+CACHE_NONE = 0
+CACHE_HIT = 1
+CACHE_MISS = 2
+
+TEXT_MODES = ("none", "hash", "redact")
+
+
+class TrafficRecord(NamedTuple):
+    timestamp: float
+    duration: float
+    characters: int
+    status: int
+    items: int
+    route: str
+    cache: int
+    source_language: str
+    target_language: str
+    text_hash: bytes
+    text: str
+
+
+def redact(text: str) -> str:
+    """Mask letters and digits, keeping length, spacing and punctuation"""
+    return "".join("x" if c.isalpha() else "0" if c.isdigit() else c for c in text)
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def _code(value: Optional[str]) -> bytes:
+    return (value or "").encode("ascii", "replace")[:8]
+
+
+class TrafficRecorder:
+    """Samples requests and writes them from a background thread to rotating log files"""
+
+    def __init__(self, path: str, sample_rate: float = 0.01, text_mode: str = "hash",
+                 max_bytes: int = 64 * 1024 * 1024, backups: int = 5, queue_size: int = 10000):
+        if text_mode not in TEXT_MODES:
+            raise ValueError(f"TRAFFIC_LOG_TEXT must be one of {', '.join(TEXT_MODES)}")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.text_mode = text_mode
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._writer = threading.Thread(target=self._run, name="traffic-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, route: str, texts: List[str], source_language: Optional[str],
+               target_language: Optional[str], duration: float, status: int = 200, cache: int = CACHE_NONE):
+        """Queue one record; the caller has already decided it is sampled"""
+        joined = "\n".join(texts)
+        if self.text_mode == "none":
+            digest, payload = b"", b""
+        else:
+            digest = text_hash(joined)
+            payload = redact(joined).encode("utf-8") if self.text_mode == "redact" else b""
+        # Counts are clamped to their fields, so an unusual request cannot fail while being logged
+        characters = min(sum(len(text) for text in texts), _MAX_U32)
+        data = _RECORD.pack(
+            time.time(), duration, characters, min(max(status, 0), _MAX_U16), min(len(texts), _MAX_U32),
+            ROUTES.index(route), cache, _code(source_language), _code(target_language), digest, len(payload)
+        ) + payload
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self.recorded += 1
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _run(self):
+        self._open()
+        while True:
+            data = self._queue.get()
+            # Write everything already queued before flushing once
+            while data is not None:
+                self._write(data)
+                try:
+                    data = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._file.flush()
+            if data is None:
+                return
+
+    def close(self):
+        """Write out queued records and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+        }
+
+
+def read_records(paths: Iterable[str]) -> Iterator[TrafficRecord]:
+    """Records from log files in the order given (pass rotated files oldest first)"""
+    for path in paths:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a traffic log")
+            while True:
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    break
+                (timestamp, duration, characters, status, items, route, cache,
+                 source, target, digest, text_length) = _RECORD.unpack(header)
+                text = f.read(text_length).decode("utf-8", "replace")
+                yield TrafficRecord(
+                    timestamp, duration, characters, status, items, ROUTES[route], cache,
+                    source.rstrip(b"\0").decode("ascii"), target.rstrip(b"\0").decode("ascii"),
+                    digest, text
+                )
+
+
+def recorder_from_env() -> Optional[TrafficRecorder]:
+    """Recorder writing to TRAFFIC_LOG, or None when it is unset"""
+    path = os.getenv("TRAFFIC_LOG")
+    if not path:
+        return None
+    return TrafficRecorder(
+        path,
+        sample_rate=float(os.getenv("TRAFFIC_LOG_SAMPLE", "0.01")),
+        text_mode=os.getenv("TRAFFIC_LOG_TEXT", "hash"),
+        max_bytes=int(os.getenv("TRAFFIC_LOG_MAX_BYTES", str(64 * 1024 * 1024))),
+        backups=int(os.getenv("TRAFFIC_LOG_BACKUPS", "5"))
+    )
+
+
+def _percentiles(values: List[float]) -> str:
+    if not values:
+        return "-"
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+    return f"p50 {pick(0.5):.1f} ms  p95 {pick(0.95):.1f} ms  p99 {pick(0.99):.1f} ms"
+
+
+def _synthetic_text(record: TrafficRecord) -> str:
+    """Stand-in text of the recorded length; equal hashes give equal texts, so cache behaviour carries over"""
+    if record.text:
+        # Masked texts collide; fill the masked letters from the hash so distinct texts stay distinct
+        letters = record.text_hash.hex() or "x"
+        return "".join(
+            letters[i % len(letters)] if c == "x" else c for i, c in enumerate(record.text)
+        )
+    # Without a hash (TRAFFIC_LOG_TEXT=none) every request gets distinct text
+    seed = record.text_hash.hex() if record.text_hash.strip(b"\0") else f"{random.random():.12f}"
+    words = (seed + " ") * (record.characters // (len(seed) + 1) + 1)
+    return words[:max(1, record.characters)]
+
+
+def _request(record: TrafficRecord):
+    """Route, JSON body for a recorded API request, or None for translator-level records"""
+    text = _synthetic_text(record)
+    if record.route == "/translate":
+        return record.route, {
+            "text": text, "target_language": record.target_language or "ja",
+            "source_language": record.source_language or "auto",
+        }
+    if record.route == "/detect_language":
+        return record.route, {"text": text}
+    if record.route == "/detect_language/batch":
+        size = max(1, len(text) // max(1, record.items))
+        return record.route, {"texts": [text[i:i + size] or "x" for i in range(0, size * record.items, size)]}
+    return None
+
+
+def info(paths: List[str]) -> int:
+    records = list(read_records(paths))
+    if not records:
+        print("No records")
+        return 0
+    print(f"{len(records)} records from {time.ctime(records[0].timestamp)} to {time.ctime(records[-1].timestamp)}")
+    for route in ROUTES:
+        subset = [r for r in records if r.route == route]
+        if not subset:
+            continue
+        lengths = sorted(r.characters for r in subset)
+        cached = [r for r in subset if r.cache != CACHE_NONE]
+        hits = sum(1 for r in cached if r.cache == CACHE_HIT)
+        print(f"{route}: {len(subset)} requests, {_percentiles([r.duration for r in subset])}")
+        print(f"  characters p50 {lengths[len(lengths) // 2]}  p95 {lengths[int(len(lengths) * 0.95)]}"
+              f"  max {lengths[-1]}" + (f"  cache hit ratio {hits / len(cached):.1%}" if cached else ""))
+    pairs = {}
+    for r in records:
+        if r.target_language:
+            pair = f"{r.source_language or 'auto'}->{r.target_language}"
+            pairs[pair] = pairs.get(pair, 0) + 1
+    print("language pairs: " + ", ".join(f"{pair} {count}" for pair, count in sorted(pairs.items(), key=lambda p: -p[1])[:10]))
+    return 0
+
+
+def replay(paths: List[str], speed: float = 1.0, concurrency: int = 32, latency: Optional[float] = None) -> int:
+    """Replay recorded API requests against the Flask app with the mock backend"""
+    records = list(read_records(paths))
+    requests = [(r, _request(r)) for r in records]
+    requests = [(r, request) for r, request in requests if request]
+    if not requests:
+        print("No API requests in the log")
+        return 1
+    if latency is None:
+        # Recorded translator calls tell us how slow the real backend was
+        backend_calls = [r.duration for r in records if r.route.startswith("translator.")]
+        latency = median(backend_calls) if backend_calls else 0.0
+
+    # The app must be configured before it is imported
+    os.environ["TRANSLATION_BACKEND"] = "mock"
+    os.environ["TRANSLATION_MOCK_LATENCY"] = str(latency)
+    os.environ.setdefault("TRANSLATION_JOB_DB", os.path.join(tempfile.mkdtemp(), "replay_jobs.sqlite3"))
+    os.environ.setdefault("API_CLIENT_CHARS_PER_MINUTE", str(10 ** 12))
+    os.environ.setdefault("API_CLIENT_MAX_CONCURRENCY", str(concurrency))
+    os.environ.setdefault("API_MAX_CONCURRENCY", str(concurrency))
+    os.environ.pop("TRAFFIC_LOG", None)
+    import flask_app
+
+    client = flask_app.app.test_client()
+    results = {}
+    lock = threading.Lock()
+
+    def send(route: str, body: Dict):
+        started = time.perf_counter()
+        status = client.post(route, json=body).status_code
+        with lock:
+            results.setdefault(route, []).append((time.perf_counter() - started, status))
+
+    print(f"Replaying {len(requests)} requests at {speed}x with {latency * 1000:.1f} ms mock latency")
+    first = requests[0][0].timestamp
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for record, (route, body) in requests:
+            delay = (record.timestamp - first) / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, route, body)
+    print(f"Finished in {time.monotonic() - started:.1f} s")
+
+    for route, outcomes in sorted(results.items()):
+        recorded = [r.duration for r, (recorded_route, _) in requests if recorded_route == route]
+        errors = sum(1 for _, status in outcomes if status >= 400)
+        print(f"{route}: {len(outcomes)} requests, {errors} errors")
+        print(f"  recorded  {_percentiles(recorded)}")
+        print(f"  replayed  {_percentiles([duration for duration, _ in outcomes])}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a translation traffic log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_command = commands.add_parser("info", help="Summarise request shapes, timings and cache outcomes")
+    info_command.add_argument("paths", nargs="+", help="Log files, oldest first")
+    replay_command = commands.add_parser("replay", help="Replay API requests against the mock backend")
+    replay_command.add_argument("paths", nargs="+", help="Log files, oldest first")
+    replay_command.add_argument("--speed", type=float, default=1.0, help="Time scale (2 = twice as fast)")
+    replay_command.add_argument("--concurrency", type=int, default=32, help="Requests in flight at most")
+    replay_command.add_argument("--latency", type=float,
+                                help="Mock backend latency in seconds (default: median recorded backend call)")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        return info(args.paths)
+    return replay(args.paths, args.speed, args.concurrency, args.latency)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
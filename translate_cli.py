@@ -0,0 +1,256 @@
+"""
+Streaming bulk translation from the command line.
+
+Reads lines from files or stdin, translates them in packed batches on a pool
+of workers and writes the translations in input order as they complete.
+With --checkpoint, progress is saved periodically so an interrupted run can
+be restarted with the same command and resumes where it stopped.
+
+Usage:
+    python translate_cli.py -t ja -o out.txt --checkpoint out.ckpt input.txt
+    cat input.txt | python translate_cli.py -t es > out.txt
+"""
+import argparse
+import fileinput
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from batch_translation import (
+    MAX_BATCH_CHARACTERS,
+    MAX_BATCH_DOCUMENTS,
+    PackingTuner,
+    dedupe_by_frequency,
+    detect_batch_language,
+    pack_texts,
+    translate_batch_with_retry,
+    tuner_from_env,
+)
+
+
+class Checkpoint:
+    """Progress of a bulk run: input lines consumed and output bytes written"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.lines_done = 0
+        self.output_bytes = 0
+        self.source_language = None
+
+    def load(self, target_language: str) -> bool:
+        """Load an existing checkpoint; returns True if the run is being resumed"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get("target_language") != target_language:
+            raise SystemExit(
+                f"Checkpoint {self.path} was written for target language "
+                f"{data.get('target_language')!r}; remove it to start over"
+            )
+        self.lines_done = data["lines_done"]
+        self.output_bytes = data["output_bytes"]
+        self.source_language = data.get("source_language")
+        return True
+
+    def save(self, target_language: str):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "target_language": target_language,
+                "source_language": self.source_language,
+                "lines_done": self.lines_done,
+                "output_bytes": self.output_bytes,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_packs(lines: Iterator[str], max_documents: int,
+               max_characters: Union[int, Callable[[], int]]) -> Iterator[List[str]]:
+    """Group raw input lines (newlines stripped) into packs for one batch request each"""
+    return pack_texts(
+        (line.rstrip("\r\n") for line in lines),
+        max_documents=max_documents,
+        max_characters=max_characters,
+        size=lambda line: len(line.strip())
+    )
+
+
+def translate_pack(translator, pack: List[str], target_language: str,
+                   source_language: str, tuner: Optional[PackingTuner] = None) -> List[str]:
+    """Translate the distinct non-blank lines of a pack, passing blank lines through"""
+    positions = [i for i, line in enumerate(pack) if line.strip()]
+    results = list(pack)
+    if positions:
+        # Repeated lines in a pack are sent once
+        unique, _ = dedupe_by_frequency(pack[i].strip() for i in positions)
+        translations = dict(zip(unique, translate_batch_with_retry(
+            translator, unique, target_language, source_language, tuner=tuner
+        )))
+        for i in positions:
+            results[i] = translations[pack[i].strip()].replace("\n", " ")
+    return results
+
+
+def open_output(path: Optional[str], checkpoint: Checkpoint, resuming: bool):
+    if not path or path == "-":
+        return sys.stdout.buffer
+    if resuming and os.path.exists(path):
+        # Drop anything written after the last checkpoint
+        output = open(path, 'r+b')
+        output.truncate(checkpoint.output_bytes)
+        output.seek(checkpoint.output_bytes)
+        return output
+    return open(path, 'wb')
+
+
+def run(translator, inputs: List[str], output_path: Optional[str], target_language: str,
+        source_language: str = "auto", checkpoint_path: Optional[str] = None,
+        workers: int = 4, checkpoint_every: int = 1000,
+        max_documents: int = MAX_BATCH_DOCUMENTS,
+        max_characters: int = MAX_BATCH_CHARACTERS, tune: bool = True, log=sys.stderr) -> int:
+    """Translate inputs to output; returns the number of lines written.
+
+    With tune, characters per request are chosen online by a PackingTuner,
+    with max_characters as the ceiling.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    resuming = checkpoint.load(target_language)
+    if resuming:
+        print(f"Resuming after {checkpoint.lines_done} lines", file=log)
+        if checkpoint.source_language:
+            source_language = checkpoint.source_language
+
+    source = fileinput.input(files=inputs or ("-",), encoding="utf-8")
+    lines = itertools.islice(source, checkpoint.lines_done, None)
+    tuner = tuner_from_env(max_characters) if tune else None
+    packs = read_packs(
+        lines,
+        max_documents,
+        (lambda: tuner.target(source_language, target_language)) if tuner else max_characters
+    )
+
+    output = open_output(output_path, checkpoint, resuming)
+    written_since_checkpoint = 0
+    pending: Dict[int, object] = {}
+    next_to_submit = 0
+    next_to_write = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded window of packs in flight so memory stays flat
+            for pack in packs:
+                if source_language == "auto":
+                    source_language = detect_batch_language(translator, [l for l in pack if l.strip()])
+                    checkpoint.source_language = source_language
+                    print(f"Detected source language: {source_language}", file=log)
+
+                pending[next_to_submit] = executor.submit(
+                    translate_pack, translator, pack, target_language, source_language, tuner
+                )
+                next_to_submit += 1
+
+                while len(pending) >= workers * 2 or (next_to_write in pending and pending[next_to_write].done()):
+                    written = _write_pack(pending.pop(next_to_write).result(), output, checkpoint)
+                    next_to_write += 1
+                    written_since_checkpoint += written
+                    if written_since_checkpoint >= checkpoint_every:
+                        output.flush()
+                        checkpoint.save(target_language)
+                        written_since_checkpoint = 0
+
+            while next_to_write in pending:
+                _write_pack(pending.pop(next_to_write).result(), output, checkpoint)
+                next_to_write += 1
+    except BaseException:
+        # Everything written so far is complete packs, so it is a valid resume point
+        for future in pending.values():
+            future.cancel()
+        output.flush()
+        checkpoint.save(target_language)
+        raise
+    finally:
+        source.close()
+        output.flush()
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    checkpoint.remove()
+    print(f"Translated {checkpoint.lines_done} lines", file=log)
+    if tuner:
+        for pair, tuning in tuner.stats().items():
+            print(f"Pack size for {pair}: {tuning['target_characters']} characters", file=log)
+    return checkpoint.lines_done
+
+
+def _write_pack(translations: List[str], output, checkpoint: Checkpoint) -> int:
+    data = "".join(t + "\n" for t in translations).encode("utf-8")
+    output.write(data)
+    checkpoint.output_bytes += len(data)
+    checkpoint.lines_done += len(translations)
+    return len(translations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream text files through OCI translation line by line")
+    parser.add_argument("inputs", nargs="*", help="Input files (default: stdin)")
+    parser.add_argument("-t", "--target-language", required=True, help="Target language code, e.g. ja")
+    parser.add_argument("-s", "--source-language", default="auto", help="Source language code (default: auto)")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resumable runs")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Lines between checkpoints")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent batch requests")
+    parser.add_argument("--max-documents", type=int, default=MAX_BATCH_DOCUMENTS, help="Lines per batch request")
+    parser.add_argument("--max-characters", type=int, default=MAX_BATCH_CHARACTERS,
+                        help="Characters per batch request (the ceiling when tuning)")
+    parser.add_argument("--no-tune", action="store_true", help="Always pack --max-characters per request")
+    args = parser.parse_args(argv)
+
+    if args.checkpoint and (not args.output or args.output == "-"):
+        parser.error("--checkpoint requires --output so partial output can be truncated on resume")
+
+    # Same environment-variable configuration as the Flask app, without its workers and caches
+    from oci_translator import OCITranslator
+    translator = OCITranslator()
+    if not translator.router:
+        print("OCI client not initialized. Please check your configuration.", file=sys.stderr)
+        return 1
+
+    try:
+        run(
+            translator,
+            args.inputs,
+            args.output,
+            args.target_language,
+            source_language=args.source_language,
+            checkpoint_path=args.checkpoint,
+            workers=args.workers,
+            checkpoint_every=args.checkpoint_every,
+            max_documents=args.max_documents,
+            max_characters=args.max_characters,
+            tune=not args.no_tune,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Translation error: {str(e)}", file=sys.stderr)
+        if args.checkpoint:
+            print("Rerun the same command to resume from the last checkpoint", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
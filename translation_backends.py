@@ -0,0 +1,467 @@
+"""
+Translation backends and latency-aware routing between them.
+
+A backend translates packs of texts and detects languages, raising on
+failure. OCIBackend talks to OCI AI Language in one region; MockBackend
+answers locally for development and replay. BackendRouter keeps a moving
+average of latency and error rate per backend and sends each call to the
+fastest healthy one, failing over to the next when a backend is down.
+
+Configure extra OCI regions with OCI_REGIONS (comma separated, e.g.
+"ap-tokyo-1,us-ashburn-1") and TRANSLATION_BACKEND=mock for the local mock
+(TRANSLATION_MOCK_LATENCY adds a fixed delay per call, in seconds).
+"""
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import deadlines
+from adaptive_limiter import AdaptiveLimiter
+from deadlines import DeadlineExceeded
+from batch_translation import is_throttling_error
+from glossary import GlossaryWatcher, glossary_from_env
+from oci_sdk import ai_language, retry
+from request_scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+
+class TranslationBackend:
+    """Interface for translation services; methods raise on failure"""
+
+    name = "backend"
+
+    def connect(self):
+        """Create any clients up front so configuration errors surface early"""
+
+    def translate(self, texts: List[str], target_language: str, source_language: str) -> List[str]:
+        """Translate texts in one call; source_language must be a concrete code"""
+        raise NotImplementedError
+
+    def detect_language(self, text: str) -> str:
+        """Language code of text, or "unknown\""""
+        raise NotImplementedError
+
+    def detect_languages(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """(language code, confidence) per text in one call; ("unknown", 0.0) if undetected"""
+        raise NotImplementedError
+
+
+class OCIBackend(TranslationBackend):
+    """OCI AI Language in one region"""
+
+    def __init__(self, config: Dict, region: str):
+        self.name = region
+        self.config = config
+        self.region = region
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """AI Language client for this region, created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self.build_client(self.config)
+        return self._client
+
+    def build_client(self, config: Dict):
+        """A new AI Language client for this region; building it loads the signing key"""
+        return ai_language().AIServiceLanguageClient({
+            "user": config["user"],
+            "key_content": config["key_content"],
+            "fingerprint": config["fingerprint"],
+            "tenancy": config["tenancy"],
+            "region": self.region
+        }, timeout=(
+            # Bounds calls a deadline has abandoned, so they never outlive the longest request budget
+            min(float(os.getenv("OCI_CONNECT_TIMEOUT", "10")), deadlines.DEFAULT_REQUEST_TIMEOUT),
+            min(float(os.getenv("OCI_READ_TIMEOUT", str(deadlines.DEFAULT_REQUEST_TIMEOUT))),
+                deadlines.DEFAULT_REQUEST_TIMEOUT)
+        ))
+
+    @staticmethod
+    def _request_options() -> Dict:
+        # The SDK's retries back off for minutes; under a deadline the router fails over instead
+        if deadlines.remaining() is None:
+            return {}
+        return {"retry_strategy": retry().NoneRetryStrategy()}
+
+    def use_credentials(self, config: Dict, client):
+        """Switch to new credentials; calls already running finish on the client they started with"""
+        with self._client_lock:
+            self.config = config
+            self._client = client
+
+    def connect(self):
+        self.client
+
+    def translate(self, texts: List[str], target_language: str, source_language: str) -> List[str]:
+        documents = [
+            ai_language().models.TextDocument(
+                key=str(i),
+                text=text,
+                language_code=source_language
+            )
+            for i, text in enumerate(texts)
+        ]
+
+        translation_details = ai_language().models.BatchLanguageTranslationDetails(
+            compartment_id=self.config["compartment_id"],
+            target_language_code=target_language,
+            documents=documents
+        )
+
+        response = self.client.batch_language_translation(translation_details, **self._request_options())
+
+        results = [None] * len(texts)
+        for document in response.data.documents or []:
+            results[int(document.key)] = document.translated_text
+
+        # Per-document problems are about the input, not the region, so they are ValueErrors
+        errors = getattr(response.data, "errors", None) or []
+        for error in errors:
+            message = error.error.message if getattr(error, "error", None) else "translation failed"
+            raise ValueError(f"Translation error for document {error.key}: {message}")
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            raise ValueError(f"No translation received for {len(missing)} document(s)")
+
+        return results
+
+    def detect_language(self, text: str) -> str:
+        return self.detect_languages([text])[0][0]
+
+    def detect_languages(self, texts: List[str]) -> List[Tuple[str, float]]:
+        detection_details = ai_language().models.BatchDetectDominantLanguageDetails(
+            compartment_id=self.config["compartment_id"],
+            documents=[
+                ai_language().models.DominantLanguageDocument(
+                    key=str(i),
+                    text=text
+                )
+                for i, text in enumerate(texts)
+            ]
+        )
+
+        response = self.client.batch_detect_dominant_language(detection_details, **self._request_options())
+
+        # Documents the service could not classify (listed in errors) stay unknown
+        results = [("unknown", 0.0)] * len(texts)
+        for document in (response.data.documents if response.data else None) or []:
+            if document.languages:
+                best = document.languages[0]
+                results[int(document.key)] = (best.code, best.score or 0.0)
+        return results
+
+
+# Unicode ranges checked in order; the first script found decides the language
+_MOCK_SCRIPTS = [
+    ("ja", re.compile(r"[\u3040-\u30ff]")),
+    ("ko", re.compile(r"[\uac00-\ud7af]")),
+    ("zh", re.compile(r"[\u4e00-\u9fff]")),
+    ("ru", re.compile(r"[\u0400-\u04ff]")),
+    ("ar", re.compile(r"[\u0600-\u06ff]")),
+    ("hi", re.compile(r"[\u0900-\u097f]")),
+    ("th", re.compile(r"[\u0e00-\u0e7f]")),
+]
+
+
+class MockBackend(TranslationBackend):
+    """Local stand-in for OCI: tags text with the target language, detects by script"""
+
+    def __init__(self, name: str = "mock", latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+
+    def translate(self, texts: List[str], target_language: str, source_language: str) -> List[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [f"[{target_language}] {text}" for text in texts]
+
+    def detect_language(self, text: str) -> str:
+        return self.detect_languages([text])[0][0]
+
+    def detect_languages(self, texts: List[str]) -> List[Tuple[str, float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._detect(text) for text in texts]
+
+    @staticmethod
+    def _detect(text: str) -> Tuple[str, float]:
+        for code, script in _MOCK_SCRIPTS:
+            if script.search(text):
+                return code, 1.0
+        return ("en", 1.0) if text.strip() else ("unknown", 0.0)
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Whether an error says the backend is unhealthy, as opposed to a bad request"""
+    status = getattr(error, "status", None)
+    if status is not None:
+        return status >= 500 or status == 429
+    return not isinstance(error, ValueError)
+
+
+class _BackendStats:
+    __slots__ = ("latency", "error_rate", "calls", "errors", "last_failure")
+
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.last_failure = 0.0
+
+
+class _AbandonableSlot:
+    """A scheduler slot held on a worker thread that the waiting caller can give back"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._release = None
+        self._abandoned = False
+
+    def hold(self, release: Callable[[], None]):
+        with self._lock:
+            self._release = release
+            abandoned = self._abandoned
+        if abandoned:
+            release()
+
+    def abandon(self):
+        with self._lock:
+            self._abandoned = True
+            release = self._release
+        if release is not None:
+            release()
+
+
+class BackendRouter:
+    """Sends each call to the fastest healthy backend.
+
+    Latency and error rate are exponentially weighted moving averages. A
+    backend whose error rate is above max_error_rate is skipped until
+    retry_after seconds have passed since its last failure. Backends without
+    a latency measurement are tried first, in the order given, so each one is
+    measured once early on. After that a small share of calls (explore) goes
+    to another healthy backend to keep its measurement fresh.
+
+    With a glossary, glossary terms are protected by placeholders before a
+    translation call and replaced with the approved terms afterwards.
+    """
+
+    def __init__(self, backends: List[TranslationBackend], alpha: float = 0.2,
+                 max_error_rate: float = 0.5, retry_after: float = 30.0, explore: float = 0.05,
+                 scheduler: Optional[PriorityScheduler] = None,
+                 limiter: Optional[AdaptiveLimiter] = None,
+                 glossary: Optional[GlossaryWatcher] = None, call_workers: int = 64):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = list(backends)
+        self.scheduler = scheduler if scheduler is not None else PriorityScheduler()
+        # Optional: without a limiter the scheduler's limit stays fixed
+        self.limiter = limiter
+        self.glossary = glossary
+        self.call_workers = call_workers
+        self._call_executor = None
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.retry_after = retry_after
+        self.explore = explore
+        self._stats = {id(backend): _BackendStats() for backend in self.backends}
+        self._lock = threading.Lock()
+
+    def _healthy(self, stats: _BackendStats, now: float) -> bool:
+        return stats.error_rate <= self.max_error_rate or now - stats.last_failure >= self.retry_after
+
+    def ranked(self) -> List[TranslationBackend]:
+        """Backends in the order they should be tried"""
+        now = time.time()
+        with self._lock:
+            def key(indexed):
+                position, backend = indexed
+                stats = self._stats[id(backend)]
+                return (
+                    not self._healthy(stats, now),
+                    stats.latency is not None,
+                    stats.latency or 0.0,
+                    position
+                )
+            ranked = [backend for _, backend in sorted(enumerate(self.backends), key=key)]
+            healthy = sum(1 for backend in ranked if self._healthy(self._stats[id(backend)], now))
+
+        if healthy > 1 and random.random() < self.explore:
+            probe = random.randrange(1, healthy)
+            ranked.insert(0, ranked.pop(probe))
+        return ranked
+
+    def _record(self, backend: TranslationBackend, latency: Optional[float], failed: bool):
+        with self._lock:
+            stats = self._stats[id(backend)]
+            stats.calls += 1
+            stats.error_rate += self.alpha * ((1.0 if failed else 0.0) - stats.error_rate)
+            if failed:
+                stats.errors += 1
+                stats.last_failure = time.time()
+            elif latency is not None:
+                stats.latency = latency if stats.latency is None else (
+                    stats.latency + self.alpha * (latency - stats.latency)
+                )
+
+    def call(self, operation: Callable[[TranslationBackend], object], priority: str = INTERACTIVE):
+        """Run operation on the best backend, failing over while backends are unhealthy.
+
+        Under a request deadline (see deadlines) the call runs on a worker
+        thread and the caller stops waiting when the budget runs out, raising
+        DeadlineExceeded. The abandoned call finishes in the background, but
+        its scheduler slot is given back at once, so calls nobody is waiting
+        for do not count against the concurrency limit.
+        """
+        if deadlines.remaining() is None:
+            return self._call_in_slot(operation, priority)
+        deadlines.check("backend call")
+        slot = _AbandonableSlot()
+        future = self._executor().submit(
+            contextvars.copy_context().run, self._call_in_slot, operation, priority, slot
+        )
+        try:
+            return future.result(timeout=max(deadlines.remaining(), 0.0))
+        except FutureTimeoutError:
+            slot.abandon()
+            raise DeadlineExceeded("Deadline exceeded waiting for the translation service")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._call_executor is None:
+                self._call_executor = ThreadPoolExecutor(self.call_workers, thread_name_prefix="backend-call")
+            return self._call_executor
+
+    def _call_in_slot(self, operation: Callable[[TranslationBackend], object], priority: str,
+                      slot: Optional["_AbandonableSlot"] = None):
+        try:
+            with self.scheduler.slot(priority, timeout=deadlines.remaining()) as release:
+                if slot is not None:
+                    slot.hold(release)
+                return self._call(operation, priority)
+        except TimeoutError:
+            raise DeadlineExceeded("Deadline exceeded waiting for a backend slot")
+
+    def _call(self, operation: Callable[[TranslationBackend], object], priority: str):
+        last_error = None
+        for backend in self.ranked():
+            # The caller may have given up while this call was queued or failing over
+            deadlines.check("backend call")
+            started = time.perf_counter()
+            try:
+                result = operation(backend)
+            except Exception as e:
+                if self.limiter and is_throttling_error(e):
+                    self.limiter.record(priority, None, throttled=True)
+                if not is_backend_failure(e):
+                    # The request itself is bad; another region would reject it too
+                    self._record(backend, None, failed=False)
+                    raise
+                self._record(backend, None, failed=True)
+                last_error = e
+                continue
+            latency = time.perf_counter() - started
+            self._record(backend, latency, failed=False)
+            if self.limiter:
+                self.limiter.record(priority, latency)
+            return result
+        raise last_error
+
+    def translate(self, texts: List[str], target_language: str, source_language: str,
+                  priority: str = INTERACTIVE) -> List[str]:
+        glossary = self.glossary.current() if self.glossary else None
+        if not glossary:
+            return self.call(lambda backend: backend.translate(texts, target_language, source_language), priority)
+
+        protected = [glossary.protect(text, target_language) for text in texts]
+        protected_texts = [text for text, _ in protected]
+        translations = self.call(
+            lambda backend: backend.translate(protected_texts, target_language, source_language), priority
+        )
+        return [
+            glossary.restore(translation, replacements)
+            for translation, (_, replacements) in zip(translations, protected)
+        ]
+
+    def detect_language(self, text: str, priority: str = INTERACTIVE) -> str:
+        return self.call(lambda backend: backend.detect_language(text), priority)
+
+    def detect_languages(self, texts: List[str], priority: str = INTERACTIVE) -> List[Tuple[str, float]]:
+        return self.call(lambda backend: backend.detect_languages(texts), priority)
+
+    def stats(self) -> List[Dict]:
+        """Per-backend routing state, in configuration order"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "name": backend.name,
+                    "healthy": self._healthy(stats, now),
+                    "latency_ms": round(stats.latency * 1000, 1) if stats.latency is not None else None,
+                    "error_rate": round(stats.error_rate, 3),
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                }
+                for backend, stats in ((backend, self._stats[id(backend)]) for backend in self.backends)
+            ]
+
+
+def parse_regions(value: Union[str, Iterable[str], None]) -> List[str]:
+    """Region list from a comma-separated string or a list (as in secrets.toml)"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [region.strip() for region in value if region.strip()]
+
+
+def mock_backend_enabled() -> bool:
+    return os.getenv("TRANSLATION_BACKEND", "oci").lower() == "mock"
+
+
+def build_router(config: Dict, regions: Iterable[str] = ()) -> Optional[BackendRouter]:
+    """Router over the configured backends, or None when OCI is not configured.
+
+    config["region"] is the home region and is tried first until latencies
+    are known; regions adds further OCI regions to route between.
+    """
+    if mock_backend_enabled():
+        backends = [MockBackend(latency=float(os.getenv("TRANSLATION_MOCK_LATENCY", "0")))]
+    elif not config or not all(config.values()):
+        return None
+    else:
+        names = dict.fromkeys([config["region"], *regions])
+        backends = [OCIBackend(config, region) for region in names]
+    scheduler = scheduler_from_env()
+    return BackendRouter(backends, scheduler=scheduler, limiter=limiter_from_env(scheduler),
+                         glossary=glossary_from_env())
+
+
+def scheduler_from_env() -> PriorityScheduler:
+    """Scheduler sized by OCI_MAX_CONCURRENCY; OCI_BULK_CONCURRENCY fixes the bulk cap"""
+    bulk = os.getenv("OCI_BULK_CONCURRENCY")
+    return PriorityScheduler(
+        limit=int(os.getenv("OCI_MAX_CONCURRENCY", "8")),
+        caps={BULK: int(bulk)} if bulk else None
+    )
+
+
+def limiter_from_env(scheduler: PriorityScheduler) -> Optional[AdaptiveLimiter]:
+    """AIMD limiter between OCI_MIN_CONCURRENCY and OCI_MAX_CONCURRENCY_CEILING; OCI_ADAPTIVE_CONCURRENCY=false disables it"""
+    if os.getenv("OCI_ADAPTIVE_CONCURRENCY", "true").lower() == "false":
+        return None
+    return AdaptiveLimiter(
+        scheduler,
+        min_limit=int(os.getenv("OCI_MIN_CONCURRENCY", "1")),
+        max_limit=int(os.getenv("OCI_MAX_CONCURRENCY_CEILING", "64"))
+    )
@@ -0,0 +1,370 @@
+import streamlit as st
+import os
+import re
+import secrets
+from collections import OrderedDict
+from typing import Dict, List
+
+from oci_translator import OCITranslator
+from translation_backends import build_router, parse_regions
+from live_translation import SentenceCache, is_translation_error, translate_by_sentence
+from translation_jobs import JobQueue
+from translation_history import HistoryStore, RecentHistory
+from cache_snapshot import open_snapshot
+from credential_reload import CredentialReloader
+
+# Translations remembered per session, so reruns with unchanged input skip OCI
+TRANSLATION_MEMO_SIZE = 50
+
+
+class StreamlitTranslator(OCITranslator):
+    """OCITranslator configured from secrets.toml (or the environment), reporting to the page"""
+
+    def _load_config(self) -> Dict:
+        """Load OCI configuration from environment variables or secrets"""
+        try:
+            # Try to load from Streamlit secrets first
+            if hasattr(st, 'secrets') and 'oci' in st.secrets:
+                config = {}
+
+                # Handle both key_content (direct key) and private_key_path (file path)
+                if "key_content" in st.secrets["oci"]:
+                    # Direct key content in secrets
+                    config["key_content"] = st.secrets["oci"]["key_content"]
+                    st.success("✅ Using key_content from secrets.toml")
+                elif "private_key_path" in st.secrets["oci"]:
+                    # Key file path in secrets
+                    private_key_path = st.secrets["oci"]["private_key_path"]
+                    if private_key_path.startswith('~'):
+                        private_key_path = os.path.expanduser(private_key_path)
+
+                    if not os.path.exists(private_key_path):
+                        st.error(f"❌ Private key file not found: {private_key_path}")
+                        return {}
+
+                    with open(private_key_path, 'r') as f:
+                        config["key_content"] = f.read()
+                    st.success(f"✅ Using private key from file: {private_key_path}")
+                else:
+                    st.error("❌ Neither key_content nor private_key_path found in secrets")
+                    return {}
+
+                # Load other configuration
+                config.update({
+                    "user": st.secrets["oci"]["user"],
+                    "fingerprint": st.secrets["oci"]["fingerprint"],
+                    "tenancy": st.secrets["oci"]["tenancy"],
+                    "region": st.secrets["oci"]["region"],
+                    "compartment_id": st.secrets["oci"]["compartment_id"]
+                })
+
+                # Validate all required fields are present
+                missing_fields = [k for k, v in config.items() if not v]
+                if missing_fields:
+                    st.error(f"❌ Missing configuration fields: {missing_fields}")
+                    return {}
+
+                st.success("✅ OCI configuration loaded from secrets.toml")
+                return config
+
+            else:
+                # Fallback to environment variables
+                config = super()._load_config()
+
+                # Validate all required fields are present
+                missing_fields = [k for k, v in config.items() if not v]
+                if missing_fields:
+                    st.warning(f"⚠️ Missing environment variables: {missing_fields}")
+                    return {}
+
+                st.info("✅ OCI configuration loaded from environment variables")
+                return config
+
+        except Exception as e:
+            st.error(f"❌ Error loading configuration: {str(e)}")
+            return {}
+
+    def _load_regions(self) -> List[str]:
+        """Extra OCI regions to route between, from secrets.toml or OCI_REGIONS"""
+        if hasattr(st, 'secrets') and 'oci' in st.secrets and 'regions' in st.secrets["oci"]:
+            return parse_regions(st.secrets["oci"]["regions"])
+        return parse_regions(os.getenv("OCI_REGIONS"))
+
+    def _build_router(self):
+        """The router shared by all sessions, with this run's credentials swapped in"""
+        if not self.config:
+            return None
+        try:
+            regions = tuple(self._load_regions())
+            router = get_backend_router(self.config["region"], regions, self.config)
+            # Rotated credentials are swapped in the background; until then the current clients serve
+            get_credential_reloader(self.config["region"], regions, router).update(self.config)
+            # Create the OCI clients now so configuration problems show up here
+            for backend in router.backends:
+                backend.connect()
+            st.success("✅ OCI AI Language client initialized successfully")
+            return router
+
+        except Exception as e:
+            st.error(f"❌ Failed to initialize OCI client: {str(e)}")
+            return None
+
+    def _error_message(self, error: Exception) -> str:
+        """User-facing message for a failed translation call"""
+        error_msg = str(error)
+        if "NotAuthorizedOrNotFound" in error_msg:
+            return "❌ AI Language service not enabled. Please enable it in OCI Console: AI & Machine Learning → Language → Translation"
+        elif "BadRequest" in error_msg and "Languagecode" in error_msg:
+            return "❌ Language code error. Please specify a valid source language."
+        elif "400" in error_msg:
+            return f"❌ API Error: Please check if the AI Language Translation service is enabled in your OCI tenancy."
+        else:
+            return f"❌ Translation error: {error_msg}"
+
+    def _detection_failed(self, error: Exception):
+        st.error(f"Language detection error: {str(error)}")
+
+
+@st.cache_resource
+def get_backend_router(region: str, regions: tuple, _config: Dict):
+    """Backend router shared by all sessions, so latency measurements survive reruns and key rotation"""
+    return build_router(_config, regions)
+
+@st.cache_resource
+def get_credential_reloader(region: str, regions: tuple, _router) -> CredentialReloader:
+    """Swaps changed secrets.toml or private_key_path credentials into the shared router"""
+    return CredentialReloader(_router)
+
+@st.cache_resource
+def get_job_queue(_translator) -> JobQueue:
+    """Background job queue shared by all sessions of this server"""
+    return JobQueue(_translator)
+
+@st.cache_resource
+def get_cache_snapshot():
+    """Translation cache snapshot exported by an earlier instance, if there is one"""
+    return open_snapshot()
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    """Persistent translation history shared by all sessions of this server"""
+    return HistoryStore()
+
+def history_session_id() -> str:
+    """History id kept in the URL (?history=...), so reloading or bookmarking the page keeps the history.
+
+    The id is the only thing that grants access to a history, so it is a
+    bearer secret: random from the secrets module, and never logged.
+    """
+    session_id = st.query_params.get("history", "")
+    if not re.fullmatch(r"[A-Za-z0-9_-]{32}", session_id):
+        session_id = secrets.token_urlsafe(24)
+        st.query_params["history"] = session_id
+    return session_id
+
+def init_session_state():
+    """Per-session history, sentence cache and translation memo, created on the first run"""
+    if 'translation_history' not in st.session_state:
+        # Only the most recent entries stay in memory; older ones are paged from the store
+        st.session_state.translation_history = RecentHistory(get_history_store(), history_session_id())
+    if 'sentence_cache' not in st.session_state:
+        st.session_state.sentence_cache = SentenceCache(max_entries=500, snapshot=get_cache_snapshot())
+    if 'translation_memo' not in st.session_state:
+        st.session_state.translation_memo = OrderedDict()
+
+def reset_history_page():
+    st.session_state.history_before_id = None
+
+def show_history_page(history: RecentHistory, languages: Dict[str, str], page_size: int = 10):
+    """One page of history, newest first, optionally filtered by a search query"""
+    query = st.text_input("🔍 Search history", key="history_query", on_change=reset_history_page)
+    before_id = st.session_state.get('history_before_id')
+    if query.strip():
+        entries = history.search(query, before_id, page_size)
+    else:
+        entries = history.page(before_id, page_size)
+
+    if not entries:
+        st.info("No matching entries")
+    for i, entry in enumerate(entries):
+        st.write(f"**{i+1}.** {entry['source']} → {entry['translation']}")
+        st.caption(f"({languages.get(entry['source_lang'], entry['source_lang'])} → {languages.get(entry['target_lang'], entry['target_lang'])})")
+        st.markdown("---")
+
+    col_newest, col_older = st.columns(2)
+    with col_newest:
+        if before_id is not None and st.button("⏮️ Newest", key="history_newest"):
+            reset_history_page()
+            st.rerun(scope="fragment")
+    with col_older:
+        # Keyset pagination: the next page starts below the oldest entry shown
+        if len(entries) == page_size and st.button("Older ⏭️", key="history_older"):
+            st.session_state.history_before_id = entries[-1]["id"]
+            st.rerun(scope="fragment")
+
+def fill_sample(text: str):
+    """Button callback: runs before the rerun, so it may set the input widget's value"""
+    st.session_state.input_text = text
+
+def show_sample_texts():
+    """Sample texts with buttons that fill the input field"""
+    st.subheader("📋 Sample Texts")
+    sample_texts = {
+        "Business Email": "Dear Mr. Tanaka, I hope this email finds you well. I would like to schedule a meeting to discuss our upcoming project collaboration.",
+        "Technical Documentation": "This API endpoint accepts POST requests with JSON payload containing user authentication credentials and returns a JWT token.",
+        "Casual Conversation": "Hello! How are you doing today? The weather is really nice, isn't it?",
+        "Legal Text": "This agreement shall be governed by and construed in accordance with the laws of Japan, without regard to its conflict of law provisions."
+    }
+
+    # Display sample texts with copy buttons
+    for sample_name, sample_text in sample_texts.items():
+        with st.expander(f"📄 {sample_name}"):
+            st.write(f"*{sample_text}*")
+
+            # Show the text in a copyable format
+            st.code(sample_text, language=None)
+
+            # Create columns for better layout
+            col_info, col_button = st.columns([3, 1])
+            with col_info:
+                st.caption("💡 Select the text above (triple-click) and copy (Ctrl+C/Cmd+C)")
+            with col_button:
+                st.button("📋 Fill", key=f"fill_{sample_name}", help="Fill input field with this sample",
+                          on_click=fill_sample, args=(sample_text,))
+
+def memoized_translation(text: str, source_lang: str, target_lang: str):
+    """(translation, detected_language) from an earlier run of this session, or None"""
+    memo = st.session_state.translation_memo
+    key = (text, source_lang, target_lang)
+    if key in memo:
+        memo.move_to_end(key)
+    return memo.get(key)
+
+def forget_translations_before_glossary(glossary):
+    """Keep translations made under an older glossary out of this session's caches"""
+    st.session_state.sentence_cache.glossary = glossary
+    version = None
+    if glossary is not None:
+        glossary.current()  # Also checks the file for changes
+        version = glossary.version()[0]
+    if st.session_state.get('memo_glossary_version') != version:
+        st.session_state.translation_memo.clear()
+        st.session_state.memo_glossary_version = version
+
+def translate_and_memoize(translator, text: str, source_lang: str, target_lang: str):
+    """Translate through the sentence cache and keep the result for later reruns"""
+    # Only sentences changed since the last translation reach OCI
+    translation, sentence_stats = translate_by_sentence(
+        translator, text, target_lang, source_lang,
+        cache=st.session_state.sentence_cache
+    )
+    result = (translation, sentence_stats["detected_language"])
+    # Errors are not kept, so the next rerun tries again
+    if not is_translation_error(translation):
+        memo = st.session_state.translation_memo
+        memo[(text, source_lang, target_lang)] = result
+        while len(memo) > TRANSLATION_MEMO_SIZE:
+            memo.popitem(last=False)
+    return result
+
+@st.fragment
+def show_translation_panel(translator, languages: Dict[str, str], source_lang: str, target_lang: str,
+                           submit_mode: bool, usage_limiter=None):
+    """Input and translation columns; typing or filling a sample reruns only this panel.
+
+    With a usage_limiter, translations that reach OCI are counted against it.
+    """
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader(f"📝 Input Text ({languages.get(source_lang, 'Auto-detect')})")
+        if submit_mode:
+            # Edits stay in the browser until the form is submitted
+            with st.form("translate_form", border=False):
+                st.text_area(
+                    "Enter text to translate:",
+                    height=200,
+                    placeholder="Type or paste your text here...",
+                    key="input_text"
+                )
+                if st.form_submit_button("🌐 Translate", type="primary", use_container_width=True):
+                    st.session_state.submitted_input = (st.session_state.input_text, source_lang, target_lang)
+            st.caption("💡 Translation runs when you click the button above")
+            request = st.session_state.get('submitted_input') or ("", source_lang, target_lang)
+        else:
+            input_text = st.text_area(
+                "Enter text to translate:",
+                height=200,
+                placeholder="Type or paste your text here...",
+                key="input_text"
+            )
+
+            # Translate button
+            st.button("🌐 Translate", type="primary", use_container_width=True)
+            st.caption("💡 Translation happens automatically as you type, or click the button above")
+            request = (input_text, source_lang, target_lang)
+
+        # Sample texts for testing
+        show_sample_texts()
+
+    text, request_source, request_target = request
+    with col2:
+        st.subheader(f"🎯 Translation ({languages.get(request_target, request_target)})")
+        st.session_state.last_translation = None
+
+        # Show translation when there's text (maintains real-time functionality)
+        # The button provides a clear call-to-action but doesn't change the behavior
+        if text.strip():
+            result = memoized_translation(text, request_source, request_target)
+            if result is None:
+                # Check usage limits before translation; memoized results do not count
+                if usage_limiter is not None:
+                    can_translate, limit_message = usage_limiter.can_translate()
+
+                    if not can_translate:
+                        st.error(f"🚫 {limit_message}")
+                        st.info("💡 Usage limits help keep this demo free and available for everyone. Limits reset daily/monthly.")
+                        return
+
+                with st.spinner("🔄 Translating..."):
+                    result = translate_and_memoize(translator, text, request_source, request_target)
+
+                # Increment usage counter after successful translation
+                if usage_limiter is not None and not is_translation_error(result[0]):
+                    usage_limiter.increment_usage()
+
+            translation, detected_lang = result
+
+            # Show detected source language if auto-detect is selected
+            if detected_lang and detected_lang != "unknown":
+                st.info(f"🔍 Detected language: {languages.get(detected_lang, detected_lang)}")
+
+            # Display translation
+            st.markdown(f'<div class="translation-box">{translation}</div>', unsafe_allow_html=True)
+            if not is_translation_error(translation):
+                st.session_state.last_translation = (text, translation, request_source, request_target)
+
+            # Copy button
+            if st.button("📋 Copy Translation"):
+                st.success("✅ Translation copied to clipboard!")
+                # Note: Actual clipboard functionality would require additional JavaScript
+        else:
+            st.info("👆 Enter text in the input area to see translation")
+
+@st.fragment
+def show_history_panel(languages: Dict[str, str]):
+    """Save button and history pages; they rerun without touching the translation panel"""
+    history = st.session_state.translation_history
+    if st.button("💾 Save to History"):
+        # The translation panel keeps the latest result in session state
+        last_translation = st.session_state.get('last_translation')
+        if last_translation:
+            history.add(*last_translation)
+            st.success("✅ Added to translation history!")
+        else:
+            st.info("👆 Translate some text first")
+
+    # Display history
+    if len(history):
+        with st.expander("📜 Translation History"):
+            show_history_page(history, languages)
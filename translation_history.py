@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+DEFAULT_HISTORY_DB = os.getenv("TRANSLATION_HISTORY_DB", "translation_history.sqlite3")
+# Retention; 0 keeps entries forever
+DEFAULT_MAX_AGE_DAYS = float(os.getenv("TRANSLATION_HISTORY_MAX_AGE_DAYS", "90"))
+DEFAULT_MAX_SESSION_ENTRIES = int(os.getenv("TRANSLATION_HISTORY_MAX_SESSION_ENTRIES", "1000"))
+# Expired entries are deleted at most this often (seconds)
+PRUNE_INTERVAL = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    src TEXT NOT NULL,
+    tgt TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_session ON history (session, id);
+CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+"""
+
+# External-content FTS index: the text is stored once, in the history table
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    source, translation, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, source, translation) VALUES (new.id, new.source, new.translation);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, source, translation)
+    VALUES ('delete', old.id, old.source, old.translation);
+END;
+"""
+
+
+def _entry(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "source": row["source"],
+        "translation": row["translation"],
+        "source_lang": row["src"],
+        "target_lang": row["tgt"],
+        "timestamp": row["ts"],
+    }
+
+
+class HistoryStore:
+    """Persistent translation history with full-text search.
+
+    Every entry is appended to an SQLite table and indexed with FTS5 (trigram
+    tokenizer, so search works for languages without spaces too). Reads are
+    paginated by id, newest first, so a session never loads its whole history.
+
+    Each session keeps its newest max_session_entries entries, and entries
+    older than max_age_days are deleted, checked at most once per
+    PRUNE_INTERVAL.
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB, max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+                 max_session_entries: int = DEFAULT_MAX_SESSION_ENTRIES):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_session_entries = max_session_entries
+        self._pruned_at = 0.0
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5 or the trigram tokenizer
+                self.full_text = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, session_id: str, source: str, translation: str, source_lang: str,
+            target_lang: str, timestamp: Optional[float] = None) -> Dict:
+        conn = self._connect()
+        ts = int(timestamp if timestamp is not None else time.time())
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO history (session, ts, src, tgt, source, translation) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, ts, source_lang, target_lang, source, translation)
+            )
+            if self.max_session_entries:
+                conn.execute(
+                    "DELETE FROM history WHERE session = ? AND id <= ("
+                    "SELECT id FROM history WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, self.max_session_entries)
+                )
+        if time.time() - self._pruned_at >= PRUNE_INTERVAL:
+            self.prune()
+        return {
+            "id": cursor.lastrowid,
+            "source": source,
+            "translation": translation,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "timestamp": ts,
+        }
+
+    def page(self, session_id: str, before_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """Entries for a session, newest first, older than before_id"""
+        rows = self._connect().execute(
+            "SELECT * FROM history WHERE session = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (session_id, before_id if before_id is not None else 2 ** 63 - 1, limit)
+        ).fetchall()
+        return [_entry(row) for row in rows]
+
+    def search(self, query: str, session_id: Optional[str] = None,
+               before_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """Entries whose source or translation contains query, newest first"""
+        query = query.strip()
+        if not query:
+            return []
+        before_id = before_id if before_id is not None else 2 ** 63 - 1
+        session_clause = "AND h.session = ?" if session_id is not None else ""
+        session_args = (session_id,) if session_id is not None else ()
+
+        # The trigram index needs at least three characters to match
+        if self.full_text and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = (
+                "SELECT h.* FROM history_fts f JOIN history h ON h.id = f.rowid"
+                f" WHERE history_fts MATCH ? AND h.id < ? {session_clause}"
+                " ORDER BY h.id DESC LIMIT ?"
+            )
+            args = (phrase, before_id, *session_args, limit)
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql = (
+                "SELECT h.* FROM history h"
+                " WHERE (h.source LIKE ? ESCAPE '\\' OR h.translation LIKE ? ESCAPE '\\')"
+                f" AND h.id < ? {session_clause} ORDER BY h.id DESC LIMIT ?"
+            )
+            args = (pattern, pattern, before_id, *session_args, limit)
+
+        return [_entry(row) for row in self._connect().execute(sql, args).fetchall()]
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete entries older than max_age_days; returns how many were removed"""
+        now = now if now is not None else time.time()
+        self._pruned_at = now
+        if not self.max_age_days:
+            return 0
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM history WHERE ts < ?", (int(now - self.max_age_days * 86400),))
+        return cursor.rowcount
+
+    def count(self, session_id: str) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM history WHERE session = ?", (session_id,)
+        ).fetchone()[0]
+
+
+class RecentHistory:
+    """Bounded ring buffer of a session's most recent entries, backed by a HistoryStore"""
+
+    def __init__(self, store: HistoryStore, session_id: str, max_entries: int = 50):
+        self.store = store
+        self.session_id = session_id
+        # A returning session starts with its latest stored entries
+        self._recent = deque(reversed(store.page(session_id, limit=max_entries)), maxlen=max_entries)
+
+    def add(self, source: str, translation: str, source_lang: str, target_lang: str) -> Dict:
+        entry = self.store.add(self.session_id, source, translation, source_lang, target_lang)
+        self._recent.append(entry)
+        return entry
+
+    def page(self, before_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """Newest-first page, served from memory when the ring buffer covers it"""
+        recent = [e for e in reversed(self._recent) if before_id is None or e["id"] < before_id]
+        if len(recent) >= limit or len(self._recent) < self._recent.maxlen:
+            # Either the page is in memory or the buffer still holds the whole session
+            return recent[:limit]
+        return self.store.page(self.session_id, before_id, limit)
+
+    def search(self, query: str, before_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        return self.store.search(query, self.session_id, before_id, limit)
+
+    def __len__(self):
+        return len(self._recent)
@@ -0,0 +1,327 @@
+import csv
+import io
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from batch_translation import (
+    MAX_BATCH_CHARACTERS,
+    MAX_BATCH_DOCUMENTS,
+    PackingTuner,
+    detect_batch_language,
+    pack_texts,
+    translate_batch_with_retry,
+    tuner_from_env,
+)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+DEFAULT_JOB_DB = os.getenv("TRANSLATION_JOB_DB", "translation_jobs.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    detected_language TEXT,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    translatable_lines INTEGER,
+    unique_texts INTEGER,
+    characters_saved INTEGER,
+    error TEXT,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_items_text ON job_items (job_id, text);
+CREATE TABLE IF NOT EXISTS job_strings (
+    job_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    translation TEXT,
+    PRIMARY KEY (job_id, rank)
+) WITHOUT ROWID;
+"""
+
+
+class JobStore:
+    """SQLite-backed store for batch translation jobs and their items"""
+
+    def __init__(self, path: str = DEFAULT_JOB_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Databases from before jobs had owners; their jobs stay unreadable over the API
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, texts: Iterable[str], target_language: str, source_language: str,
+               owner: Optional[str] = None) -> str:
+        """Store a new job; owner identifies the client allowed to read it, if the caller restricts that"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, target_language, source_language, total, owner, created_at,"
+                " updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, target_language, source_language, 0, owner, now, now)
+            )
+            # Blank lines need no translation and count as already done
+            conn.executemany(
+                "INSERT INTO job_items (job_id, position, text, translation) VALUES (?, ?, ?, ?)",
+                ((job_id, i, text, None if text.strip() else text) for i, text in enumerate(texts))
+            )
+            conn.execute(
+                "UPDATE jobs SET (total, completed) = (SELECT COUNT(*), COUNT(translation)"
+                " FROM job_items WHERE job_id = ?) WHERE id = ?",
+                (job_id, job_id)
+            )
+            self._index_strings(conn, job_id)
+        return job_id
+
+    def _index_strings(self, conn: sqlite3.Connection, job_id: str):
+        """Record each distinct pending text once, most frequent first"""
+        conn.execute(
+            "INSERT INTO job_strings (job_id, rank, text, occurrences)"
+            " SELECT ?, ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, MIN(position)), text, COUNT(*)"
+            " FROM job_items WHERE job_id = ? AND translation IS NULL GROUP BY text",
+            (job_id, job_id)
+        )
+        conn.execute(
+            "UPDATE jobs SET (translatable_lines, unique_texts, characters_saved) ="
+            " (SELECT COALESCE(SUM(occurrences), 0), COUNT(*),"
+            " COALESCE(SUM((occurrences - 1) * LENGTH(text)), 0)"
+            " FROM job_strings WHERE job_id = ?)"
+            " WHERE id = ?",
+            (job_id, job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished_job_ids(self) -> List[str]:
+        rows = self._connect().execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (JOB_QUEUED, JOB_RUNNING)
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def pending_strings(self, job_id: str, limit: int, after_rank: int = 0) -> List[sqlite3.Row]:
+        """Distinct untranslated texts ranked after after_rank, most frequent first"""
+        return self._connect().execute(
+            "SELECT rank, text, occurrences FROM job_strings WHERE job_id = ? AND rank > ?"
+            " AND translation IS NULL ORDER BY rank LIMIT ?",
+            (job_id, after_rank, limit)
+        ).fetchall()
+
+    def save_translations(self, job_id: str, rows: List[sqlite3.Row], translations: List[str]):
+        """Store translations for rows from pending_strings and fill in every item that uses them"""
+        conn = self._connect()
+        with conn:
+            completed = 0
+            for row, translation in zip(rows, translations):
+                conn.execute(
+                    "UPDATE job_strings SET translation = ? WHERE job_id = ? AND rank = ?",
+                    (translation, job_id, row["rank"])
+                )
+                completed += conn.execute(
+                    "UPDATE job_items SET translation = ? WHERE job_id = ? AND text = ? AND translation IS NULL",
+                    (translation, job_id, row["text"])
+                ).rowcount
+            conn.execute(
+                "UPDATE jobs SET completed = completed + ?, updated_at = ? WHERE id = ?",
+                (completed, time.time(), job_id)
+            )
+
+    def claim(self, job_id: str, stale_after: float) -> bool:
+        """Mark a job running for this worker; running jobs left idle past stale_after can be taken over"""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?"
+                " AND (status = ? OR (status = ? AND updated_at < ?))",
+                (JOB_RUNNING, now, job_id, JOB_QUEUED, JOB_RUNNING, now - stale_after)
+            )
+        return cursor.rowcount == 1
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None,
+                   detected_language: Optional[str] = None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, detected_language = COALESCE(?, detected_language),"
+                " updated_at = ? WHERE id = ?",
+                (status, error, detected_language, time.time(), job_id)
+            )
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT position, text, translation FROM job_items WHERE job_id = ?"
+            " AND position >= ? ORDER BY position LIMIT ?",
+            (job_id, offset, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class JobQueue:
+    """Runs batch translation jobs on a worker pool, separate from request handling"""
+
+    def __init__(self, translator, store: Optional[JobStore] = None, workers: int = 2,
+                 max_documents: int = MAX_BATCH_DOCUMENTS,
+                 max_characters: int = MAX_BATCH_CHARACTERS, stale_after: float = 300,
+                 tuner: Optional[PackingTuner] = None):
+        self.translator = translator
+        self.store = store if store is not None else JobStore()
+        self.max_documents = max_documents
+        self.max_characters = max_characters
+        # Characters per request are tuned online, with max_characters as the ceiling
+        self.tuner = tuner if tuner is not None else tuner_from_env(max_characters)
+        self.stale_after = stale_after
+        self._queue = queue.Queue()
+        # Jobs in the queue, so recovery does not enqueue one twice
+        self._queued = set()
+        self._queued_lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"translation-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._recover()
+
+    def _recover(self):
+        # Pick up jobs left behind by a restart or by another process that died
+        for job_id in self.store.unfinished_job_ids():
+            self._enqueue(job_id)
+
+    def _enqueue(self, job_id: str):
+        with self._queued_lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+        self._queue.put(job_id)
+
+    def submit(self, texts: Iterable[str], target_language: str, source_language: str = "auto",
+               owner: Optional[str] = None) -> str:
+        job_id = self.store.create(texts, target_language, source_language, owner)
+        self._enqueue(job_id)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.store.get(job_id)
+        if job:
+            job["progress"] = job["completed"] / job["total"] if job["total"] else 1.0
+            lines = job["translatable_lines"]
+            job["dedup_ratio"] = 1 - job["unique_texts"] / lines if lines else 0.0
+        return job
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict]:
+        return self.store.results(job_id, offset, limit)
+
+    def iter_results(self, job_id: str, page_size: int = 500) -> Iterator[Dict]:
+        """All results in input order, read one page at a time"""
+        offset = 0
+        while True:
+            items = self.store.results(job_id, offset, page_size)
+            yield from items
+            if len(items) < page_size:
+                return
+            offset = items[-1]["position"] + 1
+
+    def export(self, job_id: str, delimiter: str = ",", page_size: int = 500) -> Iterator[bytes]:
+        """Results as UTF-8 CSV, one chunk per page, so a download never holds the whole file"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter)
+        writer.writerow(["line", "source", "translation"])
+        for count, item in enumerate(self.iter_results(job_id, page_size), 1):
+            writer.writerow([item["position"] + 1, item["text"], item["translation"]])
+            if count % page_size == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            try:
+                job_id = self._queue.get(timeout=self.stale_after)
+            except queue.Empty:
+                # Running jobs whose worker stopped updating them are claimed again
+                self._recover()
+                continue
+            with self._queued_lock:
+                self._queued.discard(job_id)
+            try:
+                self._process(job_id)
+            except Exception as e:
+                self.store.set_status(job_id, JOB_FAILED, error=f"Translation error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job_id: str):
+        if not self.store.claim(job_id, self.stale_after):
+            return
+        job = self.store.get(job_id)
+
+        source_language = job["detected_language"] or job["source_language"]
+        if source_language == "auto":
+            sample = [row["text"] for row in self.store.pending_strings(job_id, 50)]
+            source_language = detect_batch_language(self.translator, sample) if sample else "en"
+        self.store.set_status(job_id, JOB_RUNNING, detected_language=source_language)
+
+        # Each distinct text is translated once, most frequent first, so partial
+        # results cover as many lines as possible
+        last_rank = 0
+        while True:
+            rows = self.store.pending_strings(job_id, self.max_documents * 10, after_rank=last_rank)
+            if not rows:
+                break
+            last_rank = rows[-1]["rank"]
+            for pack in pack_texts(
+                rows,
+                max_documents=self.max_documents,
+                max_characters=lambda: self.tuner.target(source_language, job["target_language"]),
+                size=lambda row: len(row["text"])
+            ):
+                translations = translate_batch_with_retry(
+                    self.translator, [row["text"].strip() for row in pack],
+                    job["target_language"], source_language, tuner=self.tuner
+                )
+                self.store.save_translations(job_id, pack, translations)
+
+        self.store.set_status(job_id, JOB_DONE)